@@ -2,11 +2,16 @@ import streamlit as st
 import tempfile
 from pathlib import Path
 
-from extractor import extract_urls
-from cleaner import clean_records as clean_pipeline_records
-from export_profiles import apply_export_profile
-from export_writer import write_export_jsonl
-from qa_generator import generate_qa_dataset, write_qa_jsonl
+from pipeline import run_pipeline
+from qa_generator import (
+    configure_qa,
+    qa_stats,
+    DEFAULT_QA_BUDGET,
+    DEFAULT_RPM,
+    DEFAULT_MAX_IN_FLIGHT,
+    DEFAULT_BATCH_ITEMS,
+    configure_qa_cache,
+)
 from dataset_appender import append_jsonl_datasets
 
 
@@ -46,6 +51,45 @@ generate_qa = st.checkbox(
     help="Uses a pretrained OpenRouter model to generate one Q/A per cleaned text chunk."
 )
 
+if generate_qa:
+    qa_col1, qa_col2, qa_col3, qa_col4 = st.columns(4)
+    qa_budget = qa_col1.number_input(
+        "Q/A budget (chunks)",
+        min_value=1,
+        value=DEFAULT_QA_BUDGET,
+        help="Maximum number of chunks sent to the model."
+    )
+    qa_rpm = qa_col2.number_input(
+        "Requests per minute",
+        min_value=1,
+        value=DEFAULT_RPM,
+        help="Client-side rate limit; match your provider plan."
+    )
+    qa_in_flight = qa_col3.number_input(
+        "Concurrent requests",
+        min_value=1,
+        max_value=32,
+        value=DEFAULT_MAX_IN_FLIGHT,
+    )
+    qa_batch = qa_col4.number_input(
+        "Chunks per request",
+        min_value=1,
+        max_value=32,
+        value=DEFAULT_BATCH_ITEMS,
+        help="Packs several short chunks into one request; 1 sends each chunk alone."
+    )
+    qa_cache_col, qa_checkpoint_col = st.columns(2)
+    qa_cache_dir = qa_cache_col.text_input(
+        "Q/A cache directory",
+        value=".qa_cache",
+        help="Completions are reused across runs and datasets; leave empty to disable."
+    )
+    qa_checkpoint = qa_checkpoint_col.text_input(
+        "Q/A checkpoint file",
+        value="",
+        help="Every finished pair is appended here; rerun with the same file to resume an interrupted job."
+    )
+
 urls = [u.strip() for u in urls_input.splitlines() if u.strip()]
 
 if st.button("Extract Web Data"):
@@ -53,31 +97,52 @@ if st.button("Extract Web Data"):
         st.warning("Please enter at least one URL.")
         st.stop()
 
-    with st.spinner("Extracting content from web pages..."):
-        internal_records = extract_urls(urls)
+    with tempfile.NamedTemporaryFile(delete=False, suffix=".jsonl") as tmp:
+        dataset_path = Path(tmp.name)
 
-    if not internal_records:
+    qa_path = None
+    qa_options = None
+    if generate_qa:
+        # Q/A runs alongside extraction, fed chunk by chunk
+        with tempfile.NamedTemporaryFile(delete=False, suffix=".jsonl") as tmp:
+            qa_path = Path(tmp.name)
+        configure_qa(rpm=qa_rpm, max_in_flight=int(qa_in_flight))
+        configure_qa_cache(Path(qa_cache_dir) if qa_cache_dir.strip() else None)
+        qa_options = {
+            "max_items": int(qa_budget),
+            "batch_items": int(qa_batch),
+            "checkpoint_path": Path(qa_checkpoint) if qa_checkpoint.strip() else None,
+        }
+
+    progress_bar = st.progress(0.0, text="Extracting content from web pages...")
+
+    def report_progress(done: int, total: int, url: str) -> None:
+        text = f"Processed {done}/{total}: {url}"
+        if done == total and generate_qa:
+            text = "Extraction done; finishing Q/A generation..."
+        progress_bar.progress(done / total, text=text)
+
+    # extract -> clean -> profile -> write (-> Q/A), streamed per URL
+    stats = run_pipeline(
+        urls,
+        dataset_path,
+        clean=True,
+        profile="training_minimal",
+        progress=report_progress,
+        preview=2,
+        qa_output_path=qa_path,
+        qa_options=qa_options,
+    )
+
+    if not stats["extracted_records"]:
         st.error("No content could be extracted.")
         st.stop()
 
-    with st.spinner("Cleaning extracted content..."):
-        cleaned_internal_records = clean_pipeline_records(internal_records)
-
-    if not cleaned_internal_records:
+    if not stats["written_records"]:
         st.error("All extracted content was filtered out during cleaning.")
         st.stop()
 
-    clean_export_records = apply_export_profile(
-        cleaned_internal_records,
-        profile="training_minimal"
-    )
-
-    with tempfile.NamedTemporaryFile(delete=False, suffix=".jsonl") as tmp:
-        dataset_path = Path(tmp.name)
-
-    write_export_jsonl(clean_export_records, dataset_path)
-
-    st.success(f"Dataset generated. Records: {len(clean_export_records)}")
+    st.success(f"Dataset generated. Records: {stats['written_records']}")
 
     with open(dataset_path, "rb") as f:
         st.download_button(
@@ -88,16 +153,10 @@ if st.button("Extract Web Data"):
         )
 
     if generate_qa:
-        with st.spinner("Generating chatbot Q/A dataset..."):
-            qa_records = generate_qa_dataset(clean_export_records)
-
-        if qa_records:
-            with tempfile.NamedTemporaryFile(delete=False, suffix=".jsonl") as tmp:
-                qa_path = Path(tmp.name)
+        st.caption(f"Q/A requests: {qa_stats()}")
 
-            write_qa_jsonl(qa_records, qa_path)
-
-            st.success(f"Chatbot dataset generated. Q/A pairs: {len(qa_records)}")
+        if stats["qa_records"]:
+            st.success(f"Chatbot dataset generated. Q/A pairs: {stats['qa_records']}")
 
             with open(qa_path, "rb") as f:
                 st.download_button(
@@ -110,7 +169,7 @@ if st.button("Extract Web Data"):
             st.warning("Q/A dataset could not be generated.")
 
     st.subheader("Sample Cleaned Text")
-    st.json(clean_export_records[:2])
+    st.json(stats["preview"])
 
 
 # ==================================================
@@ -140,6 +199,29 @@ add_dataset_source = st.checkbox(
     value=False
 )
 
+near_dedup = st.checkbox(
+    "Also remove near-duplicates (MinHash/LSH)",
+    value=False,
+    help="Skips records whose word shingles overlap an earlier record above the threshold."
+)
+
+jaccard_threshold = st.slider(
+    "Near-duplicate Jaccard threshold",
+    min_value=0.5,
+    max_value=1.0,
+    value=0.8,
+    step=0.05,
+    disabled=not near_dedup,
+)
+
+append_workers = st.number_input(
+    "Worker processes (0 = single process)",
+    min_value=0,
+    max_value=64,
+    value=0,
+    help="Parses and fingerprints file chunks in parallel; output is identical."
+)
+
 if st.button("Append Datasets"):
     if not uploaded_files or len(uploaded_files) < 2:
         st.warning("Please upload at least two JSONL files.")
@@ -162,6 +244,9 @@ if st.button("Append Datasets"):
             output_file=output_path,
             deduplicate=deduplicate,
             add_dataset_source=add_dataset_source,
+            near_dedup=near_dedup,
+            jaccard_threshold=jaccard_threshold,
+            workers=int(append_workers),
         )
 
     st.success("Datasets appended successfully.")
@@ -0,0 +1,185 @@
+import argparse
+import json
+import random
+import re
+import time
+from typing import Callable, Dict, List
+
+import json_codec
+from cleaner import BOILERPLATE_PATTERNS, CleaningEngine
+from export_profiles import iter_export_profile
+from jsonl_writer import build_record
+
+
+# ==================================================
+# Synthetic Corpus
+# ==================================================
+
+_WORDS = (
+    "the of model data learning network system language python code "
+    "river mountain history science value result method research page "
+    "article section example function library market price review"
+).split()
+
+
+def synthetic_records(n: int, seed: int = 0) -> List[Dict]:
+    """
+    Chunk-sized records with a realistic mix of keep / drop cases.
+    """
+    rng = random.Random(seed)
+    records = []
+
+    for _ in range(n):
+        text = " ".join(rng.choice(_WORDS) for _ in range(rng.randint(20, 220)))
+        roll = rng.random()
+        if roll < 0.08:
+            text += " click here to subscribe"
+        elif roll < 0.12:
+            text = "12345 $$$ ### " * 30
+        elif roll < 0.15:
+            text = "\n  ".join(text.split(" ")[:10])
+
+        records.append({"text": text, "source_url": "https://example.com"})
+
+    return records
+
+
+def _rate(fn: Callable[[], object], n: int) -> float:
+    started = time.perf_counter()
+    fn()
+    return n / (time.perf_counter() - started)
+
+
+# ==================================================
+# Cleaner: legacy per-pattern loop vs CleaningEngine
+# ==================================================
+
+def _legacy_clean_records(records: List[Dict]) -> List[Dict]:
+    # Pre-engine implementation, kept here as the baseline
+    cleaned = []
+    for r in records:
+        text = r.get("text", "")
+        if not text:
+            continue
+        text = re.sub(r"\s+", " ", text).strip()
+        lowered = text.lower()
+        if any(re.search(p, lowered) for p in BOILERPLATE_PATTERNS):
+            continue
+        if len(text) < 120:
+            continue
+        if sum(c.isalpha() for c in text) / max(len(text), 1) < 0.6:
+            continue
+        new_record = dict(r)
+        new_record["text"] = text
+        cleaned.append(new_record)
+    return cleaned
+
+
+def bench_cleaner(n: int) -> None:
+    records = synthetic_records(n)
+    engine = CleaningEngine()
+
+    legacy_out = _legacy_clean_records(records)
+    engine_out = list(engine.iter_clean(records))
+    if legacy_out != engine_out:
+        raise AssertionError("CleaningEngine output differs from legacy cleaner")
+
+    engine.reset_stats()
+    before = _rate(lambda: _legacy_clean_records(records), n)
+    after = _rate(lambda: list(engine.iter_clean(records)), n)
+
+    print(f"cleaner ({n} chunks)")
+    print(f"  legacy : {before:>10,.0f} chunks/sec")
+    print(f"  engine : {after:>10,.0f} chunks/sec  ({after / before:.1f}x)")
+    print(f"  drops  : { {k: v for k, v in engine.stats.items() if k != 'rule_hits'} }")
+
+
+# ==================================================
+# JSON Codec: stdlib vs orjson on real record shapes
+# ==================================================
+
+def _record_shapes(n: int) -> Dict[str, List[Dict]]:
+    internal = [
+        build_record(
+            text=r["text"] + " caf\u00e9 na\u00efve \u2014 \u6f22\u5b57",
+            source_url=f"https://example.com/article/{i}",
+            site_type="news",
+            extraction_strategy="dom_based",
+            confidence=0.85,
+        )
+        for i, r in enumerate(synthetic_records(n))
+    ]
+    profile = "training_minimal"
+    qa = [
+        {
+            "messages": [
+                {"role": "user", "content": r["text"][:120] + "?"},
+                {"role": "assistant", "content": r["text"][:600]},
+            ]
+        }
+        for r in internal
+    ]
+    return {
+        "internal": internal,
+        f"export:{profile}": list(iter_export_profile(internal, profile)),
+        "qa_chat": qa,
+    }
+
+
+def bench_codec(n: int) -> None:
+    shapes = _record_shapes(n)
+    backends = ["json"]
+    try:
+        import orjson  # noqa: F401
+        backends.append("orjson")
+    except ImportError:
+        print("orjson not installed; only the stdlib backend is measured")
+
+    # Pre-codec writers: json.dumps(..., ensure_ascii=False) per record
+    def legacy_dump(records):
+        return [(json.dumps(r, ensure_ascii=False) + "\n").encode("utf-8") for r in records]
+
+    print(f"json codec ({n} records per shape)")
+    try:
+        for shape, records in shapes.items():
+            lines = legacy_dump(records)
+            baseline = _rate(lambda: legacy_dump(records), n)
+            print(f"  {shape}")
+            print(f"    legacy json.dumps    : {baseline:>10,.0f} rec/sec")
+
+            for backend in backends:
+                json_codec.configure_codec(backend)
+                if [json_codec.loads(x) for x in json_codec.dumps_lines(records).splitlines()] != records:
+                    raise AssertionError(f"{backend} does not round-trip {shape} records")
+
+                dump = _rate(lambda: json_codec.dumps_lines(records), n)
+                load = _rate(lambda: json_codec.loads_lines(lines), n)
+                print(
+                    f"    {backend:<7} dumps_lines  : {dump:>10,.0f} rec/sec  ({dump / baseline:.1f}x)"
+                    f"   loads: {load:>10,.0f} rec/sec"
+                )
+    finally:
+        json_codec.configure_codec()
+
+
+# ==================================================
+# CLI
+# ==================================================
+
+BENCHMARKS = {
+    "cleaner": bench_cleaner,
+    "codec": bench_codec,
+}
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Micro-benchmarks")
+    parser.add_argument("name", choices=sorted(BENCHMARKS))
+    parser.add_argument("-n", type=int, default=100_000, help="Corpus size")
+    args = parser.parse_args()
+
+    BENCHMARKS[args.name](args.n)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,509 @@
+import asyncio
+import atexit
+import os
+import threading
+import time
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional
+from urllib.parse import urlparse
+
+try:
+    import psutil
+except ImportError:  # optional; /proc is read instead on Linux
+    psutil = None
+
+
+# ==================================================
+# Pool Defaults
+# ==================================================
+
+DEFAULT_BROWSERS = 1
+DEFAULT_CONTEXTS_PER_BROWSER = 4
+DEFAULT_RECYCLE_AFTER = 50
+DEFAULT_RENDER_TIMEOUT_MS = 30000
+
+# Resource types we never use for text extraction
+DEFAULT_BLOCKED_RESOURCE_TYPES = ("image", "media", "font", "stylesheet")
+
+# Third-party ad / tracking hosts (subdomains are matched too)
+DEFAULT_BLOCKED_DOMAINS = (
+    "doubleclick.net",
+    "googlesyndication.com",
+    "googletagmanager.com",
+    "google-analytics.com",
+    "adservice.google.com",
+    "facebook.net",
+    "scorecardresearch.com",
+    "hotjar.com",
+    "criteo.com",
+    "taboola.com",
+    "outbrain.com",
+)
+
+# Readiness modes:
+# - "content": stop once the content selector exists and text length is stable
+# - "networkidle": legacy behaviour, wait for the network to go quiet
+READINESS_MODES = ("content", "networkidle")
+DEFAULT_READINESS = "content"
+READINESS_POLL_MS = 250
+READINESS_STABLE_POLLS = 2
+
+# Browser memory is sampled at most this often (after renders)
+RSS_SAMPLE_SECONDS = 1.0
+
+
+class _ContextSlot:
+    """
+    One browser context; a render borrows a slot for one page.
+    index is the slot's browser in the pool (kept across relaunches).
+    """
+    def __init__(self, browser, context, index: int = 0):
+        self.browser = browser
+        self.context = context
+        self.index = index
+        self.pages = 0
+
+
+def _is_blocked_host(url: str, blocked_domains: Iterable[str]) -> bool:
+    host = (urlparse(url).hostname or "").lower()
+    return any(host == d or host.endswith("." + d) for d in blocked_domains)
+
+
+def _proc_descendants_rss(root_pid: int) -> Optional[int]:
+    proc = Path("/proc")
+    if not (proc / "self" / "statm").exists():
+        return None
+
+    page_size = os.sysconf("SC_PAGE_SIZE")
+    children: Dict[int, List[int]] = {}
+    rss: Dict[int, int] = {}
+    for entry in proc.iterdir():
+        if not entry.name.isdigit():
+            continue
+        try:
+            stat = (entry / "stat").read_text()
+            statm = (entry / "statm").read_text()
+        except OSError:  # exited while scanning
+            continue
+        # the command name may contain spaces; ppid follows ") state"
+        ppid = int(stat.rsplit(")", 1)[1].split()[1])
+        children.setdefault(ppid, []).append(int(entry.name))
+        rss[int(entry.name)] = int(statm.split()[1]) * page_size
+
+    total, stack = 0, list(children.get(root_pid, []))
+    while stack:
+        pid = stack.pop()
+        total += rss.get(pid, 0)
+        stack.extend(children.get(pid, []))
+    return total
+
+
+def _browser_rss_mb() -> Optional[float]:
+    """
+    Current resident memory of this process's descendants: the
+    Playwright driver and the Chromium processes it launched (browser,
+    renderers, GPU). None where it cannot be measured.
+    """
+    if psutil is not None:
+        total = 0
+        for child in psutil.Process().children(recursive=True):
+            try:
+                total += child.memory_info().rss
+            except psutil.Error:
+                continue
+    else:
+        total = _proc_descendants_rss(os.getpid())
+        if total is None:
+            return None
+    return round(total / (1024 * 1024), 1)
+
+
+# ==================================================
+# Browser Pool
+# ==================================================
+
+class BrowserPool:
+    """
+    Long-lived Chromium pool shared across URLs.
+
+    - browsers x contexts_per_browser pages render concurrently
+    - a context is recycled after recycle_after pages
+    - a browser that crashed or disconnected is relaunched on its
+      next render
+    - memory of the browser process tree is sampled after renders
+      (browser_rss_mb / peak_browser_rss_mb in stats())
+    - images, media, fonts, stylesheets and tracker hosts are aborted
+    - readiness stops at stable content, bounded by a hard deadline
+    - Playwright runs on a private asyncio loop thread, so render()
+      can be called from any worker thread
+    """
+
+    def __init__(
+        self,
+        browsers: int = DEFAULT_BROWSERS,
+        contexts_per_browser: int = DEFAULT_CONTEXTS_PER_BROWSER,
+        recycle_after: int = DEFAULT_RECYCLE_AFTER,
+        headless: bool = True,
+        blocked_resource_types: Iterable[str] = DEFAULT_BLOCKED_RESOURCE_TYPES,
+        blocked_domains: Iterable[str] = DEFAULT_BLOCKED_DOMAINS,
+        readiness: str = DEFAULT_READINESS,
+        content_selector: Optional[str] = None,
+    ):
+        if readiness not in READINESS_MODES:
+            raise ValueError(f"Unknown readiness mode: {readiness}")
+
+        self.browsers = max(1, browsers)
+        self.contexts_per_browser = max(1, contexts_per_browser)
+        self.recycle_after = max(1, recycle_after)
+        self.headless = headless
+        self.blocked_resource_types = frozenset(blocked_resource_types)
+        self.blocked_domains = tuple(d.lower() for d in blocked_domains)
+        self.readiness = readiness
+        self.content_selector = content_selector
+
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._thread: Optional[threading.Thread] = None
+        self._playwright = None
+        self._browsers: List = []
+        self._slots: Optional[asyncio.Queue] = None
+        self._relaunch_lock: Optional[asyncio.Lock] = None
+
+        self._stats_lock = threading.Lock()
+        self._stats = {
+            "pages_rendered": 0,
+            "render_failures": 0,
+            "contexts_recycled": 0,
+            "recycle_failures": 0,
+            "browser_relaunches": 0,
+            "requests_blocked": 0,
+            "deadline_hits": 0,
+            "peak_in_flight": 0,
+        }
+        self._render_seconds = 0.0
+        self._in_flight = 0
+        self._started_at: Optional[float] = None
+        self._rss_mb: Optional[float] = None
+        self._peak_rss_mb: Optional[float] = None
+        self._rss_sampled_at = 0.0
+
+    # ----------------------------
+    # Lifecycle
+    # ----------------------------
+
+    def start(self) -> "BrowserPool":
+        self._loop = asyncio.new_event_loop()
+        self._thread = threading.Thread(
+            target=self._loop.run_forever,
+            name="browser-pool",
+            daemon=True,
+        )
+        self._thread.start()
+        try:
+            self._call(self._astart())
+        except Exception:
+            self.close()
+            raise
+        self._started_at = time.time()
+        return self
+
+    def __enter__(self) -> "BrowserPool":
+        return self.start()
+
+    def __exit__(self, *exc) -> None:
+        self.close()
+
+    def close(self) -> None:
+        if self._loop is None:
+            return
+        try:
+            self._call(self._aclose())
+        finally:
+            self._loop.call_soon_threadsafe(self._loop.stop)
+            self._thread.join(timeout=10)
+            self._loop.close()
+            self._loop = None
+
+    def _call(self, coro, timeout: Optional[float] = None):
+        return asyncio.run_coroutine_threadsafe(coro, self._loop).result(timeout)
+
+    async def _astart(self) -> None:
+        from playwright.async_api import async_playwright
+
+        self._playwright = await async_playwright().start()
+        self._slots = asyncio.Queue()
+        self._relaunch_lock = asyncio.Lock()
+
+        for index in range(self.browsers):
+            browser = await self._playwright.chromium.launch(headless=self.headless)
+            self._browsers.append(browser)
+            for _ in range(self.contexts_per_browser):
+                context = await self._new_context(browser)
+                self._slots.put_nowait(_ContextSlot(browser, context, index))
+        self._sample_rss(force=True)
+
+    async def _aclose(self) -> None:
+        for browser in self._browsers:
+            try:
+                await browser.close()
+            except Exception:
+                pass
+        self._browsers = []
+        if self._playwright is not None:
+            await self._playwright.stop()
+            self._playwright = None
+
+    async def _connected_browser(self, index: int):
+        """
+        The pool's browser at index, relaunched first if it crashed or
+        disconnected (once, however many slots notice it).
+        """
+        async with self._relaunch_lock:
+            browser = self._browsers[index]
+            if browser.is_connected():
+                return browser
+            try:
+                await browser.close()
+            except Exception:
+                pass
+            browser = await self._playwright.chromium.launch(headless=self.headless)
+            self._browsers[index] = browser
+            self._bump("browser_relaunches")
+            return browser
+
+    async def _new_context(self, browser):
+        context = await browser.new_context()
+        if self.blocked_resource_types or self.blocked_domains:
+            await context.route("**/*", self._route)
+        return context
+
+    async def _route(self, route) -> None:
+        request = route.request
+        if (
+            request.resource_type in self.blocked_resource_types
+            or _is_blocked_host(request.url, self.blocked_domains)
+        ):
+            self._bump("requests_blocked")
+            await route.abort()
+        else:
+            await route.continue_()
+
+    async def _recycle(self, slot: _ContextSlot) -> None:
+        """
+        Replaces the slot's context. Never raises: if a new context
+        cannot be created the slot is left empty and rebuilt the next
+        time it is borrowed.
+        """
+        try:
+            await slot.context.close()
+        except Exception:
+            pass
+        slot.context = None
+        slot.pages = 0
+        try:
+            slot.context = await self._new_context(slot.browser)
+        except Exception:
+            self._bump("recycle_failures")
+            return
+        self._bump("contexts_recycled")
+
+    # ----------------------------
+    # Rendering
+    # ----------------------------
+
+    async def _wait_until_ready(self, tab, deadline: float) -> None:
+        """
+        Waits for readiness, returning (never raising) at the deadline.
+        """
+        from playwright.async_api import TimeoutError as PlaywrightTimeoutError
+
+        def remaining_ms() -> float:
+            return max((deadline - time.monotonic()) * 1000, 1)
+
+        try:
+            if self.readiness == "networkidle":
+                await tab.wait_for_load_state("networkidle", timeout=remaining_ms())
+                return
+
+            if self.content_selector:
+                await tab.wait_for_selector(self.content_selector, timeout=remaining_ms())
+        except PlaywrightTimeoutError:
+            self._bump("deadline_hits")
+            return
+
+        # Text density check: body text length unchanged across polls
+        last_length, stable = -1, 0
+        while time.monotonic() < deadline:
+            length = await tab.evaluate(
+                "document.body ? document.body.innerText.length : 0"
+            )
+            if length > 0 and length == last_length:
+                stable += 1
+                if stable >= READINESS_STABLE_POLLS:
+                    return
+            else:
+                stable = 0
+            last_length = length
+            await asyncio.sleep(READINESS_POLL_MS / 1000)
+
+        self._bump("deadline_hits")
+
+    async def _render(self, url: str, timeout_ms: int) -> str:
+        slot = await self._slots.get()
+        self._track_in_flight(+1)
+        started = time.monotonic()
+        deadline = started + timeout_ms / 1000
+        try:
+            browser = await self._connected_browser(slot.index)
+            if browser is not slot.browser:
+                # The old context went down with the old browser
+                slot.browser, slot.context, slot.pages = browser, None, 0
+            if slot.context is None:
+                slot.context = await self._new_context(slot.browser)
+            tab = await slot.context.new_page()
+            try:
+                await tab.goto(url, timeout=timeout_ms, wait_until="domcontentloaded")
+                await self._wait_until_ready(tab, deadline)
+                html = await tab.content()
+            finally:
+                await tab.close()
+
+            slot.pages += 1
+            if slot.pages >= self.recycle_after:
+                await self._recycle(slot)
+            return html
+        finally:
+            with self._stats_lock:
+                self._render_seconds += time.monotonic() - started
+            self._track_in_flight(-1)
+            self._slots.put_nowait(slot)
+            self._sample_rss()
+
+    def render(self, url: str, timeout_ms: int = DEFAULT_RENDER_TIMEOUT_MS) -> str:
+        """
+        Renders a URL and returns the page HTML. Thread-safe.
+        timeout_ms is the hard per-page deadline.
+        """
+        try:
+            html = self._call(self._render(url, timeout_ms))
+        except Exception:
+            self._bump("render_failures")
+            raise
+        self._bump("pages_rendered")
+        return html
+
+    # ----------------------------
+    # Metrics
+    # ----------------------------
+
+    def _bump(self, name: str) -> None:
+        with self._stats_lock:
+            self._stats[name] += 1
+
+    def _sample_rss(self, force: bool = False) -> None:
+        now = time.monotonic()
+        if not force and now - self._rss_sampled_at < RSS_SAMPLE_SECONDS:
+            return
+        self._rss_sampled_at = now
+        rss = _browser_rss_mb()
+        with self._stats_lock:
+            self._rss_mb = rss
+            if rss is not None and (self._peak_rss_mb is None or rss > self._peak_rss_mb):
+                self._peak_rss_mb = rss
+
+    def _track_in_flight(self, delta: int) -> None:
+        with self._stats_lock:
+            self._in_flight += delta
+            self._stats["peak_in_flight"] = max(
+                self._stats["peak_in_flight"], self._in_flight
+            )
+
+    def stats(self) -> Dict:
+        if self._loop is not None:
+            self._sample_rss(force=True)
+        with self._stats_lock:
+            stats = dict(self._stats)
+            render_seconds = self._render_seconds
+            stats["browser_rss_mb"] = self._rss_mb
+            stats["peak_browser_rss_mb"] = self._peak_rss_mb
+
+        elapsed = time.time() - self._started_at if self._started_at else 0.0
+        stats["max_concurrent_pages"] = self.browsers * self.contexts_per_browser
+        stats["pages_per_sec"] = (
+            round(stats["pages_rendered"] / elapsed, 2) if elapsed > 0 else 0.0
+        )
+        attempts = stats["pages_rendered"] + stats["render_failures"]
+        stats["avg_render_ms"] = (
+            round(render_seconds * 1000 / attempts, 1) if attempts else 0.0
+        )
+        return stats
+
+
+# ==================================================
+# Shared Pool (lazy start, clean shutdown)
+# ==================================================
+
+_pool_lock = threading.Lock()
+_pool: Optional[BrowserPool] = None
+_pool_config: Optional[Dict] = None
+
+
+def configure_browser_pool(
+    browsers: int = DEFAULT_BROWSERS,
+    contexts_per_browser: int = DEFAULT_CONTEXTS_PER_BROWSER,
+    recycle_after: int = DEFAULT_RECYCLE_AFTER,
+    headless: bool = True,
+    blocked_resource_types: Iterable[str] = DEFAULT_BLOCKED_RESOURCE_TYPES,
+    blocked_domains: Iterable[str] = DEFAULT_BLOCKED_DOMAINS,
+    readiness: str = DEFAULT_READINESS,
+    content_selector: Optional[str] = None,
+) -> None:
+    """
+    Enables the shared pool; Chromium starts on the first JS render.
+    """
+    global _pool_config
+
+    shutdown_browser_pool()
+    _pool_config = {
+        "browsers": browsers,
+        "contexts_per_browser": contexts_per_browser,
+        "recycle_after": recycle_after,
+        "headless": headless,
+        "blocked_resource_types": tuple(blocked_resource_types),
+        "blocked_domains": tuple(blocked_domains),
+        "readiness": readiness,
+        "content_selector": content_selector,
+    }
+
+
+def get_browser_pool() -> Optional[BrowserPool]:
+    """
+    Returns the shared pool, or None if pooling is not configured.
+    """
+    global _pool
+
+    if _pool_config is None:
+        return None
+
+    if _pool is None:
+        with _pool_lock:
+            if _pool is None:
+                _pool = BrowserPool(**_pool_config).start()
+    return _pool
+
+
+def browser_pool_stats() -> Dict:
+    if _pool is None:
+        return {}
+    return _pool.stats()
+
+
+def shutdown_browser_pool() -> None:
+    global _pool
+
+    with _pool_lock:
+        if _pool is not None:
+            _pool.close()
+            _pool = None
+
+
+atexit.register(shutdown_browser_pool)
@@ -1,5 +1,7 @@
 import re
-from typing import List, Dict
+import json
+from pathlib import Path
+from typing import Dict, Iterable, Iterator, List, Optional, Tuple
 
 
 # ==================================================
@@ -19,6 +21,235 @@ BOILERPLATE_PATTERNS = [
     r"\bclick here\b",
 ]
 
+DEFAULT_MIN_LENGTH = 120
+DEFAULT_MIN_ALPHA_RATIO = 0.6
+DEFAULT_BATCH_SIZE = 256
+
+# ASCII bytes that are not letters; deleting them leaves only letters
+_ASCII_NON_ALPHA = bytes(i for i in range(128) if not chr(i).isalpha())
+
+# Rule bodies without regex metacharacters are plain literals
+_PLAIN_LITERAL = re.compile(r"[^.^$*+?{}\[\]\\|()]+")
+
+
+# ==================================================
+# Compiled Rule Matcher
+# ==================================================
+
+def _split_rules(patterns: Iterable[str]) -> Tuple[Dict[str, str], List[str]]:
+    """
+    Separates plain \\bword\\b rules (matched as one factored
+    alternation) from general regex rules.
+    """
+    literals: Dict[str, str] = {}
+    regexes: List[str] = []
+
+    for pattern in patterns:
+        body = pattern[2:-2]
+        if (
+            pattern.startswith(r"\b")
+            and pattern.endswith(r"\b")
+            and _PLAIN_LITERAL.fullmatch(body)
+        ):
+            literals.setdefault(body, pattern)
+        else:
+            regexes.append(pattern)
+
+    return literals, regexes
+
+
+def _combinable(pattern: str) -> bool:
+    """
+    Whether a regex rule can be spliced into the shared alternation:
+    it must compile alone, define no groups (numbered backreferences
+    and group names would shift or clash) and set no global inline
+    flags (only valid at the start of a whole pattern).
+    """
+    try:
+        compiled = re.compile(pattern)
+    except re.error as e:
+        raise ValueError(f"Invalid cleaning rule {pattern!r}: {e}")
+    return compiled.groups == 0 and not compiled.flags & ~re.UNICODE
+
+
+class CleaningEngine:
+    """
+    Compiles a boilerplate rule set once and cleans records in batches.
+
+    - \\bword\\b rules share a single \\b(?:a|b|...)\\b scan
+    - other rules share one named-group alternation, except rules with
+      groups or global inline flags, which are compiled on their own
+    - stats record why every dropped record was dropped
+    """
+
+    def __init__(
+        self,
+        patterns: Optional[Iterable[str]] = None,
+        min_length: int = DEFAULT_MIN_LENGTH,
+        min_alpha_ratio: float = DEFAULT_MIN_ALPHA_RATIO,
+    ):
+        self.patterns = list(BOILERPLATE_PATTERNS if patterns is None else patterns)
+        self.min_length = min_length
+        self.min_alpha_ratio = min_alpha_ratio
+
+        literals, regexes = _split_rules(self.patterns)
+        self._literal_rules = literals
+        self._literal_matcher = None
+        if literals:
+            ordered = sorted(literals, key=len, reverse=True)
+            self._literal_matcher = re.compile(
+                r"\b(?:" + "|".join(ordered) + r")\b"
+            )
+
+        self._regex_rules = [p for p in regexes if _combinable(p)]
+        self._regex_matcher = None
+        if self._regex_rules:
+            self._regex_matcher = re.compile(
+                "|".join(f"(?P<r{i}>{p})" for i, p in enumerate(self._regex_rules))
+            )
+        self._standalone_rules = [
+            (re.compile(p), p) for p in regexes if p not in self._regex_rules
+        ]
+
+        self.reset_stats()
+
+    @classmethod
+    def from_file(cls, path: Path) -> "CleaningEngine":
+        return cls(**load_rule_set(path))
+
+    # ----------------------------
+    # Rules
+    # ----------------------------
+
+    def match_rule(self, lowered: str) -> Optional[str]:
+        """
+        Returns the first rule matching already-lowercased text.
+        """
+        if self._literal_matcher is not None:
+            m = self._literal_matcher.search(lowered)
+            if m:
+                return self._literal_rules[m.group(0)]
+
+        if self._regex_matcher is not None:
+            m = self._regex_matcher.search(lowered)
+            if m:
+                return self._regex_rules[int(m.lastgroup[1:])]
+
+        for matcher, pattern in self._standalone_rules:
+            if matcher.search(lowered):
+                return pattern
+
+        return None
+
+    def low_quality_reason(self, text: str) -> Optional[str]:
+        if len(text) < self.min_length:
+            return "too_short"
+
+        # Too many symbols / no natural language
+        if alpha_count(text) / max(len(text), 1) < self.min_alpha_ratio:
+            return "low_alpha_ratio"
+
+        return None
+
+    # ----------------------------
+    # Batch Cleaning
+    # ----------------------------
+
+    def reset_stats(self) -> None:
+        self.stats = {
+            "seen": 0,
+            "kept": 0,
+            "dropped_empty": 0,
+            "dropped_boilerplate": 0,
+            "dropped_too_short": 0,
+            "dropped_low_alpha_ratio": 0,
+            "rule_hits": {p: 0 for p in self.patterns},
+        }
+
+    def clean_batch(self, records: List[Dict]) -> List[Dict]:
+        stats = self.stats
+        rule_hits = stats["rule_hits"]
+        stats["seen"] += len(records)
+
+        texts = [normalize_text(r.get("text") or "") for r in records]
+        kept = []
+
+        for record, text in zip(records, texts):
+            if not text:
+                stats["dropped_empty"] += 1
+                continue
+
+            rule = self.match_rule(text.lower())
+            if rule is not None:
+                stats["dropped_boilerplate"] += 1
+                rule_hits[rule] += 1
+                continue
+
+            reason = self.low_quality_reason(text)
+            if reason is not None:
+                stats[f"dropped_{reason}"] += 1
+                continue
+
+            # keep internal metadata untouched
+            new_record = dict(record)
+            new_record["text"] = text
+            kept.append(new_record)
+
+        stats["kept"] += len(kept)
+        return kept
+
+    def iter_clean(
+        self,
+        records: Iterable[Dict],
+        batch_size: int = DEFAULT_BATCH_SIZE,
+    ) -> Iterator[Dict]:
+        batch = []
+        for record in records:
+            batch.append(record)
+            if len(batch) >= batch_size:
+                yield from self.clean_batch(batch)
+                batch = []
+        if batch:
+            yield from self.clean_batch(batch)
+
+
+def load_rule_set(path: Path) -> Dict:
+    """
+    Loads CleaningEngine settings from a file.
+
+    - .json: a list of patterns, or an object with "patterns" and
+      optional "min_length" / "min_alpha_ratio"
+    - anything else: one regex per line, # starts a comment
+    """
+    path = Path(path)
+    raw = path.read_text(encoding="utf-8")
+
+    if path.suffix.lower() == ".json":
+        data = json.loads(raw)
+        if isinstance(data, list):
+            return {"patterns": data}
+        if not isinstance(data, dict) or "patterns" not in data:
+            raise ValueError(f"Rule file has no 'patterns' list: {path}")
+        allowed = {"patterns", "min_length", "min_alpha_ratio"}
+        return {k: v for k, v in data.items() if k in allowed}
+
+    patterns = [
+        line.strip() for line in raw.splitlines()
+        if line.strip() and not line.strip().startswith("#")
+    ]
+    return {"patterns": patterns}
+
+
+_default_engine: Optional[CleaningEngine] = None
+
+
+def _get_default_engine() -> CleaningEngine:
+    # Rebuilt if BOILERPLATE_PATTERNS was extended at runtime
+    global _default_engine
+    if _default_engine is None or _default_engine.patterns != BOILERPLATE_PATTERNS:
+        _default_engine = CleaningEngine()
+    return _default_engine
+
 
 # ==================================================
 # Core Cleaning Functions
@@ -28,22 +259,26 @@ def is_boilerplate(text: str) -> bool:
     """
     Detects common UI / boilerplate text.
     """
-    lowered = text.lower()
-    for pattern in BOILERPLATE_PATTERNS:
-        if re.search(pattern, lowered):
-            return True
-    return False
+    return _get_default_engine().match_rule(text.lower()) is not None
 
 
 def normalize_text(text: str) -> str:
     """
     Normalizes whitespace and line breaks.
     """
-    text = re.sub(r"\s+", " ", text)
-    return text.strip()
+    return " ".join(text.split())
 
 
-def is_low_quality(text: str, min_length: int = 120) -> bool:
+def alpha_count(text: str) -> int:
+    """
+    Number of alphabetic characters (C-speed path for ASCII text).
+    """
+    if text.isascii():
+        return len(text.encode("ascii").translate(None, _ASCII_NON_ALPHA))
+    return sum(c.isalpha() for c in text)
+
+
+def is_low_quality(text: str, min_length: int = DEFAULT_MIN_LENGTH) -> bool:
     """
     Filters out very short or low-information chunks.
     """
@@ -51,8 +286,8 @@ def is_low_quality(text: str, min_length: int = 120) -> bool:
         return True
 
     # Too many symbols / no natural language
-    alpha_ratio = sum(c.isalpha() for c in text) / max(len(text), 1)
-    if alpha_ratio < 0.6:
+    alpha_ratio = alpha_count(text) / max(len(text), 1)
+    if alpha_ratio < DEFAULT_MIN_ALPHA_RATIO:
         return True
 
     return False
@@ -62,31 +297,31 @@ def is_low_quality(text: str, min_length: int = 120) -> bool:
 # Public API
 # ==================================================
 
-def clean_records(records: List[Dict]) -> List[Dict]:
+def iter_clean_records(
+    records: Iterable[Dict],
+    engine: Optional[CleaningEngine] = None,
+) -> Iterator[Dict]:
     """
-    Cleans extracted records by removing boilerplate,
-    low-quality chunks, and normalizing text.
+    Streaming version of clean_records: yields kept records one by one,
+    as each input record arrives (a batch would hold records back from
+    a streaming writer). Callers that already hold a group of records,
+    such as one URL's chunks, should pass it to engine.clean_batch.
+    Pass an engine to use custom rules or to read its drop counters.
     """
 
-    cleaned = []
+    engine = engine or _get_default_engine()
+    for record in records:
+        yield from engine.clean_batch([record])
 
-    for r in records:
-        text = r.get("text", "")
-        if not text:
-            continue
 
-        text = normalize_text(text)
-
-        if is_boilerplate(text):
-            continue
-
-        if is_low_quality(text):
-            continue
-
-        # keep internal metadata untouched
-        new_record = dict(r)
-        new_record["text"] = text
-
-        cleaned.append(new_record)
+def clean_records(
+    records: List[Dict],
+    engine: Optional[CleaningEngine] = None,
+) -> List[Dict]:
+    """
+    Cleans extracted records by removing boilerplate,
+    low-quality chunks, and normalizing text.
+    """
 
-    return cleaned
+    engine = engine or _get_default_engine()
+    return engine.clean_batch(list(records))
@@ -0,0 +1,123 @@
+import gzip
+import hashlib
+import io
+from pathlib import Path
+from typing import BinaryIO, Optional, TextIO
+
+
+# ==================================================
+# Codec Detection (by file extension)
+# ==================================================
+
+COMPRESSION_SUFFIXES = {
+    ".gz": "gzip",
+    ".zst": "zstd",
+    ".zstd": "zstd",
+}
+
+DEFAULT_GZIP_LEVEL = 6
+DEFAULT_ZSTD_LEVEL = 3
+
+
+def detect_codec(path: Path) -> Optional[str]:
+    """
+    "gzip", "zstd" or None (plain) from the file extension.
+    """
+    return COMPRESSION_SUFFIXES.get(Path(path).suffix.lower())
+
+
+def _zstd():
+    try:
+        import zstandard
+    except ImportError as e:
+        raise ImportError(f"zstd compression requires the zstandard package: {e}")
+    return zstandard
+
+
+# ==================================================
+# Writing
+# ==================================================
+
+class ChecksumFile:
+    """
+    Write-through file wrapper that tracks the SHA-256 and size of
+    the bytes that actually reach disk (i.e. after compression).
+    """
+
+    def __init__(self, path: Path):
+        self._f = open(path, "wb")
+        self._sha256 = hashlib.sha256()
+        self.bytes_written = 0
+
+    def write(self, data) -> int:
+        self._sha256.update(data)
+        self.bytes_written += len(data)
+        return self._f.write(data)
+
+    def flush(self) -> None:
+        self._f.flush()
+
+    def fileno(self) -> int:
+        return self._f.fileno()
+
+    def close(self) -> None:
+        self._f.close()
+
+    @property
+    def sha256(self) -> str:
+        return self._sha256.hexdigest()
+
+
+def compress_writer(raw: BinaryIO, codec: Optional[str], level: Optional[int] = None) -> BinaryIO:
+    """
+    Wraps raw in a streaming compressor. Closing the returned stream
+    finishes the compressed frame but leaves raw open.
+    """
+    if codec is None:
+        return raw
+
+    if codec == "gzip":
+        return gzip.GzipFile(
+            fileobj=raw,
+            mode="wb",
+            compresslevel=DEFAULT_GZIP_LEVEL if level is None else level,
+            mtime=0,    # reproducible output / checksums
+        )
+
+    if codec == "zstd":
+        zstandard = _zstd()
+        compressor = zstandard.ZstdCompressor(level=DEFAULT_ZSTD_LEVEL if level is None else level)
+        return compressor.stream_writer(raw, closefd=False)
+
+    raise ValueError(f"Unknown compression codec: {codec}")
+
+
+# ==================================================
+# Reading
+# ==================================================
+
+def open_binary(path: Path) -> BinaryIO:
+    """
+    Decompressing binary reader chosen by extension.
+    """
+    codec = detect_codec(path)
+
+    if codec == "gzip":
+        return gzip.open(path, "rb")
+
+    if codec == "zstd":
+        zstandard = _zstd()
+        return io.BufferedReader(
+            zstandard.ZstdDecompressor().stream_reader(open(path, "rb"), closefd=True)
+        )
+
+    return open(path, "rb")
+
+
+def open_text(path: Path) -> TextIO:
+    """
+    Decompressing UTF-8 text reader chosen by extension.
+    """
+    if detect_codec(path) is None:
+        return open(path, "r", encoding="utf-8")
+    return io.TextIOWrapper(open_binary(path), encoding="utf-8")
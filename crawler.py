@@ -0,0 +1,365 @@
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
+from typing import Callable, Dict, Iterable, Iterator, List, Optional, Set, Tuple
+from urllib.parse import urldefrag, urljoin, urlsplit
+
+from extractor import extract_url_with_page
+from fetcher import FetchedPage
+from http_cache import canonical_url
+from robots import RobotsCache
+from scrape_state import ScrapeStateStore
+from scheduler import host_key, DEFAULT_MAX_WORKERS
+
+
+# ==================================================
+# Crawl Defaults
+# ==================================================
+
+DEFAULT_MAX_PAGES = 100
+DEFAULT_MAX_DEPTH = 2
+DEFAULT_CRAWL_DELAY = 1.0       # seconds between request starts per domain
+DEFAULT_CRAWL_PER_HOST = 1      # concurrent requests per domain
+
+# Links to these are never queued: they are not HTML pages
+SKIP_EXTENSIONS = (
+    ".pdf", ".zip", ".gz", ".tar", ".rar", ".7z", ".exe", ".dmg",
+    ".jpg", ".jpeg", ".png", ".gif", ".svg", ".webp", ".ico",
+    ".mp3", ".mp4", ".avi", ".mov", ".webm",
+    ".css", ".js", ".json", ".xml", ".rss", ".woff", ".woff2", ".ttf",
+)
+
+
+def site_key(url: str) -> str:
+    """
+    Host (and port) used for same-site checks ("www." is ignored).
+    """
+    host = host_key(url)
+    return host[4:] if host.startswith("www.") else host
+
+
+# ==================================================
+# Link Discovery (from the parsed DOM)
+# ==================================================
+
+def extract_links(page: FetchedPage) -> List[str]:
+    """
+    Absolute http(s) links of a page, fragments removed.
+    Honours <base href>, rel="nofollow" and <meta name="robots" content="nofollow">.
+    """
+    soup = page.soup
+
+    robots = soup.find("meta", attrs={"name": "robots"})
+    if robots is not None and "nofollow" in (robots.get("content") or "").lower():
+        return []
+
+    base = page.final_url or page.url
+    base_tag = soup.find("base", href=True)
+    if base_tag is not None:
+        base = urljoin(base, base_tag["href"].strip())
+
+    links = []
+    for a in soup.find_all("a", href=True):
+        if "nofollow" in (a.get("rel") or []):
+            continue
+
+        href = a["href"].strip()
+        if not href or href.startswith(("#", "mailto:", "javascript:", "tel:", "data:")):
+            continue
+
+        url, _ = urldefrag(urljoin(base, href))
+        parts = urlsplit(url)
+        if parts.scheme not in ("http", "https"):
+            continue
+        if parts.path.lower().endswith(SKIP_EXTENSIONS):
+            continue
+
+        links.append(url)
+
+    return links
+
+
+# ==================================================
+# URL Frontier
+# ==================================================
+
+class CrawlFrontier:
+    """
+    Deduplicating per-domain queues of (url, depth).
+
+    URLs are compared in canonical form (see http_cache.canonical_url),
+    so reordered query strings or fragments are not crawled twice.
+    """
+
+    def __init__(
+        self,
+        max_pages: int = DEFAULT_MAX_PAGES,
+        max_depth: int = DEFAULT_MAX_DEPTH,
+        allowed_sites: Optional[Set[str]] = None,
+    ):
+        self.max_pages = max_pages
+        self.max_depth = max_depth
+        self.allowed_sites = allowed_sites
+
+        self._seen: Set[str] = set()
+        self._queues: Dict[str, deque] = {}
+        self.scheduled = 0
+        self.stats = {"discovered": 0, "duplicates": 0, "off_site": 0}
+
+    def add(self, url: str, depth: int) -> bool:
+        """
+        Queues url unless it was seen, is off-site or too deep.
+        """
+        if depth > self.max_depth:
+            return False
+        if not self.on_site(url):
+            self.stats["off_site"] += 1
+            return False
+
+        key = canonical_url(url)
+        if key in self._seen:
+            self.stats["duplicates"] += 1
+            return False
+
+        self._seen.add(key)
+        self._queues.setdefault(host_key(url), deque()).append((url, depth))
+        self.stats["discovered"] += 1
+        return True
+
+    def on_site(self, url: str) -> bool:
+        return self.allowed_sites is None or site_key(url) in self.allowed_sites
+
+    def mark_seen(self, url: str) -> None:
+        """
+        Records a URL reached another way (e.g. a redirect target).
+        """
+        self._seen.add(canonical_url(url))
+
+    def domains(self) -> List[str]:
+        return list(self._queues)
+
+    def pop(self, domain: str) -> Tuple[str, int]:
+        q = self._queues[domain]
+        item = q.popleft()
+        if not q:
+            del self._queues[domain]
+        self.scheduled += 1
+        return item
+
+    @property
+    def pending(self) -> int:
+        return sum(len(q) for q in self._queues.values())
+
+    @property
+    def exhausted(self) -> bool:
+        return self.scheduled >= self.max_pages or not self._queues
+
+
+# ==================================================
+# Per-Domain Politeness
+# ==================================================
+
+class DomainScheduler:
+    """
+    Decides which domain may start a request next.
+
+    A domain starts at most one request every crawl_delay seconds and
+    runs at most per_host_limit at once; among ready domains the one
+    served least recently goes first, so many domains stay busy while
+    each is crawled slowly. delay_for(domain) may raise the delay for
+    one domain (e.g. robots.txt Crawl-delay).
+    """
+
+    def __init__(
+        self,
+        crawl_delay: float = DEFAULT_CRAWL_DELAY,
+        per_host_limit: int = DEFAULT_CRAWL_PER_HOST,
+        delay_for: Optional[Callable[[str], Optional[float]]] = None,
+    ):
+        self.crawl_delay = max(0.0, crawl_delay)
+        self.per_host_limit = max(1, int(per_host_limit))
+        self.delay_for = delay_for
+
+        self._active: Dict[str, int] = {}
+        self._last_start: Dict[str, float] = {}
+
+    def delay(self, domain: str) -> float:
+        if self.delay_for is None:
+            return self.crawl_delay
+        return max(self.crawl_delay, self.delay_for(domain) or 0.0)
+
+    def _free(self, domain: str) -> bool:
+        return self._active.get(domain, 0) < self.per_host_limit
+
+    def _ready_at(self, domain: str) -> float:
+        last = self._last_start.get(domain)
+        return 0.0 if last is None else last + self.delay(domain)
+
+    def pick(self, domains: Iterable[str], now: float) -> Optional[str]:
+        best = None
+        for domain in domains:
+            if not self._free(domain) or self._ready_at(domain) > now:
+                continue
+            if best is None or self._last_start.get(domain, 0.0) < self._last_start.get(best, 0.0):
+                best = domain
+        return best
+
+    def next_ready_at(self, domains: Iterable[str]) -> Optional[float]:
+        """
+        Earliest time one of domains may start (None if all are at
+        their concurrency limit).
+        """
+        times = [self._ready_at(d) for d in domains if self._free(d)]
+        return min(times) if times else None
+
+    def started(self, domain: str, now: float) -> None:
+        self._active[domain] = self._active.get(domain, 0) + 1
+        self._last_start[domain] = now
+
+    def finished(self, domain: str) -> None:
+        self._active[domain] -= 1
+
+
+# ==================================================
+# Crawler
+# ==================================================
+
+class Crawler:
+    """
+    Breadth-first crawl from seed URLs, yielding (url, records) per
+    page like extractor.iter_extract_urls (in completion order).
+
+    Each page goes through extract_url_with_page; links are read from
+    the DOM the strategies already parsed, on the worker thread.
+
+    - max_pages: pages fetched in total (seeds included)
+    - max_depth: link hops from a seed (0 = seeds only)
+    - same_site: only follow links to the seeds' hosts ("www." ignored)
+    - crawl_delay / per_host_limit: politeness per domain
+    - max_workers: requests in flight across all domains
+    - robots: skip URLs disallowed by robots.txt and honour its
+      Crawl-delay when it is longer than crawl_delay
+    - state: scrape_state store; unchanged pages yield no records but
+      their links are still followed
+    """
+
+    def __init__(
+        self,
+        seeds: Iterable[str],
+        max_pages: int = DEFAULT_MAX_PAGES,
+        max_depth: int = DEFAULT_MAX_DEPTH,
+        same_site: bool = True,
+        crawl_delay: float = DEFAULT_CRAWL_DELAY,
+        per_host_limit: int = DEFAULT_CRAWL_PER_HOST,
+        max_workers: int = DEFAULT_MAX_WORKERS,
+        robots: Optional[RobotsCache] = None,
+        state: Optional[ScrapeStateStore] = None,
+    ):
+        seeds = [s.strip() for s in seeds if s.strip()]
+        self.max_workers = max(1, int(max_workers))
+        self.robots = robots
+        self.state = state
+
+        self.frontier = CrawlFrontier(
+            max_pages=max_pages,
+            max_depth=max_depth,
+            allowed_sites={site_key(s) for s in seeds} if same_site else None,
+        )
+        self.scheduler = DomainScheduler(
+            crawl_delay,
+            per_host_limit,
+            delay_for=robots.cached_crawl_delay if robots is not None else None,
+        )
+
+        for seed in seeds:
+            if robots is None or robots.allowed(seed):
+                self.frontier.add(seed, 0)
+
+        self.pages = 0
+
+    @property
+    def stats(self) -> Dict:
+        stats = {
+            "pages": self.pages,
+            "pending": self.frontier.pending,
+            **self.frontier.stats,
+        }
+        if self.robots is not None:
+            stats["robots_disallowed"] = self.robots.stats()["disallowed"]
+        return stats
+
+    def expected_total(self) -> int:
+        """
+        Pages this crawl will fetch as far as is known right now.
+        """
+        return min(self.frontier.max_pages, self.frontier.scheduled + self.frontier.pending)
+
+    def _visit(self, url: str, depth: int) -> Tuple[List[dict], List[str], Optional[str]]:
+        records, page = extract_url_with_page(url, self.state)
+        if page is None:
+            return records, [], None
+
+        links = []
+        if depth < self.frontier.max_depth:
+            try:
+                links = extract_links(page)
+            except Exception:
+                pass
+        if self.robots is not None:
+            # Off-site links are rejected later anyway: no robots.txt fetch for them
+            links = [
+                link for link in links
+                if not self.frontier.on_site(link) or self.robots.allowed(link)
+            ]
+        return records, links, page.final_url
+
+    def __iter__(self) -> Iterator[Tuple[str, List[dict]]]:
+        frontier, scheduler = self.frontier, self.scheduler
+
+        with ThreadPoolExecutor(max_workers=self.max_workers) as pool:
+            running = {}
+
+            while True:
+                now = time.monotonic()
+                while len(running) < self.max_workers and not frontier.exhausted:
+                    domain = scheduler.pick(frontier.domains(), now)
+                    if domain is None:
+                        break
+                    url, depth = frontier.pop(domain)
+                    scheduler.started(domain, now)
+                    running[pool.submit(self._visit, url, depth)] = (url, depth, domain)
+
+                timeout = None
+                if not frontier.exhausted and len(running) < self.max_workers:
+                    ready_at = scheduler.next_ready_at(frontier.domains())
+                    if ready_at is not None:
+                        timeout = max(0.0, ready_at - now)
+
+                if not running:
+                    if timeout is None:
+                        break
+                    # Every queued domain is waiting out its crawl delay
+                    time.sleep(timeout)
+                    continue
+
+                done, _ = wait(running, timeout=timeout, return_when=FIRST_COMPLETED)
+
+                for future in done:
+                    url, depth, domain = running.pop(future)
+                    scheduler.finished(domain)
+                    records, links, final_url = future.result()
+
+                    if final_url:
+                        frontier.mark_seen(final_url)
+                    for link in links:
+                        frontier.add(link, depth + 1)
+
+                    self.pages += 1
+                    yield url, records
+
+
+def crawl_urls(seeds: List[str], **crawl_options) -> List[dict]:
+    all_records = []
+    for _, records in Crawler(seeds, **crawl_options):
+        all_records.extend(records)
+    return all_records
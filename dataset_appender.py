@@ -1,8 +1,14 @@
-import json
+import os
 import re
 import hashlib
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
 from pathlib import Path
-from typing import List, Dict
+from typing import Iterator, List, Dict, Optional, Tuple
+from dedup_index import make_dedup_index, text_digest
+from compression import detect_codec, open_binary
+from jsonl_index import IndexedJsonlFile, RecordSummary, record_summary
+from json_codec import dumps_line, loads
 
 
 class DatasetAppendError(Exception):
@@ -45,72 +51,400 @@ def _validate_jsonl_record(record: Dict) -> None:
         raise DatasetAppendError("Missing or empty text field")
 
 
+# ==================================================
+# Line Parsing (shared by serial and parallel readers)
+# ==================================================
+
+# (dedup key or None, output line, normalized text or None, index summary);
+# None instead of a tuple marks an invalid line.
+ParsedLine = Optional[Tuple[object, bytes, Optional[str], RecordSummary]]
+
+DEFAULT_CHUNK_BYTES = 8 * 1024 * 1024
+
+
+def _parse_line(
+    line: str,
+    source_name: str,
+    add_dataset_source: bool,
+    key_mode: Optional[object],
+    keep_normalized: bool,
+) -> ParsedLine:
+    """
+    key_mode: None (no dedup), "text" (normalized text as key)
+    or an int/0 digest size for binary fingerprints (0 = full digest).
+    """
+    try:
+        record = loads(line)
+        _validate_jsonl_record(record)
+
+        normalized = None
+        if key_mode is not None or keep_normalized:
+            normalized = normalize_text(record["text"])
+
+        key = None
+        if key_mode == "text":
+            key = normalized
+        elif key_mode is not None:
+            key = text_digest(normalized, key_mode or None)
+
+        if add_dataset_source:
+            record["dataset_source"] = source_name
+
+        out_line = dumps_line(record)
+        return (
+            key,
+            out_line,
+            normalized if keep_normalized else None,
+            record_summary(record),
+        )
+
+    except Exception:
+        return None
+
+
+_BLANK = object()
+
+
+def _parse_raw_line(raw: bytes, source_name: str, parse_options: Tuple):
+    """
+    Parses one line as read in binary mode (split on LF only), so the
+    serial and shard readers see the same lines. Non-UTF-8 lines are
+    invalid (None); blank lines return _BLANK.
+    """
+    try:
+        line = raw.decode("utf-8").strip()
+    except UnicodeDecodeError:
+        return None
+    if not line:
+        return _BLANK
+    return _parse_line(line, source_name, *parse_options)
+
+
+def _iter_parsed_serial(
+    input_files: List[Path],
+    parse_options: Tuple,
+) -> Iterator[ParsedLine]:
+    for file_path in input_files:
+        with open_binary(file_path) as in_f:
+            for raw in in_f:
+                item = _parse_raw_line(raw, file_path.name, parse_options)
+                if item is not _BLANK:
+                    yield item
+
+
+# ==================================================
+# Parallel Reader (byte-range shards, ordered results)
+# ==================================================
+
+# (path, start, end) byte range of a plain file, or (path, lines) for
+# a batch of lines already read from a compressed file
+Shard = Tuple
+
+
+def _file_shards(path: Path, chunk_bytes: int) -> Iterator[Shard]:
+    if detect_codec(path) is None:
+        size = path.stat().st_size
+        for start in range(0, max(size, 1), chunk_bytes):
+            yield (str(path), start, min(start + chunk_bytes, size))
+        return
+
+    # Compressed streams can't be split by byte range: decompress here
+    # and hand out batches of about chunk_bytes of lines
+    with open_binary(path) as f:
+        lines: List[bytes] = []
+        size = 0
+        for raw in f:
+            lines.append(raw)
+            size += len(raw)
+            if size >= chunk_bytes:
+                yield (str(path), lines)
+                lines, size = [], 0
+    if lines:
+        yield (str(path), lines)
+
+
+def _parse_shard(shard: Shard, parse_options: Tuple) -> List[ParsedLine]:
+    """
+    Worker: parses a batch of lines, or every line that *starts*
+    inside [start, end).
+    """
+    path = shard[0]
+    source_name = Path(path).name
+    results = []
+
+    if len(shard) == 2:
+        for raw in shard[1]:
+            item = _parse_raw_line(raw, source_name, parse_options)
+            if item is not _BLANK:
+                results.append(item)
+        return results
+
+    _, start, end = shard
+    with open(path, "rb") as f:
+        if start > 0:
+            # Skip the line already owned by the previous shard
+            f.seek(start - 1)
+            f.readline()
+        pos = f.tell()
+
+        while pos < end:
+            raw = f.readline()
+            if not raw:
+                break
+            pos += len(raw)
+
+            item = _parse_raw_line(raw, source_name, parse_options)
+            if item is not _BLANK:
+                results.append(item)
+
+    return results
+
+
+def _iter_parsed_parallel(
+    input_files: List[Path],
+    parse_options: Tuple,
+    workers: int,
+    chunk_bytes: int,
+) -> Iterator[ParsedLine]:
+    """
+    Workers parse, normalize and fingerprint shards; results come back
+    in shard order, so input order is preserved exactly. Shards are
+    cut lazily and at most 2 x workers are in flight, so memory is
+    bounded by about 2 x workers x chunk_bytes for plain and
+    compressed inputs alike.
+    """
+    shards = (s for path in input_files for s in _file_shards(path, chunk_bytes))
+    window = workers * 2
+
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        pending = deque()
+        shard_iter = iter(shards)
+
+        for shard in shard_iter:
+            pending.append(pool.submit(_parse_shard, shard, parse_options))
+            if len(pending) >= window:
+                break
+
+        while pending:
+            results = pending.popleft().result()
+            shard = next(shard_iter, None)
+            if shard is not None:
+                pending.append(pool.submit(_parse_shard, shard, parse_options))
+            yield from results
+
+
+# ==================================================
+# Near-Duplicate Writer (MinHash / LSH)
+# ==================================================
+
+DEFAULT_NEAR_DEDUP_BATCH = 1024
+
+
+class _NearDedupWriter:
+    """
+    Buffers exact-unique records and writes those that are not near
+    duplicates. Signatures are computed per batch; decisions stay in
+    input order, so the first occurrence always wins.
+    """
+
+    def __init__(self, out_f: IndexedJsonlFile, threshold: float, num_perm: int, shingle_size: int):
+        try:
+            from near_dedup import NearDuplicateIndex
+        except ImportError as e:
+            raise DatasetAppendError(f"Near-dedup mode requires numpy: {e}")
+
+        self.out_f = out_f
+        self.index = NearDuplicateIndex(
+            threshold=threshold,
+            num_perm=num_perm,
+            shingle_size=shingle_size,
+        )
+        self.pending: List[tuple] = []
+        self.written = 0
+        self.skipped = 0
+
+    def add(self, out_line: bytes, normalized: str, summary: RecordSummary) -> None:
+        self.pending.append((out_line, normalized, summary))
+        if len(self.pending) >= DEFAULT_NEAR_DEDUP_BATCH:
+            self.flush()
+
+    def flush(self) -> None:
+        if not self.pending:
+            return
+
+        reps = self.index.add_batch([n for _, n, _ in self.pending])
+        for (out_line, _, summary), rep in zip(self.pending, reps):
+            if rep is not None:
+                self.skipped += 1
+                continue
+            self.out_f.write(out_line, summary)
+            self.written += 1
+
+        self.pending = []
+
+
 # ==================================================
 # Dataset Appender
 # ==================================================
 
+def _append_parsed(
+    parsed: Iterator[ParsedLine],
+    output_file: Path,
+    seen,
+    near_options: Optional[Tuple],
+    index: bool,
+):
+    """
+    Single decision loop: dedup and write in input order.
+    """
+    written = 0
+    skipped_duplicates = 0
+    skipped_invalid = 0
+
+    with IndexedJsonlFile(output_file, index=index) as out_f:
+        near = _NearDedupWriter(out_f, *near_options) if near_options else None
+
+        for item in parsed:
+            if item is None:
+                skipped_invalid += 1
+                continue
+
+            key, out_line, normalized, summary = item
+
+            if key is not None and not seen.add(key):
+                skipped_duplicates += 1
+                continue
+
+            if near is not None:
+                near.add(out_line, normalized, summary)
+                continue
+
+            out_f.write(out_line, summary)
+            written += 1
+
+        if near is not None:
+            near.flush()
+            written += near.written
+
+    return written, skipped_duplicates, skipped_invalid, near
+
+
 def append_jsonl_datasets(
     input_files: List[Path],
     output_file: Path,
     deduplicate: bool = True,
     add_dataset_source: bool = False,
     use_fingerprint: bool = True,
+    near_dedup: bool = False,
+    jaccard_threshold: float = 0.8,
+    num_perm: int = 128,
+    shingle_size: int = 5,
+    dedup_backend: str = "set",
+    dedup_path: Optional[Path] = None,
+    digest_size: Optional[int] = None,
+    dedup_index=None,
+    expected_records: int = 1_000_000,
+    fp_rate: float = 0.001,
+    workers: int = 0,
+    chunk_bytes: int = DEFAULT_CHUNK_BYTES,
+    index: bool = True,
 ) -> Dict[str, int]:
     """
     Appends multiple JSONL datasets with improved deduplication.
+    Inputs and output may be gzip/zstd compressed (.gz, .zst).
 
     Dedup strategy:
     - normalize text
     - optional fingerprint-based comparison
+    - optional near-dedup: MinHash signatures over word shingles with
+      LSH banding; records at or above jaccard_threshold similarity to
+      an earlier record are skipped (requires numpy)
+
+    Dedup index backends (exact dedup state):
+    - "set": in-memory Python set (default)
+    - "compact": 8/16-byte digests in an open-addressing array
+    - "sqlite": persistent digests at dedup_path, reused across runs;
+      a run's digests are committed only when the append succeeds
+    - "bloom": approximate Bloom filter sized from expected_records and
+      fp_rate; reloaded from dedup_path when given, and saved back
+      there only when the append succeeds
+    A ready-made index can also be passed as dedup_index.
+
+    Parallel mode (workers > 0, or -1 for all cores): worker processes
+    parse, normalize and fingerprint byte-range shards of the inputs
+    (compressed inputs are decompressed here and sent in chunk_bytes
+    batches of lines); dedup decisions are still made in input order (first occurrence wins),
+    so the output is identical to a serial run.
+
+    With index=True an offset index sidecar (<output>.idx) is written
+    for random access and stats (see jsonl_index).
     """
 
-    seen = set()
-    written = 0
-    skipped_duplicates = 0
-    skipped_invalid = 0
+    for file_path in input_files:
+        if not file_path.exists():
+            raise DatasetAppendError(f"File not found: {file_path}")
+
+    owns_index = dedup_index is None
+    seen = (
+        make_dedup_index(
+            dedup_backend,
+            dedup_path,
+            digest_size,
+            expected_records=expected_records,
+            fp_rate=fp_rate,
+        )
+        if owns_index
+        else dedup_index
+    )
+    exact_text_keys = not use_fingerprint and seen.digest_size is None
+
+    key_mode = None
+    if deduplicate:
+        key_mode = "text" if exact_text_keys else (seen.digest_size or 0)
+
+    parse_options = (add_dataset_source, key_mode, near_dedup)
+    near_options = (jaccard_threshold, num_perm, shingle_size) if near_dedup else None
 
-    with open(output_file, "w", encoding="utf-8") as out_f:
-        for file_path in input_files:
-            if not file_path.exists():
-                raise DatasetAppendError(f"File not found: {file_path}")
-
-            with open(file_path, "r", encoding="utf-8") as in_f:
-                for line in in_f:
-                    line = line.strip()
-                    if not line:
-                        continue
-
-                    try:
-                        record = json.loads(line)
-                        _validate_jsonl_record(record)
-
-                        raw_text = record["text"]
-                        key = (
-                            text_fingerprint(raw_text)
-                            if use_fingerprint
-                            else normalize_text(raw_text)
-                        )
-
-                        if deduplicate:
-                            if key in seen:
-                                skipped_duplicates += 1
-                                continue
-                            seen.add(key)
-
-                        if add_dataset_source:
-                            record["dataset_source"] = file_path.name
-
-                        out_f.write(json.dumps(record, ensure_ascii=False) + "\n")
-                        written += 1
-
-                    except Exception:
-                        skipped_invalid += 1
-                        continue
-
-    return {
+    if workers < 0:
+        workers = os.cpu_count() or 1
+
+    parsed = (
+        _iter_parsed_parallel(input_files, parse_options, workers, chunk_bytes)
+        if workers > 0
+        else _iter_parsed_serial(input_files, parse_options)
+    )
+
+    try:
+        written, skipped_duplicates, skipped_invalid, near = _append_parsed(
+            parsed,
+            output_file,
+            seen,
+            near_options,
+            index,
+        )
+        index_size = len(seen)
+        index_stats = seen.stats() if hasattr(seen, "stats") else {}
+        if owns_index and getattr(seen, "path", None) is not None and hasattr(seen, "save"):
+            seen.save()
+    finally:
+        if owns_index:
+            seen.close()
+
+    stats = {
         "written_records": written,
         "skipped_duplicates": skipped_duplicates,
         "skipped_invalid": skipped_invalid,
         "input_files": len(input_files),
-        "dedup_strategy": "fingerprint" if use_fingerprint else "normalized_text",
+        "dedup_strategy": "normalized_text" if exact_text_keys else "fingerprint",
+        "dedup_backend": getattr(seen, "backend", type(seen).__name__),
+        "dedup_index_size": index_size,
+        "workers": workers,
+        **index_stats,
     }
+
+    if near is not None:
+        stats["skipped_near_duplicates"] = near.skipped
+        stats["jaccard_threshold"] = jaccard_threshold
+        stats.update(near.index.stats())
+
+    return stats
@@ -0,0 +1,331 @@
+import hashlib
+import math
+import os
+import sqlite3
+import struct
+from pathlib import Path
+from typing import Dict, Hashable, Optional
+
+
+# ==================================================
+# Digests
+# ==================================================
+
+DEFAULT_DIGEST_SIZE = 8
+DEDUP_BACKENDS = ("set", "compact", "sqlite", "bloom")
+
+DEFAULT_EXPECTED_RECORDS = 1_000_000
+DEFAULT_FP_RATE = 0.001
+
+
+def text_digest(normalized: str, digest_size: Optional[int] = None) -> bytes:
+    """
+    Binary SHA-256 of normalized text, truncated to digest_size bytes.
+    """
+    digest = hashlib.sha256(normalized.encode("utf-8")).digest()
+    return digest[:digest_size] if digest_size else digest
+
+
+# ==================================================
+# Backend: Python set (legacy behaviour)
+# ==================================================
+
+class SetDedupIndex:
+    """
+    Exact in-memory set. Accepts any hashable key (full digests or
+    normalized text); simplest, but the most memory per record.
+    """
+    backend = "set"
+    digest_size = None
+
+    def __init__(self):
+        self._seen = set()
+
+    def add(self, key: Hashable) -> bool:
+        """
+        Adds key; returns False if it was already present.
+        """
+        if key in self._seen:
+            return False
+        self._seen.add(key)
+        return True
+
+    def __len__(self) -> int:
+        return len(self._seen)
+
+    def close(self) -> None:
+        pass
+
+
+# ==================================================
+# Backend: Compact open-addressing table
+# ==================================================
+
+class CompactDedupIndex:
+    """
+    Open-addressing hash table of fixed-size binary digests packed in a
+    single bytearray (8 or 16 bytes per slot, linear probing).
+    Roughly 15-30 bytes per record instead of ~150 for a set of hex strings.
+    """
+
+    backend = "compact"
+    MAX_LOAD = 0.6
+
+    def __init__(self, digest_size: int = DEFAULT_DIGEST_SIZE, initial_capacity: int = 1 << 16):
+        if digest_size not in (8, 16):
+            raise ValueError("Compact dedup index supports 8- or 16-byte digests")
+
+        capacity = 1
+        while capacity < initial_capacity:
+            capacity <<= 1
+
+        self.digest_size = digest_size
+        self._empty = bytes(digest_size)
+        self._capacity = capacity
+        self._table = bytearray(capacity * digest_size)
+        self._count = 0
+
+    def _insert(self, table: bytearray, capacity: int, digest: bytes) -> bool:
+        size = self.digest_size
+        mask = capacity - 1
+        slot = int.from_bytes(digest[:8], "little") & mask
+
+        while True:
+            offset = slot * size
+            current = table[offset:offset + size]
+            if current == self._empty:
+                table[offset:offset + size] = digest
+                return True
+            if current == digest:
+                return False
+            slot = (slot + 1) & mask
+
+    def _grow(self) -> None:
+        size = self.digest_size
+        capacity = self._capacity * 2
+        table = bytearray(capacity * size)
+
+        old = self._table
+        for offset in range(0, len(old), size):
+            digest = old[offset:offset + size]
+            if digest != self._empty:
+                self._insert(table, capacity, bytes(digest))
+
+        self._table, self._capacity = table, capacity
+
+    def add(self, digest: bytes) -> bool:
+        digest = digest[:self.digest_size]
+        if digest == self._empty:
+            # all-zero marks an empty slot; remap the (astronomically rare) zero digest
+            digest = digest[:-1] + b"\x01"
+
+        if self._count + 1 > self._capacity * self.MAX_LOAD:
+            self._grow()
+
+        added = self._insert(self._table, self._capacity, digest)
+        if added:
+            self._count += 1
+        return added
+
+    def __len__(self) -> int:
+        return self._count
+
+    def close(self) -> None:
+        pass
+
+
+# ==================================================
+# Backend: SQLite (persistent across runs)
+# ==================================================
+
+class SqliteDedupIndex:
+    """
+    Disk-backed digest set. Survives between runs, so new crawls can be
+    deduplicated incrementally against everything appended before.
+
+    A run's digests stay in one transaction until save(); close()
+    rolls back anything unsaved, so a failed run leaves no digests
+    for records that were never written (like the Bloom backend).
+    """
+
+    backend = "sqlite"
+
+    def __init__(self, path: Path, digest_size: int = 16):
+        self.digest_size = digest_size
+        self.path = Path(path)
+        self._conn = sqlite3.connect(str(self.path))
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS fingerprints ("
+            " digest BLOB PRIMARY KEY) WITHOUT ROWID"
+        )
+        self._conn.commit()
+
+    def add(self, digest: bytes) -> bool:
+        cursor = self._conn.execute(
+            "INSERT OR IGNORE INTO fingerprints (digest) VALUES (?)",
+            (digest[:self.digest_size],),
+        )
+        return cursor.rowcount == 1
+
+    def __len__(self) -> int:
+        return self._conn.execute("SELECT COUNT(*) FROM fingerprints").fetchone()[0]
+
+    def save(self) -> None:
+        self._conn.commit()
+
+    def close(self) -> None:
+        self._conn.rollback()
+        self._conn.close()
+
+
+# ==================================================
+# Backend: Bloom filter (approximate)
+# ==================================================
+
+class BloomDedupIndex:
+    """
+    Approximate dedup with a bit-array Bloom filter.
+
+    Sized from the expected record count and target false-positive
+    rate. A false positive drops a unique record as a "duplicate";
+    duplicates are never let through. Can be saved and reloaded so
+    later appends reuse the same filter; close() does not save, so a
+    failed run leaves the previous filter file untouched.
+    """
+
+    backend = "bloom"
+    digest_size = 16          # two 64-bit halves for double hashing
+    _MAGIC = b"BLM1"
+    _HEADER = struct.Struct("<4sQIQQ")
+
+    def __init__(
+        self,
+        expected_records: int = DEFAULT_EXPECTED_RECORDS,
+        fp_rate: float = DEFAULT_FP_RATE,
+        path: Optional[Path] = None,
+    ):
+        if not 0.0 < fp_rate < 1.0:
+            raise ValueError("Bloom filter false-positive rate must be in (0, 1)")
+
+        n = max(1, expected_records)
+        self.num_bits = max(8, int(math.ceil(-n * math.log(fp_rate) / (math.log(2) ** 2))))
+        self.num_hashes = max(1, int(round(self.num_bits / n * math.log(2))))
+        self.path = Path(path) if path else None
+
+        self._bits = bytearray((self.num_bits + 7) // 8)
+        self._bits_set = 0
+        self._count = 0
+        self._expected_fp = 0.0
+
+    # ----------------------------
+    # Membership
+    # ----------------------------
+
+    def _positions(self, digest: bytes):
+        h1 = int.from_bytes(digest[:8], "little")
+        h2 = int.from_bytes(digest[8:16], "little") | 1
+        m = self.num_bits
+        return [(h1 + i * h2) % m for i in range(self.num_hashes)]
+
+    def add(self, digest: bytes) -> bool:
+        bits = self._bits
+        added = False
+        for pos in self._positions(digest):
+            byte, mask = pos >> 3, 1 << (pos & 7)
+            if not bits[byte] & mask:
+                bits[byte] |= mask
+                self._bits_set += 1
+                added = True
+
+        if added:
+            self._count += 1
+        else:
+            # Reported as seen: a true duplicate, or a never-seen record
+            # colliding at this fill ratio. Summed over the run this
+            # estimates wrongly dropped records
+            self._expected_fp += (self._bits_set / self.num_bits) ** self.num_hashes
+        return added
+
+    def __len__(self) -> int:
+        return self._count
+
+    def stats(self) -> Dict:
+        return {
+            "bloom_bits": self.num_bits,
+            "bloom_hashes": self.num_hashes,
+            "bloom_fill_ratio": round(self._bits_set / self.num_bits, 4),
+            "estimated_false_positives": round(self._expected_fp, 2),
+        }
+
+    # ----------------------------
+    # Persistence
+    # ----------------------------
+
+    def save(self, path: Optional[Path] = None) -> None:
+        path = Path(path or self.path)
+        tmp = path.with_name(path.name + ".tmp")
+        with open(tmp, "wb") as f:
+            f.write(self._HEADER.pack(
+                self._MAGIC,
+                self.num_bits,
+                self.num_hashes,
+                self._bits_set,
+                self._count,
+            ))
+            f.write(self._bits)
+        os.replace(tmp, path)
+
+    @classmethod
+    def load(cls, path: Path) -> "BloomDedupIndex":
+        path = Path(path)
+        with open(path, "rb") as f:
+            header = f.read(cls._HEADER.size)
+            magic, num_bits, num_hashes, bits_set, count = cls._HEADER.unpack(header)
+            if magic != cls._MAGIC:
+                raise ValueError(f"Not a Bloom filter file: {path}")
+            bits = bytearray(f.read())
+
+        index = cls.__new__(cls)
+        index.num_bits = num_bits
+        index.num_hashes = num_hashes
+        index.path = path
+        index._bits = bits
+        index._bits_set = bits_set
+        index._count = count
+        index._expected_fp = 0.0    # estimate covers this run only
+        return index
+
+    def close(self) -> None:
+        pass
+
+
+# ==================================================
+# Factory
+# ==================================================
+
+def make_dedup_index(
+    backend: str = "set",
+    path: Optional[Path] = None,
+    digest_size: Optional[int] = None,
+    expected_records: int = DEFAULT_EXPECTED_RECORDS,
+    fp_rate: float = DEFAULT_FP_RATE,
+):
+    if backend == "set":
+        return SetDedupIndex()
+
+    if backend == "compact":
+        return CompactDedupIndex(digest_size or DEFAULT_DIGEST_SIZE)
+
+    if backend == "sqlite":
+        if path is None:
+            raise ValueError("The sqlite dedup backend needs a path")
+        return SqliteDedupIndex(path, digest_size or 16)
+
+    if backend == "bloom":
+        if path is not None and Path(path).exists():
+            return BloomDedupIndex.load(path)
+        return BloomDedupIndex(expected_records, fp_rate, path=path)
+
+    raise ValueError(f"Unknown dedup backend: {backend}")
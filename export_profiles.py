@@ -1,4 +1,4 @@
-from typing import List, Dict
+from typing import Dict, Iterable, Iterator, List
 
 
 # ----------------------------
@@ -61,4 +61,29 @@ def apply_export_profile(records: List[Dict], profile: str = "training_minimal")
     if profile == "debug_full":
         return export_debug_full(records)
     
-    raise ValueError(f"Unknown export profile: {profile}")
\ No newline at end of file
+    raise ValueError(f"Unknown export profile: {profile}")
+
+
+# ----------------------------
+# Streaming Profile Selector
+# ----------------------------
+
+EXPORT_PROFILES = {
+    "training_minimal": export_training_minimal,
+    "training_with_source": export_training_with_source,
+    "debug_full": export_debug_full,
+}
+
+
+def iter_export_profile(records: Iterable[Dict], profile: str = "training_minimal") -> Iterator[Dict]:
+    """
+    Applies a profile record by record (same output as apply_export_profile).
+    """
+
+    if profile not in EXPORT_PROFILES:
+        raise ValueError(f"Unknown export profile: {profile}")
+
+    export = EXPORT_PROFILES[profile]
+
+    for r in records:
+        yield from export([r])
\ No newline at end of file
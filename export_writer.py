@@ -1,8 +1,12 @@
-import json
-from typing import List, Dict
+from typing import Callable, Dict, Iterable, List, Optional
+from jsonl_index import record_summary
+from json_codec import dumps_line
+from jsonl_output import open_jsonl_output, FLUSH
 
+DEFAULT_FLUSH_EVERY = 100
 
-def write_export_jsonl(records: List[Dict], output_path: str) -> None:
+
+def write_export_jsonl(records: List[Dict], output_path: str, **output_options) -> None:
     """
     Writes user-facing JSONL files.
     No internal schema enforcement.
@@ -12,6 +16,55 @@ def write_export_jsonl(records: List[Dict], output_path: str) -> None:
     if not records:
         raise ValueError("No records to write")
 
-    with open(output_path, "w", encoding="utf-8") as f:
+    stream_export_jsonl(records, output_path, **output_options)
+
+
+def stream_export_jsonl(
+    records: Iterable[Dict],
+    output_path: str,
+    flush_every: int = DEFAULT_FLUSH_EVERY,
+    index: bool = True,
+    shard_records: Optional[int] = None,
+    shard_bytes: Optional[int] = None,
+    shards: Optional[List[Dict]] = None,
+    on_shard: Optional[Callable[[Dict], None]] = None,
+) -> int:
+    """
+    Encodes records as they arrive; every flush_every records, and
+    wherever the stream yields jsonl_output.FLUSH, buffered records are
+    written with a single write call and flushed.
+    Compression, sharding and the index sidecar work as in
+    jsonl_writer.stream_jsonl.
+    Returns the number of records written.
+    """
+
+    written = 0
+    lines, summaries = [], []
+
+    with open_jsonl_output(
+        output_path,
+        index=index,
+        shard_records=shard_records,
+        shard_bytes=shard_bytes,
+        shards=shards,
+        on_shard=on_shard,
+    ) as f:
         for record in records:
-            f.write(json.dumps(record, ensure_ascii=False) + "\n")
+            if record is FLUSH:
+                if lines:
+                    f.write_batch(lines, summaries)
+                    lines, summaries = [], []
+                f.flush()
+                continue
+            lines.append(dumps_line(record))
+            summaries.append(record_summary(record))
+            written += 1
+            if len(lines) >= flush_every:
+                f.write_batch(lines, summaries)
+                f.flush()
+                lines, summaries = [], []
+
+        if lines:
+            f.write_batch(lines, summaries)
+
+    return written
@@ -1,13 +1,32 @@
-from typing import List
+import queue
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from functools import partial
+from pathlib import Path
+from typing import Dict, Iterator, List, Optional, Tuple
 from urllib.parse import urlparse
 from strategies import (
     extract_static_html,
     extract_dom_based,
     extract_js_rendered,
-    extract_fallback
+    extract_fallback,
+    parse_static_html,
+    parse_dom_based,
+    parse_js_rendered,
+    render_js_page,
 )
+from fetcher import FetchedPage, fetch_page
 from chunker import build_chunk_records
 from jsonl_writer import build_record, build_fallback_record
+from scrape_state import ScrapeStateStore, content_hash, GONE_STATUS
+from strategy_selector import Attempt, StrategyDecision, StrategySelector
+from scheduler import (
+    iter_concurrent,
+    host_key,
+    DEFAULT_MAX_WORKERS,
+    DEFAULT_PER_HOST_LIMIT,
+)
 
 
 # --------------------------------------------------
@@ -52,82 +71,547 @@ def choose_primary_strategy(site_type: str) -> str:
     return "dom_based"
 
 
+# --------------------------------------------------
+# Learned Strategy Selection (optional)
+# --------------------------------------------------
+
+_selector: Optional[StrategySelector] = None
+
+
+def configure_strategy_selector(
+    enabled: bool,
+    state_dir: Optional[Path] = None,
+    **options,
+) -> Optional[StrategySelector]:
+    """
+    Enables per-domain strategy learning (see strategy_selector).
+    state_dir persists outcomes across runs. While enabled, records
+    carry the decision in "strategy_decision".
+    """
+    global _selector
+
+    if _selector is not None:
+        _selector.close()
+        _selector = None
+
+    if enabled:
+        _selector = StrategySelector(state_dir, min_chars=MIN_TEXT_CHARS, **options)
+    return _selector
+
+
+def strategy_selector_stats() -> Dict:
+    if _selector is None:
+        return {}
+    return _selector.stats()
+
+
+def strategy_report() -> Dict[str, Dict[str, Dict]]:
+    if _selector is None:
+        return {}
+    return _selector.domain_report()
+
+
+def select_strategy(url: str, site_type: str) -> StrategyDecision:
+    """
+    Learned choice when the selector is enabled, else the heuristic.
+    """
+    heuristic = choose_primary_strategy(site_type)
+    if _selector is None:
+        return StrategyDecision(heuristic, "heuristic")
+    return _selector.choose(url, heuristic)
+
+
+def retry_strategy(decision: StrategyDecision) -> Optional[str]:
+    """
+    Strategy with its own fetch to try when the first one is too short:
+    dom_based after a thin render, or the heuristic's render when a
+    learned, explored or best-effort HTTP strategy was chosen instead.
+    """
+    if decision.strategy not in HTTP_STRATEGIES:
+        return "dom_based"
+    if decision.escalate_to is not None and decision.escalate_to not in HTTP_STRATEGIES:
+        return decision.escalate_to
+    return None
+
+
+def _tag_records(records: Optional[List[dict]], decision: Optional[StrategyDecision]) -> Optional[List[dict]]:
+    if records and decision is not None:
+        for record in records:
+            record["strategy_decision"] = decision.as_field()
+    return records
+
+
 # --------------------------------------------------
 # Strategy Executor
 # --------------------------------------------------
 
-def run_strategy(strategy: str, url: str):
+# Strategies that parse a plain HTTP response (fetched once, parsed many)
+HTTP_STRATEGIES = {"static_html", "dom_based"}
+
+PARSERS = {
+    "static_html": parse_static_html,
+    "dom_based": parse_dom_based,
+    "js_rendered": parse_js_rendered,
+}
+
+MIN_TEXT_CHARS = 300
+
+
+def run_strategy(strategy: str, url: str, page=None):
     if strategy == "static_html":
-        return extract_static_html(url)
+        return extract_static_html(url, page)
 
     if strategy == "dom_based":
-        return extract_dom_based(url)
+        return extract_dom_based(url, page)
 
     if strategy == "js_rendered":
-        return extract_js_rendered(url)
+        return extract_js_rendered(url, page)
 
     return extract_fallback(url, reason="Unknown strategy")
 
 
+def _too_short(text: str) -> bool:
+    return not text or len(text.strip()) < MIN_TEXT_CHARS
+
+
+# --------------------------------------------------
+# Fetch Stage (network I/O)
+# --------------------------------------------------
+
+def fetch_for_strategy(url: str, strategy: str) -> FetchedPage:
+    """
+    Downloads (or renders, for js_rendered) the page a strategy parses.
+    """
+    if strategy in HTTP_STRATEGIES:
+        return fetch_page(url)
+    return render_js_page(url)
+
+
+def timed_fetch(url: str, strategy: str) -> Tuple[FetchedPage, float]:
+    started = time.perf_counter()
+    page = fetch_for_strategy(url, strategy)
+    return page, time.perf_counter() - started
+
+
+# --------------------------------------------------
+# Parse Stage (CPU only, no network)
+# --------------------------------------------------
+
+def parse_page(
+    strategy: str,
+    page: FetchedPage,
+    attempts: Optional[List[Attempt]] = None,
+    fetch_seconds: float = 0.0,
+) -> Tuple[str, str, float]:
+    """
+    Runs the primary parser, then dom_based on the same response
+    if the text is too short. Never touches the network.
+    attempts collects (strategy, text chars, seconds) per parser run;
+    the first one is charged fetch_seconds.
+    """
+    def run(name: str, seconds: float) -> Tuple[str, str, float]:
+        started = time.perf_counter()
+        result = PARSERS[name](page)
+        if attempts is not None:
+            chars = len(result[0].strip()) if result[0] else 0
+            attempts.append((name, chars, seconds + time.perf_counter() - started))
+        return result
+
+    text, used_strategy, confidence = run(strategy, fetch_seconds)
+
+    if _too_short(text) and strategy in HTTP_STRATEGIES and strategy != "dom_based":
+        text, used_strategy, confidence = run("dom_based", 0.0)
+
+    return text, used_strategy, confidence
+
+
+def build_url_records(
+    url: str,
+    site_type: str,
+    text: str,
+    used_strategy: str,
+    confidence: float,
+) -> List[dict]:
+    # ---- Final validation ----
+    if _too_short(text):
+        raise ValueError("Extracted text too small after retries")
+
+    # ---- Chunking ----
+    chunk_records = build_chunk_records(
+        text=text,
+        source_url=url,
+        site_type=site_type,
+        extraction_strategy=used_strategy,
+        base_confidence=confidence,
+    )
+
+    if not chunk_records:
+        raise ValueError("No valid chunks produced")
+
+    # ---- Schema enforcement ----
+    return [
+        build_record(**record)
+        for record in chunk_records
+    ]
+
+
+def build_delta_records(
+    url: str,
+    site_type: str,
+    text: str,
+    used_strategy: str,
+    confidence: float,
+    known_hash: Optional[str] = None,
+) -> Tuple[List[dict], Dict]:
+    """
+    build_url_records, skipped when the text hashes to known_hash (the
+    page is unchanged since the last run: no records, no chunking).
+    Also returns the outcome for ScrapeStateStore.apply.
+    """
+    digest = content_hash(text) if not _too_short(text) else None
+    outcome = {"status": "changed", "content_hash": digest, "strategy": used_strategy}
+
+    if digest is not None and digest == known_hash:
+        return [], {**outcome, "status": "unchanged"}
+
+    return build_url_records(url, site_type, text, used_strategy, confidence), outcome
+
+
+def failure_outcome(error: Exception) -> Dict:
+    response = getattr(error, "response", None)
+    status = getattr(response, "status_code", None)
+    return {"status": "gone" if status in GONE_STATUS else "failed", "error": str(error)}
+
+
 # --------------------------------------------------
 # Core Extraction Pipeline (Robust)
 # --------------------------------------------------
 
-def extract_url_to_records(url: str) -> List[dict]:
+def extract_url_to_records(url: str, state: Optional[ScrapeStateStore] = None) -> List[dict]:
+    records, _ = extract_url_with_page(url, state)
+    return records
+
+
+def extract_url_with_page(
+    url: str,
+    state: Optional[ScrapeStateStore] = None,
+) -> Tuple[List[dict], Optional[FetchedPage]]:
+    """
+    Same as extract_url_to_records, but also returns the page the text
+    came from (None if it could not be fetched), so callers such as the
+    crawler can reuse its parsed DOM.
+
+    With a state store, pages whose text is unchanged since the last
+    run return no records, and every outcome is recorded in the store.
+    """
     site_type = detect_site_type(url)
-    primary_strategy = choose_primary_strategy(site_type)
+    decision = select_strategy(url, site_type)
+    tag = decision if _selector is not None else None
+    primary_strategy = decision.strategy
+    known_hash = state.known_hash(url) if state is not None else None
+    page = None
+    attempts: List[Attempt] = []
 
     try:
-        # ---- First attempt ----
-        text, used_strategy, confidence = run_strategy(primary_strategy, url)
+        # ---- Fetch once ----
+        page, fetch_seconds = timed_fetch(url, primary_strategy)
+
+        # ---- First attempt (+ parse-only dom_based retry) ----
+        text, used_strategy, confidence = parse_page(primary_strategy, page, attempts, fetch_seconds)
 
         # ---- Quality check ----
-        if not text or len(text.strip()) < 300:
-            # Retry with DOM-based extraction before giving up
-            text, used_strategy, confidence = extract_dom_based(url)
-
-        # ---- Final validation ----
-        if not text or len(text.strip()) < 300:
-            raise ValueError("Extracted text too small after retries")
-
-        # ---- Chunking ----
-        chunk_records = build_chunk_records(
-            text=text,
-            source_url=url,
-            site_type=site_type,
-            extraction_strategy=used_strategy,
-            base_confidence=confidence,
+        retry = retry_strategy(decision)
+        if _too_short(text) and retry is not None:
+            # Thin render: plain HTTP fetch for dom_based; thin explored
+            # HTTP strategy: render after all
+            page, fetch_seconds = timed_fetch(url, retry)
+            text, used_strategy, confidence = parse_page(retry, page, attempts, fetch_seconds)
+
+        records, outcome = build_delta_records(
+            url, site_type, text, used_strategy, confidence, known_hash
         )
+        if state is not None:
+            state.apply(url, outcome)
+        return _tag_records(records, tag), page
+
+    except Exception as e:
+        if state is not None:
+            outcome = failure_outcome(e)
+            state.apply(url, outcome)
+            if outcome["status"] == "gone":
+                # Reported as a tombstone instead
+                return [], page
+        # Absolute safety net
+        return _tag_records([
+            build_fallback_record(
+                source_url=url,
+                site_type=site_type,
+                reason=str(e),
+            )
+        ], tag), page
 
-        if not chunk_records:
-            raise ValueError("No valid chunks produced")
+    finally:
+        if _selector is not None:
+            _selector.record(url, attempts)
 
-        # ---- Schema enforcement ----
-        return [
-            build_record(**record)
-            for record in chunk_records
-        ]
 
+# --------------------------------------------------
+# Process-Pool Pipeline (fetch threads -> parse processes)
+# --------------------------------------------------
+
+DEFAULT_PARSE_QUEUE_PER_WORKER = 4
+
+
+def _fetch_stage(job: Tuple[int, str], state: Optional[ScrapeStateStore] = None) -> Dict:
+    index, url = job
+    site_type = detect_site_type(url)
+    decision = select_strategy(url, site_type)
+
+    fetched = _fetch_for_parse(url, decision.strategy, state)
+    fetched.update({
+        "site_type": site_type,
+        "retry": retry_strategy(decision),
+        "decision": decision if _selector is not None else None,
+        "attempts": [],
+    })
+    return fetched
+
+
+def _fetch_for_parse(url: str, strategy: str, state: Optional[ScrapeStateStore]) -> Dict:
+    try:
+        page, fetch_seconds = timed_fetch(url, strategy)
+        error = failed = None
     except Exception as e:
-        # Absolute safety net
-        return [
+        page, fetch_seconds, error, failed = None, 0.0, str(e), failure_outcome(e)
+
+    return {
+        "url": url,
+        "strategy": strategy,
+        "page": page,
+        "fetch_seconds": fetch_seconds,
+        "error": error,
+        "failed": failed,
+        "known_hash": state.known_hash(url) if state is not None else None,
+    }
+
+
+def _parse_stage(fetched: Dict) -> Tuple[Optional[List[dict]], Dict]:
+    """
+    Runs in a worker process on raw page bytes.
+    Returns (records, outcome); records is None when the page needs a
+    retry with its own fetch (outcome["retry"]: dom_based after a thin
+    render, or the render an explored HTTP strategy stood in for).
+    outcome["attempts"] lists the parser runs for the selector.
+    """
+    url, site_type = fetched["url"], fetched["site_type"]
+    attempts = list(fetched["attempts"])
+
+    try:
+        if fetched["error"] is not None:
+            raise RuntimeError(fetched["error"])
+
+        text, used_strategy, confidence = parse_page(
+            fetched["strategy"], fetched["page"], attempts, fetched["fetch_seconds"]
+        )
+
+        if _too_short(text) and fetched["retry"] is not None:
+            return None, {
+                "retry": fetched["retry"],
+                "attempts": attempts,
+                "site_type": site_type,
+                "decision": fetched["decision"],
+            }
+
+        records, outcome = build_delta_records(
+            url, site_type, text, used_strategy, confidence, fetched["known_hash"]
+        )
+
+    except Exception as e:
+        records = [
             build_fallback_record(
                 source_url=url,
                 site_type=site_type,
                 reason=str(e),
             )
         ]
+        outcome = fetched.get("failed") or failure_outcome(e)
+
+    return _tag_records(records, fetched["decision"]), {**outcome, "attempts": attempts}
+
+
+def _retry_stage(
+    url: str,
+    pending: Dict,
+    procs: ProcessPoolExecutor,
+    state: Optional[ScrapeStateStore] = None,
+) -> Tuple[List[dict], Dict]:
+    """
+    Second fetch for a thin first attempt (pending: the outcome
+    _parse_stage returned), parsed in a worker; never retried again.
+    """
+    fetched = _fetch_for_parse(url, pending["retry"], state)
+    fetched.update({
+        "site_type": pending["site_type"],
+        "retry": None,
+        "decision": pending["decision"],
+        "attempts": pending["attempts"],
+    })
+    return procs.submit(_parse_stage, fetched).result()
+
+
+def _iter_pipelined(
+    urls: List[str],
+    max_workers: int,
+    per_host_limit: int,
+    ordered: bool,
+    parse_workers: int,
+    queue_size: int,
+    state: Optional[ScrapeStateStore] = None,
+) -> Iterator[Tuple[str, List[dict]]]:
+    """
+    Fetch threads feed parse processes through a bounded queue:
+    at most queue_size fetched pages wait for or sit in the parser.
+    State lookups and strategy choices happen on the fetch threads
+    and updates here, so neither store crosses into the worker
+    processes.
+    """
+    jobs = list(enumerate(urls))
+    results: queue.Queue = queue.Queue()
+    slots = threading.BoundedSemaphore(queue_size)
+    stop = threading.Event()
+
+    with ProcessPoolExecutor(max_workers=parse_workers) as procs, \
+            ThreadPoolExecutor(max_workers=max(1, per_host_limit)) as retries:
+
+        def feed() -> None:
+            try:
+                for (index, _), fetched in iter_concurrent(
+                    jobs,
+                    partial(_fetch_stage, state=state),
+                    max_workers=max_workers,
+                    per_host_limit=per_host_limit,
+                    key=lambda job: host_key(job[1]),
+                    ordered=False,
+                ):
+                    while not slots.acquire(timeout=0.1):
+                        if stop.is_set():
+                            return
+                    future = procs.submit(_parse_stage, fetched)
+                    future.add_done_callback(lambda f, i=index: results.put((i, f)))
+            except BaseException as e:
+                results.put((None, e))
+
+        feeder = threading.Thread(target=feed, name="fetch-stage", daemon=True)
+        feeder.start()
+
+        buffered: Dict[int, List[dict]] = {}
+        next_index = 0
+        completed = 0
+
+        try:
+            while completed < len(jobs):
+                index, future = results.get()
+                if index is None:
+                    raise future
+
+                url = urls[index]
+                try:
+                    result = future.result()
+                except Exception as e:
+                    result = [build_fallback_record(
+                        source_url=url,
+                        site_type=detect_site_type(url),
+                        reason=str(e),
+                    )], failure_outcome(e)
+
+                records, outcome = result
+                if records is None:
+                    retry = retries.submit(_retry_stage, url, outcome, procs, state)
+                    retry.add_done_callback(lambda f, i=index: results.put((i, f)))
+                    continue
+
+                if _selector is not None:
+                    _selector.record(url, outcome.get("attempts", []))
+                if state is not None:
+                    state.apply(url, outcome)
+                    if outcome["status"] == "gone":
+                        records = []
+
+                slots.release()
+                completed += 1
+
+                if not ordered:
+                    yield url, records
+                    continue
+
+                buffered[index] = records
+                while next_index in buffered:
+                    yield urls[next_index], buffered.pop(next_index)
+                    next_index += 1
+        finally:
+            stop.set()
+            feeder.join()
 
 
 # --------------------------------------------------
 # Batch Processing
 # --------------------------------------------------
 
-def extract_urls(urls: List[str]) -> List[dict]:
+def iter_extract_urls(
+    urls: List[str],
+    max_workers: int = DEFAULT_MAX_WORKERS,
+    per_host_limit: int = DEFAULT_PER_HOST_LIMIT,
+    ordered: bool = True,
+    parse_workers: int = 0,
+    queue_size: Optional[int] = None,
+    state: Optional[ScrapeStateStore] = None,
+) -> Iterator[Tuple[str, List[dict]]]:
+    """
+    Extracts URLs concurrently and yields (url, records) per URL.
+
+    Each URL still goes through the primary -> dom_based -> fallback
+    sequence. With parse_workers > 0, parsing and chunking run in a
+    process pool fed with raw page bytes, separate from network I/O.
+    With a state store (see scrape_state), unchanged pages yield no
+    records.
+    """
+    if parse_workers > 0:
+        yield from _iter_pipelined(
+            list(urls),
+            max_workers=max_workers,
+            per_host_limit=per_host_limit,
+            ordered=ordered,
+            parse_workers=parse_workers,
+            queue_size=queue_size or parse_workers * DEFAULT_PARSE_QUEUE_PER_WORKER,
+            state=state,
+        )
+        return
+
+    yield from iter_concurrent(
+        urls,
+        partial(extract_url_to_records, state=state),
+        max_workers=max_workers,
+        per_host_limit=per_host_limit,
+        ordered=ordered,
+    )
+
+
+def extract_urls(
+    urls: List[str],
+    max_workers: int = DEFAULT_MAX_WORKERS,
+    per_host_limit: int = DEFAULT_PER_HOST_LIMIT,
+    ordered: bool = True,
+    parse_workers: int = 0,
+) -> List[dict]:
     all_records = []
 
-    for url in urls:
-        records = extract_url_to_records(url)
+    for _, records in iter_extract_urls(
+        urls,
+        max_workers=max_workers,
+        per_host_limit=per_host_limit,
+        ordered=ordered,
+        parse_workers=parse_workers,
+    ):
         all_records.extend(records)
 
-    return all_records
\ No newline at end of file
+    return all_records
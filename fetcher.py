@@ -0,0 +1,177 @@
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Dict, Optional
+from bs4 import BeautifulSoup
+from http_session import get_session
+from http_cache import HttpCache, CacheMissError, DEFAULT_CACHE_MAX_BYTES
+
+
+# ==================================================
+# Fetch Defaults
+# ==================================================
+
+DEFAULT_TIMEOUT = 15
+
+
+# ==================================================
+# Response Object
+# ==================================================
+
+@dataclass
+class FetchedPage:
+    """
+    A downloaded page, fetched once and parsed by any strategy.
+    """
+    url: str
+    final_url: str
+    status_code: int
+    headers: Dict[str, str]
+    content: bytes
+    encoding: Optional[str] = None
+    _text: Optional[str] = field(default=None, repr=False, compare=False)
+    _soup: Optional[BeautifulSoup] = field(default=None, repr=False, compare=False)
+
+    @property
+    def text(self) -> str:
+        """
+        Decoded body, computed on first access and reused afterwards.
+        """
+        if self._text is None:
+            self._text = self.content.decode(
+                self.encoding or "utf-8",
+                errors="replace",
+            )
+        return self._text
+
+    @property
+    def soup(self) -> BeautifulSoup:
+        """
+        Parsed DOM, shared by the DOM parsers and link discovery.
+        Callers must not modify it.
+        """
+        if self._soup is None:
+            self._soup = BeautifulSoup(self.text, "lxml")
+        return self._soup
+
+    def __getstate__(self) -> Dict:
+        # Pages cross process boundaries as bytes, never as parse trees
+        state = dict(self.__dict__)
+        state["_soup"] = None
+        return state
+
+
+# ==================================================
+# Response Cache Configuration
+# ==================================================
+
+_cache: Optional[HttpCache] = None
+
+
+def configure_cache(
+    cache_dir: Optional[Path],
+    max_bytes: int = DEFAULT_CACHE_MAX_BYTES,
+    max_age: float = 0,
+    cache_only: bool = False,
+) -> Optional[HttpCache]:
+    """
+    Enables the on-disk response cache (cache_dir=None disables it).
+
+    - max_age: seconds a cached copy is served without revalidation
+    - cache_only: never touch the network; uncached URLs fail
+    """
+    global _cache
+
+    if _cache is not None:
+        _cache.close()
+        _cache = None
+
+    if cache_dir is not None:
+        _cache = HttpCache(
+            cache_dir,
+            max_bytes=max_bytes,
+            max_age=max_age,
+            cache_only=cache_only,
+        )
+    return _cache
+
+
+def cache_stats() -> Dict[str, int]:
+    if _cache is None:
+        return {}
+    return _cache.stats()
+
+
+def _page_from_cache(url: str, entry: Dict) -> FetchedPage:
+    return FetchedPage(
+        url=url,
+        final_url=entry["final_url"],
+        status_code=entry["status_code"],
+        headers=entry["headers"],
+        content=entry["content"],
+        encoding=entry["encoding"],
+    )
+
+
+# ==================================================
+# Fetch Layer
+# ==================================================
+
+def fetch_page(url: str, timeout: int = DEFAULT_TIMEOUT) -> FetchedPage:
+    """
+    Downloads a URL into a FetchedPage over the pooled session.
+    Raises for HTTP errors, like the strategies used to.
+
+    With a cache configured:
+    - fresh or cache-only entries are served without a request
+    - stale entries are revalidated with If-None-Match / If-Modified-Since
+    - a 304 reuses the cached body and refreshes its validators
+    - responses marked Cache-Control: no-store are not cached
+    """
+    cache = _cache
+    entry = cache.get(url) if cache is not None else None
+
+    if cache is not None:
+        if entry is not None and (cache.cache_only or cache.is_fresh(entry)):
+            cache.record("hits")
+            return _page_from_cache(url, entry)
+        if cache.cache_only:
+            cache.record("misses")
+            raise CacheMissError(f"Not in cache (cache-only mode): {url}")
+
+    conditional = {}
+    if entry is not None:
+        if entry["etag"]:
+            conditional["If-None-Match"] = entry["etag"]
+        if entry["last_modified"]:
+            conditional["If-Modified-Since"] = entry["last_modified"]
+
+    response = get_session().get(url, timeout=timeout, headers=conditional)
+
+    if response.status_code == 304 and entry is not None:
+        cache.touch(url, dict(response.headers))
+        cache.record("revalidated")
+        return _page_from_cache(url, entry)
+
+    response.raise_for_status()
+
+    page = FetchedPage(
+        url=url,
+        final_url=response.url,
+        status_code=response.status_code,
+        headers=dict(response.headers),
+        content=response.content,
+        encoding=response.encoding or response.apparent_encoding,
+    )
+
+    if cache is not None:
+        cache.record("misses")
+        cache.put(
+            url,
+            final_url=page.final_url,
+            status_code=page.status_code,
+            headers=page.headers,
+            encoding=page.encoding,
+            content=page.content,
+        )
+
+    return page
@@ -0,0 +1,286 @@
+import json
+import sqlite3
+import threading
+import time
+from pathlib import Path
+from typing import Dict, Optional
+from urllib.parse import urlsplit, urlunsplit, parse_qsl, urlencode
+
+
+# ==================================================
+# Cache Defaults
+# ==================================================
+
+DEFAULT_CACHE_MAX_BYTES = 1024 * 1024 * 1024   # 1 GiB
+CACHE_DB_NAME = "http_cache.sqlite"
+
+
+class CacheMissError(Exception):
+    """
+    Raised in cache-only mode when a URL has no cached copy.
+    """
+    pass
+
+
+# ==================================================
+# URL Canonicalization
+# ==================================================
+
+def canonical_url(url: str) -> str:
+    """
+    Canonical cache key:
+    - lowercase scheme and host
+    - drop default ports and fragments
+    - sort query parameters
+    """
+    parts = urlsplit(url.strip())
+    scheme = parts.scheme.lower()
+    host = (parts.hostname or "").lower()
+
+    port = parts.port
+    if port and not ((scheme == "http" and port == 80) or (scheme == "https" and port == 443)):
+        host = f"{host}:{port}"
+
+    query = urlencode(sorted(parse_qsl(parts.query, keep_blank_values=True)))
+    path = parts.path or "/"
+
+    return urlunsplit((scheme, host, path, query, ""))
+
+
+def _header(headers: Dict[str, str], name: str) -> Optional[str]:
+    name = name.lower()
+    for k, v in headers.items():
+        if k.lower() == name:
+            return v
+    return None
+
+
+def is_no_store(headers: Dict[str, str]) -> bool:
+    """
+    True when the response forbids storing it (Cache-Control: no-store).
+    """
+    cache_control = _header(headers, "Cache-Control") or ""
+    return "no-store" in [d.strip().lower() for d in cache_control.split(",")]
+
+
+# ==================================================
+# On-Disk Response Cache (SQLite, size-based LRU)
+# ==================================================
+
+class HttpCache:
+    """
+    Persistent response cache keyed by canonical URL.
+
+    Stores body, headers and validators (ETag / Last-Modified) so
+    re-runs can send conditional requests and reuse bodies on 304.
+    """
+
+    def __init__(
+        self,
+        cache_dir: Path,
+        max_bytes: int = DEFAULT_CACHE_MAX_BYTES,
+        max_age: float = 0,
+        cache_only: bool = False,
+    ):
+        self.cache_dir = Path(cache_dir)
+        self.cache_dir.mkdir(parents=True, exist_ok=True)
+        self.max_bytes = max_bytes
+        self.max_age = max_age
+        self.cache_only = cache_only
+
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(
+            str(self.cache_dir / CACHE_DB_NAME),
+            check_same_thread=False,
+        )
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS responses ("
+            " url_key TEXT PRIMARY KEY,"
+            " final_url TEXT,"
+            " status_code INTEGER,"
+            " headers TEXT,"
+            " encoding TEXT,"
+            " etag TEXT,"
+            " last_modified TEXT,"
+            " body BLOB,"
+            " size INTEGER,"
+            " stored_at REAL,"
+            " last_access REAL)"
+        )
+        self._conn.execute(
+            "CREATE INDEX IF NOT EXISTS idx_last_access ON responses(last_access)"
+        )
+        self._conn.commit()
+
+        # Running size of all stored bodies, so put() does not re-sum the table
+        self._total_bytes = self._conn.execute(
+            "SELECT COALESCE(SUM(size), 0) FROM responses"
+        ).fetchone()[0]
+
+        self.counters = {"hits": 0, "misses": 0, "revalidated": 0, "evicted": 0}
+
+    # ----------------------------
+    # Lookup / Store
+    # ----------------------------
+
+    def get(self, url: str) -> Optional[Dict]:
+        key = canonical_url(url)
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT final_url, status_code, headers, encoding, etag,"
+                " last_modified, body, stored_at FROM responses WHERE url_key = ?",
+                (key,),
+            ).fetchone()
+            if row is None:
+                return None
+
+            self._conn.execute(
+                "UPDATE responses SET last_access = ? WHERE url_key = ?",
+                (time.time(), key),
+            )
+            self._conn.commit()
+
+        return {
+            "final_url": row[0],
+            "status_code": row[1],
+            "headers": json.loads(row[2]),
+            "encoding": row[3],
+            "etag": row[4],
+            "last_modified": row[5],
+            "content": row[6],
+            "stored_at": row[7],
+        }
+
+    def put(
+        self,
+        url: str,
+        final_url: str,
+        status_code: int,
+        headers: Dict[str, str],
+        encoding: Optional[str],
+        content: bytes,
+    ) -> None:
+        """
+        Stores a response; one marked no-store is not kept (and any
+        earlier copy is dropped).
+        """
+        key = canonical_url(url)
+        now = time.time()
+
+        with self._lock:
+            self._discard(key)
+            if is_no_store(headers):
+                self._conn.commit()
+                return
+
+            self._conn.execute(
+                "INSERT OR REPLACE INTO responses VALUES (?,?,?,?,?,?,?,?,?,?,?)",
+                (
+                    key,
+                    final_url,
+                    status_code,
+                    json.dumps(headers),
+                    encoding,
+                    _header(headers, "ETag"),
+                    _header(headers, "Last-Modified"),
+                    content,
+                    len(content),
+                    now,
+                    now,
+                ),
+            )
+            self._total_bytes += len(content)
+            self._evict()
+            self._conn.commit()
+
+    def touch(self, url: str, headers: Optional[Dict[str, str]] = None) -> None:
+        """
+        Marks a cached entry as freshly validated (after a 304).
+        Headers sent with the 304 (new ETag / Last-Modified, ...) are
+        merged into the stored ones; a no-store 304 drops the entry.
+        """
+        key = canonical_url(url)
+        headers = headers or {}
+
+        with self._lock:
+            if is_no_store(headers):
+                self._discard(key)
+                self._conn.commit()
+                return
+
+            now = time.time()
+            row = self._conn.execute(
+                "SELECT headers FROM responses WHERE url_key = ?", (key,)
+            ).fetchone()
+            if row is None:
+                return
+
+            merged = json.loads(row[0])
+            for name, value in headers.items():
+                for k in [k for k in merged if k.lower() == name.lower()]:
+                    del merged[k]
+                merged[name] = value
+
+            self._conn.execute(
+                "UPDATE responses SET headers = ?, etag = ?, last_modified = ?,"
+                " stored_at = ?, last_access = ? WHERE url_key = ?",
+                (
+                    json.dumps(merged),
+                    _header(merged, "ETag"),
+                    _header(merged, "Last-Modified"),
+                    now,
+                    now,
+                    key,
+                ),
+            )
+            self._conn.commit()
+
+    def is_fresh(self, entry: Dict) -> bool:
+        return self.max_age > 0 and time.time() - entry["stored_at"] < self.max_age
+
+    # ----------------------------
+    # Eviction
+    # ----------------------------
+
+    def _discard(self, key: str) -> None:
+        row = self._conn.execute(
+            "SELECT size FROM responses WHERE url_key = ?", (key,)
+        ).fetchone()
+        if row is not None:
+            self._conn.execute("DELETE FROM responses WHERE url_key = ?", (key,))
+            self._total_bytes -= row[0]
+
+    def _evict(self) -> None:
+        total = self._total_bytes
+        if total <= self.max_bytes:
+            return
+
+        rows = self._conn.execute(
+            "SELECT url_key, size FROM responses ORDER BY last_access ASC"
+        ).fetchall()
+        to_delete = []
+        for url_key, size in rows:
+            if total <= self.max_bytes:
+                break
+            to_delete.append((url_key,))
+            total -= size
+
+        self._conn.executemany("DELETE FROM responses WHERE url_key = ?", to_delete)
+        self._total_bytes = total
+        self.counters["evicted"] += len(to_delete)
+
+    # ----------------------------
+    # Stats / Lifecycle
+    # ----------------------------
+
+    def record(self, counter: str) -> None:
+        with self._lock:
+            self.counters[counter] += 1
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            return dict(self.counters)
+
+    def close(self) -> None:
+        with self._lock:
+            self._conn.close()
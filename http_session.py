@@ -0,0 +1,157 @@
+import threading
+import requests
+from typing import Dict, Optional
+from requests.adapters import HTTPAdapter
+from urllib3.connectionpool import HTTPConnectionPool, HTTPSConnectionPool
+
+
+# ==================================================
+# Transport Defaults
+# ==================================================
+
+DEFAULT_USER_AGENT = "Mozilla/5.0"
+DEFAULT_POOL_CONNECTIONS = 32   # number of hosts kept in the pool
+DEFAULT_POOL_MAXSIZE = 8        # open connections kept per host
+
+
+# ==================================================
+# Connection Counting
+# ==================================================
+
+_stats_lock = threading.Lock()
+_stats = {"requests": 0, "new_connections": 0}
+
+
+def _count(name: str) -> None:
+    with _stats_lock:
+        _stats[name] += 1
+
+
+class _CountingHTTPConnectionPool(HTTPConnectionPool):
+    def _new_conn(self):
+        _count("new_connections")
+        return super()._new_conn()
+
+
+class _CountingHTTPSConnectionPool(HTTPSConnectionPool):
+    def _new_conn(self):
+        _count("new_connections")
+        return super()._new_conn()
+
+
+class _PooledAdapter(HTTPAdapter):
+    """
+    HTTPAdapter whose pools count every new TCP/TLS connection.
+    """
+    def init_poolmanager(self, *args, **kwargs):
+        super().init_poolmanager(*args, **kwargs)
+        self.poolmanager.pool_classes_by_scheme = {
+            "http": _CountingHTTPConnectionPool,
+            "https": _CountingHTTPSConnectionPool,
+        }
+
+
+# ==================================================
+# Shared Session
+# ==================================================
+
+_session_lock = threading.Lock()
+_session: Optional[requests.Session] = None
+_config = {
+    "user_agent": DEFAULT_USER_AGENT,
+    "verify": False,
+    "pool_connections": DEFAULT_POOL_CONNECTIONS,
+    "pool_maxsize": DEFAULT_POOL_MAXSIZE,
+    "keep_alive": True,
+}
+
+
+def configure_http(
+    user_agent: str = DEFAULT_USER_AGENT,
+    verify: bool = False,
+    pool_connections: int = DEFAULT_POOL_CONNECTIONS,
+    pool_maxsize: int = DEFAULT_POOL_MAXSIZE,
+    keep_alive: bool = True,
+) -> None:
+    """
+    Sets transport options for the shared session.
+    Any existing session is closed and rebuilt on next use.
+    """
+    global _session
+
+    with _session_lock:
+        _config.update(
+            user_agent=user_agent,
+            verify=verify,
+            pool_connections=pool_connections,
+            pool_maxsize=pool_maxsize,
+            keep_alive=keep_alive,
+        )
+        if _session is not None:
+            _session.close()
+            _session = None
+
+
+def _build_session() -> requests.Session:
+    session = requests.Session()
+    session.verify = _config["verify"]
+    session.headers["User-Agent"] = _config["user_agent"]
+    if not _config["keep_alive"]:
+        session.headers["Connection"] = "close"
+
+    adapter = _PooledAdapter(
+        pool_connections=_config["pool_connections"],
+        pool_maxsize=_config["pool_maxsize"],
+    )
+    session.mount("http://", adapter)
+    session.mount("https://", adapter)
+
+    session.hooks["response"].append(lambda r, *a, **kw: _count("requests"))
+    return session
+
+
+def get_session() -> requests.Session:
+    """
+    Returns the process-wide pooled session (thread-safe to share).
+    """
+    global _session
+
+    if _session is None:
+        with _session_lock:
+            if _session is None:
+                _session = _build_session()
+    return _session
+
+
+def close_session() -> None:
+    global _session
+
+    with _session_lock:
+        if _session is not None:
+            _session.close()
+            _session = None
+
+
+# ==================================================
+# Statistics
+# ==================================================
+
+def connection_stats() -> Dict[str, int]:
+    """
+    Reports how many requests were served by reused connections.
+    """
+    with _stats_lock:
+        total = _stats["requests"]
+        new = _stats["new_connections"]
+
+    return {
+        "requests": total,
+        "new_connections": new,
+        "reused_connections": max(total - new, 0),
+    }
+
+
+def reset_connection_stats() -> None:
+    with _stats_lock:
+        for k in _stats:
+            _stats[k] = 0
@@ -0,0 +1,193 @@
+import os
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+
+from json_codec import dumps_line, loads
+from jsonl_output import sidecar_path_for
+
+
+# ==================================================
+# Job Journal
+# ==================================================
+#
+# out.jsonl  ->  out.job.jsonl
+#
+#   {"job": {"urls": [...], "settings": {...}, "created_at": ...}}
+#   {"shard": {...manifest entry...}, "urls": [{"url", "status", "end", "reason"?}, ...]}
+#   ...
+#   {"complete": true}
+#
+# One line is appended (and fsynced) each time an output shard has been
+# renamed into place. It lists the URLs whose records all lie in the
+# shards committed so far ("end" = records written up to and including
+# that URL). A URL whose records straddle the last committed shard is
+# still pending; on resume its first records are skipped.
+
+JOB_SUFFIX = ".job.jsonl"
+
+# Job runs are always sharded, so progress is committed shard by shard
+DEFAULT_JOB_SHARD_RECORDS = 10_000
+
+
+def job_path_for(path: Path) -> Path:
+    return sidecar_path_for(path, JOB_SUFFIX)
+
+
+class JobError(Exception):
+    pass
+
+
+class JobManifest:
+    """
+    Per-URL status of one CLI job (pending / done / failed with reason),
+    kept in an append-only journal next to the output.
+
+    - start(urls, settings): new job, replacing any earlier journal;
+      progress is keyed by URL, so repeated URLs are kept once
+    - load(): reopen an interrupted job; a torn final line is dropped
+      and unreadable lines before it are skipped
+    - url_finished(): called as each URL's records have been handed to
+      the writer; entries are committed when their shard is
+    - shard_closed(): ShardedJsonlWriter on_shard callback
+    """
+
+    def __init__(self, output_path: Path):
+        self.output_path = Path(output_path)
+        self.path = job_path_for(self.output_path)
+
+        self.urls: List[str] = []
+        self.settings: Dict = {}
+        self.shards: List[Dict] = []
+        self.completed: Dict[str, Dict] = {}
+        self.complete = False
+
+        self._uncommitted: List[Dict] = []
+        self._file = None
+
+    # ----------------------------
+    # Open / Load
+    # ----------------------------
+
+    def start(self, urls: List[str], settings: Dict) -> None:
+        self.urls = list(dict.fromkeys(urls))
+        self.settings = dict(settings)
+        self._file = open(self.path, "wb")
+        self._append({
+            "job": {
+                "urls": self.urls,
+                "settings": self.settings,
+                "created_at": datetime.now(timezone.utc).isoformat().replace("+00:00", "Z"),
+            }
+        })
+
+    def load(self) -> None:
+        with open(self.path, "rb") as f:
+            data = f.read()
+
+        entries = []
+        valid_end = 0
+        for line in data.splitlines(keepends=True):
+            if not line.endswith(b"\n"):
+                break
+            valid_end += len(line)
+            try:
+                entries.append(loads(line))
+            except Exception:
+                continue
+
+        if not entries or "job" not in entries[0]:
+            raise JobError(f"Not a job manifest: {self.path}")
+
+        if valid_end < len(data):
+            # Drop the torn tail so new lines start on a clean boundary
+            with open(self.path, "r+b") as f:
+                f.truncate(valid_end)
+
+        self.urls = entries[0]["job"]["urls"]
+        self.settings = entries[0]["job"]["settings"]
+        for entry in entries[1:]:
+            if entry.get("complete"):
+                self.complete = True
+            if "shard" in entry:
+                self.shards.append(entry["shard"])
+            for item in entry.get("urls", []):
+                self.completed[item["url"]] = item
+
+        self._file = open(self.path, "ab")
+
+    @classmethod
+    def open(cls, output_path: Path) -> Optional["JobManifest"]:
+        job = cls(output_path)
+        if not job.path.exists():
+            return None
+        job.load()
+        return job
+
+    # ----------------------------
+    # Resume Position
+    # ----------------------------
+
+    @property
+    def records_committed(self) -> int:
+        return sum(s["records"] for s in self.shards)
+
+    def resume_point(self) -> Tuple[int, int]:
+        """
+        (records up to the last completed URL, records of the next
+        pending URL already in committed shards, to be skipped).
+        """
+        end = max((item["end"] for item in self.completed.values()), default=0)
+        return end, self.records_committed - end
+
+    def pending(self) -> List[str]:
+        return [url for url in self.urls if url not in self.completed]
+
+    def status_counts(self) -> Dict[str, int]:
+        counts = {"pending": 0, "done": 0, "failed": 0}
+        for url in self.urls:
+            item = self.completed.get(url)
+            counts[item["status"] if item else "pending"] += 1
+        return counts
+
+    # ----------------------------
+    # Progress
+    # ----------------------------
+
+    def url_finished(self, url: str, end: int, reason: Optional[str] = None) -> None:
+        item = {"url": url, "status": "failed" if reason else "done", "end": end}
+        if reason:
+            item["reason"] = reason
+        self._uncommitted.append(item)
+
+    def _commit(self, total: int) -> List[Dict]:
+        ready = [item for item in self._uncommitted if item["end"] <= total]
+        self._uncommitted = [item for item in self._uncommitted if item["end"] > total]
+        for item in ready:
+            self.completed[item["url"]] = item
+        return ready
+
+    def shard_closed(self, shard: Dict) -> None:
+        self.shards.append(shard)
+        self._append({"shard": shard, "urls": self._commit(self.records_committed)})
+
+    def finish(self) -> None:
+        """
+        Commits URLs after the last shard (e.g. ones without records)
+        and marks the job complete.
+        """
+        ready = self._commit(self.records_committed)
+        if ready:
+            self._append({"urls": ready})
+        self._append({"complete": True})
+        self.complete = True
+
+    def _append(self, entry: Dict) -> None:
+        self._file.write(dumps_line(entry))
+        self._file.flush()
+        os.fsync(self._file.fileno())
+
+    def close(self) -> None:
+        if self._file is not None:
+            self._file.close()
+            self._file = None
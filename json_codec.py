@@ -0,0 +1,164 @@
+import json
+import math
+from typing import Any, Dict, Iterable, List, Optional
+
+
+# ==================================================
+# Backends
+# ==================================================
+#
+# Every backend writes valid, compact UTF-8 JSON (no spaces after
+# separators, non-ASCII kept as-is, NaN / Infinity written as null).
+# Output is not byte-identical across backends: float formatting
+# differs (orjson 1e16, stdlib 1e+16), so one dataset should be
+# written with one backend.
+
+JSON_BACKENDS = ("orjson", "json")
+
+_std_encoder = json.JSONEncoder(ensure_ascii=False, separators=(",", ":"), allow_nan=False)
+
+
+def _finite(obj: Any) -> Any:
+    """
+    Copy of obj with non-finite floats replaced by None, as orjson does.
+    """
+    if isinstance(obj, float):
+        return obj if math.isfinite(obj) else None
+    if isinstance(obj, dict):
+        return {k: _finite(v) for k, v in obj.items()}
+    if isinstance(obj, (list, tuple)):
+        return [_finite(v) for v in obj]
+    return obj
+
+
+def _std_encode(obj: Any) -> str:
+    try:
+        return _std_encoder.encode(obj)
+    except ValueError:
+        # NaN / Infinity: the stdlib would write invalid JSON tokens
+        return _std_encoder.encode(_finite(obj))
+
+
+def _std_dumps_bytes(obj: Any) -> bytes:
+    return _std_encode(obj).encode("utf-8")
+
+
+def _std_dumps_line(obj: Any) -> bytes:
+    return (_std_encode(obj) + "\n").encode("utf-8")
+
+
+def _load_orjson():
+    import orjson
+
+    def dumps_bytes(obj: Any) -> bytes:
+        try:
+            return orjson.dumps(obj)
+        except TypeError:
+            # e.g. non-str keys or ints beyond 64 bits: defer to stdlib
+            return _std_dumps_bytes(obj)
+
+    def dumps_line(obj: Any) -> bytes:
+        try:
+            return orjson.dumps(obj, option=orjson.OPT_APPEND_NEWLINE)
+        except TypeError:
+            return _std_dumps_line(obj)
+
+    return dumps_bytes, dumps_line, orjson.loads
+
+
+_backend: Optional[str] = None
+_dumps_bytes = _std_dumps_bytes
+_dumps_line = _std_dumps_line
+_loads = json.loads
+
+
+def configure_codec(backend: Optional[str] = None) -> str:
+    """
+    Selects the JSON backend for all readers and writers.
+    None picks the fastest installed one; returns the chosen name.
+    """
+    global _backend, _dumps_bytes, _dumps_line, _loads
+
+    if backend not in (None, *JSON_BACKENDS):
+        raise ValueError(f"Unknown JSON backend: {backend}")
+
+    if backend in (None, "orjson"):
+        try:
+            _dumps_bytes, _dumps_line, _loads = _load_orjson()
+            _backend = "orjson"
+            return _backend
+        except ImportError:
+            if backend == "orjson":
+                raise
+
+    _dumps_bytes, _dumps_line, _loads = _std_dumps_bytes, _std_dumps_line, json.loads
+    _backend = "json"
+    return _backend
+
+
+def codec_name() -> str:
+    return _backend
+
+
+configure_codec()
+
+
+# ==================================================
+# Public API
+# ==================================================
+
+def dumps(obj: Any) -> str:
+    return _dumps_bytes(obj).decode("utf-8")
+
+
+def dumps_bytes(obj: Any) -> bytes:
+    return _dumps_bytes(obj)
+
+
+def dumps_line(obj: Any) -> bytes:
+    """
+    One JSONL line (UTF-8, trailing newline).
+    """
+    return _dumps_line(obj)
+
+
+def dumps_lines(records: Iterable[Dict]) -> bytes:
+    """
+    Many JSONL lines as one buffer, for a single write call.
+    """
+    return b"".join(map(_dumps_line, records))
+
+
+def loads(data) -> Any:
+    """
+    Parses str or UTF-8 bytes.
+    """
+    return _loads(data)
+
+
+def loads_lines(lines: Iterable) -> List[Any]:
+    return [_loads(line) for line in lines]
+
+
+_raw_decoder = json.JSONDecoder()
+
+
+def scan_objects(text: str) -> List[Dict]:
+    """
+    Salvages every complete top-level JSON object embedded in text
+    (e.g. a truncated or fenced array from a model), skipping the rest.
+    """
+    found = []
+    pos = text.find("{")
+
+    while pos != -1:
+        try:
+            obj, end = _raw_decoder.raw_decode(text, pos)
+        except ValueError:
+            pos = text.find("{", pos + 1)
+            continue
+        if isinstance(obj, dict):
+            found.append(obj)
+        pos = text.find("{", end)
+
+    return found
@@ -0,0 +1,443 @@
+import argparse
+import json
+import math
+import mmap
+import os
+import random
+import struct
+from pathlib import Path
+from typing import Dict, List, Optional, Sequence, Tuple, Union
+
+from compression import ChecksumFile, compress_writer, detect_codec
+from json_codec import dumps, dumps_bytes, loads
+
+
+class JsonlIndexError(Exception):
+    pass
+
+
+# ==================================================
+# Sidecar Format
+# ==================================================
+#
+# <data>.jsonl.idx
+#   header : magic, version, entry count, data file size, site_type table offset
+#   entries: one fixed-size row per line (offset, length, confidence,
+#            site_type code, text length)
+#   footer : JSON list of site_type names (code = list position)
+
+INDEX_SUFFIX = ".idx"
+PART_SUFFIX = ".part"
+
+_MAGIC = b"JIX1"
+_VERSION = 1
+_HEADER = struct.Struct("<4sHxxQQQ")
+_ENTRY = struct.Struct("<QIfHI")
+
+_NO_SITE_TYPE = 0xFFFF
+
+# (confidence or None, site_type or None, text length)
+RecordSummary = Tuple[Optional[float], Optional[str], int]
+
+
+def index_path_for(path: Path) -> Path:
+    path = Path(path)
+    return path.with_name(path.name + INDEX_SUFFIX)
+
+
+def record_summary(record: Dict) -> RecordSummary:
+    """
+    Summary columns stored in the index for one record.
+    """
+    confidence = record.get("confidence")
+    if not isinstance(confidence, (int, float)) or isinstance(confidence, bool):
+        confidence = None
+    site_type = record.get("site_type")
+    if not isinstance(site_type, str):
+        site_type = None
+    text = record.get("text")
+    return confidence, site_type, len(text) if isinstance(text, str) else 0
+
+
+# ==================================================
+# Writing
+# ==================================================
+
+class JsonlIndexWriter:
+    """
+    Collects index rows while a JSONL file is written and saves the
+    sidecar atomically on close().
+    """
+
+    def __init__(self, data_path: Path):
+        self.data_path = Path(data_path)
+        self.path = index_path_for(self.data_path)
+        self._tmp = self.path.with_name(self.path.name + ".tmp")
+        self._f = open(self._tmp, "wb")
+        self._f.write(bytes(_HEADER.size))
+        self._site_types: Dict[str, int] = {}
+        self._count = 0
+
+    def add(self, offset: int, length: int, summary: RecordSummary) -> None:
+        confidence, site_type, text_len = summary
+
+        code = _NO_SITE_TYPE
+        if site_type is not None:
+            code = self._site_types.setdefault(site_type, len(self._site_types))
+            if code >= _NO_SITE_TYPE:
+                raise JsonlIndexError("Too many distinct site_type values to index")
+
+        self._f.write(_ENTRY.pack(
+            offset,
+            length,
+            math.nan if confidence is None else confidence,
+            code,
+            text_len,
+        ))
+        self._count += 1
+
+    def close(self, data_size: int) -> None:
+        table_offset = self._f.tell()
+        self._f.write(dumps_bytes(list(self._site_types)))
+        self._f.seek(0)
+        self._f.write(_HEADER.pack(_MAGIC, _VERSION, self._count, data_size, table_offset))
+        self._f.close()
+        os.replace(self._tmp, self.path)
+
+    def abort(self) -> None:
+        self._f.close()
+        self._tmp.unlink(missing_ok=True)
+
+
+class IndexedJsonlFile:
+    """
+    Binary JSONL output that tracks byte offsets as lines are written
+    and (optionally) produces the offset index sidecar.
+
+    .gz / .zst paths are compressed on the fly; compressed files get
+    no index (offsets would not be seekable), but record count and the
+    on-disk SHA-256 are still tracked for shard manifests.
+
+    atomic=True writes to <path>.part and renames it to path (after an
+    fsync) only on a clean close.
+    """
+
+    def __init__(
+        self,
+        path: Path,
+        index: bool = True,
+        compress_level: Optional[int] = None,
+        atomic: bool = False,
+    ):
+        self.path = Path(path)
+        self.codec = detect_codec(self.path)
+        index = index and self.codec is None
+
+        self._part = self.path.with_name(self.path.name + PART_SUFFIX) if atomic else None
+        self._raw = ChecksumFile(self._part or self.path)
+        self._f = compress_writer(self._raw, self.codec, compress_level)
+        self._offset = 0
+        self.records = 0
+        self._index = JsonlIndexWriter(self.path) if index else None
+
+        if not index:
+            # Never leave a sidecar from an earlier run next to new data
+            index_path_for(self.path).unlink(missing_ok=True)
+
+    @property
+    def bytes_written(self) -> int:
+        """
+        Uncompressed bytes written so far.
+        """
+        return self._offset
+
+    @property
+    def disk_bytes(self) -> int:
+        return self._raw.bytes_written
+
+    @property
+    def sha256(self) -> str:
+        return self._raw.sha256
+
+    def write(self, line: Union[str, bytes], summary: RecordSummary) -> None:
+        """
+        line must already end with a newline.
+        """
+        data = line.encode("utf-8") if isinstance(line, str) else line
+        self._f.write(data)
+        if self._index is not None:
+            self._index.add(self._offset, len(data), summary)
+        self._offset += len(data)
+        self.records += 1
+
+    def write_batch(self, lines: List[bytes], summaries: List[RecordSummary]) -> None:
+        """
+        Writes many encoded lines with a single write call.
+        """
+        if self._index is not None:
+            offset = self._offset
+            for data, summary in zip(lines, summaries):
+                self._index.add(offset, len(data), summary)
+                offset += len(data)
+
+        data = b"".join(lines)
+        self._f.write(data)
+        self._offset += len(data)
+        self.records += len(lines)
+
+    def flush(self) -> None:
+        # Compressors are not flushed mid-stream (that would cost ratio);
+        # whatever they have emitted so far reaches disk
+        self._raw.flush()
+
+    def _close_files(self) -> None:
+        if self._f is not self._raw:
+            self._f.close()
+        self._raw.close()
+
+    def close(self) -> None:
+        if self._part is not None:
+            if self._f is not self._raw:
+                self._f.close()
+            self._raw.flush()
+            os.fsync(self._raw.fileno())
+            self._raw.close()
+            os.replace(self._part, self.path)
+        else:
+            self._close_files()
+        if self._index is not None:
+            self._index.close(self._offset)
+
+    def __enter__(self) -> "IndexedJsonlFile":
+        return self
+
+    def __exit__(self, exc_type, exc, tb) -> None:
+        if exc_type is None:
+            self.close()
+            return
+        self._close_files()
+        if self._part is not None:
+            self._part.unlink(missing_ok=True)
+        if self._index is not None:
+            self._index.abort()
+        index_path_for(self.path).unlink(missing_ok=True)
+
+
+def build_index(path: Path) -> Path:
+    """
+    Indexes an existing JSONL file (one sequential pass).
+    Unparseable lines are indexed with empty summary columns.
+    """
+    path = Path(path)
+    writer = JsonlIndexWriter(path)
+    offset = 0
+
+    try:
+        with open(path, "rb") as f:
+            for raw in f:
+                if raw.strip():
+                    try:
+                        summary = record_summary(loads(raw))
+                    except (ValueError, AttributeError):
+                        summary = (None, None, 0)
+                    writer.add(offset, len(raw), summary)
+                offset += len(raw)
+    except BaseException:
+        writer.abort()
+        raise
+
+    writer.close(offset)
+    return writer.path
+
+
+# ==================================================
+# Reading (mmap, O(1) random access)
+# ==================================================
+
+class JsonlIndex:
+    """
+    Random access to an indexed JSONL file.
+
+    - index[i] / index.raw(i): record i without scanning the file
+    - sample(k): uniform sample of k records
+    - site_type_counts(), text_length_stats(): computed from the
+      index columns only; the data file is never parsed
+    """
+
+    def __init__(self, data_path: Path):
+        self.data_path = Path(data_path)
+        self.path = index_path_for(self.data_path)
+        if not self.path.exists():
+            raise JsonlIndexError(f"No index for {self.data_path} (run: python jsonl_index.py build)")
+
+        self._index_f = open(self.path, "rb")
+        self._index = mmap.mmap(self._index_f.fileno(), 0, access=mmap.ACCESS_READ)
+
+        magic, version, count, data_size, table_offset = _HEADER.unpack_from(self._index, 0)
+        if magic != _MAGIC or version != _VERSION:
+            self.close()
+            raise JsonlIndexError(f"Not a JSONL index file: {self.path}")
+
+        if self.data_path.stat().st_size != data_size:
+            self.close()
+            raise JsonlIndexError(f"Index is stale for {self.data_path}; rebuild it")
+
+        self._count = count
+        self._table_offset = table_offset
+        self.site_types: List[str] = loads(self._index[table_offset:])
+
+        self._data_f = open(self.data_path, "rb")
+        self._data = (
+            mmap.mmap(self._data_f.fileno(), 0, access=mmap.ACCESS_READ)
+            if data_size
+            else b""
+        )
+
+    def __len__(self) -> int:
+        return self._count
+
+    def _entry(self, i: int) -> Tuple:
+        if i < 0:
+            i += self._count
+        if not 0 <= i < self._count:
+            raise IndexError("record index out of range")
+        return _ENTRY.unpack_from(self._index, _HEADER.size + i * _ENTRY.size)
+
+    def _columns(self):
+        return _ENTRY.iter_unpack(self._index[_HEADER.size:self._table_offset])
+
+    def raw(self, i: int) -> bytes:
+        offset, length = self._entry(i)[:2]
+        return self._data[offset:offset + length]
+
+    def __getitem__(self, i: int) -> Dict:
+        return loads(self.raw(i))
+
+    def summary(self, i: int) -> RecordSummary:
+        _, _, confidence, code, text_len = self._entry(i)
+        return (
+            None if math.isnan(confidence) else round(confidence, 4),
+            None if code == _NO_SITE_TYPE else self.site_types[code],
+            text_len,
+        )
+
+    def sample(self, k: int, seed: Optional[int] = None) -> List[Dict]:
+        rng = random.Random(seed)
+        picks = rng.sample(range(self._count), min(k, self._count))
+        return [self[i] for i in picks]
+
+    def site_type_counts(self) -> Dict[str, int]:
+        counts: Dict[str, int] = {}
+        for _, _, _, code, _ in self._columns():
+            name = "unknown" if code == _NO_SITE_TYPE else self.site_types[code]
+            counts[name] = counts.get(name, 0) + 1
+        return counts
+
+    def text_length_stats(self, percentiles: Sequence[int] = (50, 90, 99)) -> Dict:
+        lengths = sorted(text_len for *_, text_len in self._columns())
+        if not lengths:
+            return {"records": 0}
+
+        stats = {
+            "records": len(lengths),
+            "min": lengths[0],
+            "max": lengths[-1],
+            "mean": round(sum(lengths) / len(lengths), 1),
+        }
+        for p in percentiles:
+            # nearest-rank percentile
+            rank = max(1, math.ceil(p / 100 * len(lengths)))
+            stats[f"p{p}"] = lengths[rank - 1]
+        return stats
+
+    def confidence_stats(self) -> Dict:
+        values = [c for _, _, c, _, _ in self._columns() if not math.isnan(c)]
+        if not values:
+            return {"records_with_confidence": 0}
+        return {
+            "records_with_confidence": len(values),
+            "min": round(min(values), 4),
+            "max": round(max(values), 4),
+            "mean": round(sum(values) / len(values), 4),
+        }
+
+    def stats(self) -> Dict:
+        return {
+            "records": self._count,
+            "bytes": os.path.getsize(self.data_path),
+            "site_types": self.site_type_counts(),
+            "text_length": self.text_length_stats(),
+            "confidence": self.confidence_stats(),
+        }
+
+    def close(self) -> None:
+        if isinstance(getattr(self, "_data", None), mmap.mmap):
+            self._data.close()
+        if hasattr(self, "_data_f"):
+            self._data_f.close()
+        self._index.close()
+        self._index_f.close()
+
+    def __enter__(self) -> "JsonlIndex":
+        return self
+
+    def __exit__(self, exc_type, exc, tb) -> None:
+        self.close()
+
+
+def open_index(path: Path, build: bool = False) -> JsonlIndex:
+    """
+    Opens the index for a JSONL file, (re)building it first if it is
+    missing or stale and build=True.
+    """
+    try:
+        return JsonlIndex(path)
+    except JsonlIndexError:
+        if not build:
+            raise
+    build_index(path)
+    return JsonlIndex(path)
+
+
+# ==================================================
+# CLI
+# ==================================================
+
+def main():
+    parser = argparse.ArgumentParser(description="Random access and stats over indexed JSONL files")
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    p_build = sub.add_parser("build", help="Index an existing JSONL file")
+    p_build.add_argument("path")
+
+    p_stats = sub.add_parser("stats", help="Record counts, site types and text length percentiles")
+    p_stats.add_argument("path")
+
+    p_get = sub.add_parser("get", help="Print record(s) by position")
+    p_get.add_argument("path")
+    p_get.add_argument("positions", type=int, nargs="+")
+
+    p_sample = sub.add_parser("sample", help="Print a uniform random sample")
+    p_sample.add_argument("path")
+    p_sample.add_argument("-k", type=int, default=10)
+    p_sample.add_argument("--seed", type=int, default=None)
+
+    args = parser.parse_args()
+
+    if args.command == "build":
+        print(f"Index written: {build_index(Path(args.path))}")
+        return
+
+    with open_index(Path(args.path), build=True) as index:
+        if args.command == "stats":
+            print(json.dumps(index.stats(), indent=2, ensure_ascii=False))
+        elif args.command == "get":
+            for i in args.positions:
+                print(index.raw(i).decode("utf-8"), end="")
+        elif args.command == "sample":
+            for record in index.sample(args.k, seed=args.seed):
+                print(dumps(record))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,265 @@
+import json
+import os
+from pathlib import Path
+from typing import Callable, Dict, List, Optional, Tuple
+
+from compression import detect_codec
+from jsonl_index import IndexedJsonlFile, RecordSummary, PART_SUFFIX, index_path_for
+
+
+# ==================================================
+# Shard Naming
+# ==================================================
+#
+# out.jsonl.gz  ->  out-00000.jsonl.gz, out-00001.jsonl.gz, ...
+#                   out.manifest.json
+
+MANIFEST_SUFFIX = ".manifest.json"
+
+# Marker a record stream may yield between records: the streaming
+# writers write out whatever they have buffered before reading on
+# (e.g. at the end of each URL's records)
+FLUSH = object()
+
+
+def _split_name(path: Path) -> Tuple[str, str]:
+    name = Path(path).name
+    dot = name.find(".", 1)
+    if dot == -1:
+        return name, ""
+    return name[:dot], name[dot:]
+
+
+def shard_path(path: Path, number: int) -> Path:
+    base, suffix = _split_name(path)
+    return Path(path).with_name(f"{base}-{number:05d}{suffix}")
+
+
+def sidecar_path_for(path: Path, suffix: str) -> Path:
+    """
+    out.jsonl.gz + ".manifest.json" -> out.manifest.json
+    """
+    base, _ = _split_name(path)
+    return Path(path).with_name(base + suffix)
+
+
+def manifest_path_for(path: Path) -> Path:
+    return sidecar_path_for(path, MANIFEST_SUFFIX)
+
+
+def remove_stale_shards(path: Path, keep: int = 0) -> int:
+    """
+    Deletes the shards an earlier run's manifest lists for this output,
+    from shard number keep up (with their index sidecars and .part
+    files), e.g. left by a longer run. Files the manifest does not list
+    are never touched, even if their names look like shards.
+    Returns the number of shards removed.
+    """
+    path = Path(path)
+    manifest = read_manifest(path)
+    if manifest is None:
+        return 0
+
+    removed = 0
+    for number, entry in enumerate(manifest["shards"]):
+        shard = shard_path(path, number)
+        if number < keep or entry["path"] != shard.name:
+            continue
+        shard.unlink(missing_ok=True)
+        shard.with_name(shard.name + PART_SUFFIX).unlink(missing_ok=True)
+        index_path_for(shard).unlink(missing_ok=True)
+        removed += 1
+    return removed
+
+
+# ==================================================
+# Size-Rotated Writer
+# ==================================================
+
+class ShardedJsonlWriter:
+    """
+    Rotates output into numbered shards once a shard holds max_records
+    records or max_bytes uncompressed bytes (whichever comes first;
+    a shard may overshoot max_bytes by at most one record).
+
+    On close a manifest lists every shard with its record count, size
+    and SHA-256 of the on-disk (possibly compressed) bytes.
+
+    Each shard is written under a temporary name and renamed into
+    place once complete, so a crash never leaves a truncated shard.
+    Output of an earlier run at the same path (an unsharded file, the
+    shards and manifest it wrote beyond the ones kept) is removed on
+    start.
+    - shards: manifest entries of shards already written (resume),
+      numbering continues after them and they are kept
+    - on_shard: called with each shard's manifest entry once it is
+      in place
+    """
+
+    def __init__(
+        self,
+        path: Path,
+        max_records: Optional[int] = None,
+        max_bytes: Optional[int] = None,
+        index: bool = True,
+        compress_level: Optional[int] = None,
+        shards: Optional[List[Dict]] = None,
+        on_shard: Optional[Callable[[Dict], None]] = None,
+    ):
+        if not max_records and not max_bytes:
+            raise ValueError("Sharded output needs max_records and/or max_bytes")
+
+        self.path = Path(path)
+        self.max_records = max_records
+        self.max_bytes = max_bytes
+        self.index = index
+        self.compress_level = compress_level
+        self.on_shard = on_shard
+
+        self.shards: List[Dict] = list(shards or [])
+        self._current: Optional[IndexedJsonlFile] = None
+
+        remove_stale_shards(self.path, keep=len(self.shards))
+        if not self.shards:
+            manifest_path_for(self.path).unlink(missing_ok=True)
+        self.path.unlink(missing_ok=True)
+        index_path_for(self.path).unlink(missing_ok=True)
+
+    @property
+    def records(self) -> int:
+        done = sum(s["records"] for s in self.shards)
+        return done + (self._current.records if self._current else 0)
+
+    def _full(self) -> bool:
+        shard = self._current
+        if self.max_records and shard.records >= self.max_records:
+            return True
+        if self.max_bytes and shard.bytes_written >= self.max_bytes:
+            return True
+        return False
+
+    def _close_current(self) -> None:
+        shard = self._current
+        shard.close()
+        entry = {
+            "path": shard.path.name,
+            "records": shard.records,
+            "bytes": shard.disk_bytes,
+            "uncompressed_bytes": shard.bytes_written,
+            "sha256": shard.sha256,
+        }
+        self.shards.append(entry)
+        self._current = None
+        if self.on_shard is not None:
+            self.on_shard(entry)
+
+    def write(self, line: str, summary: RecordSummary) -> None:
+        if self._current is not None and self._full():
+            self._close_current()
+
+        if self._current is None:
+            self._current = IndexedJsonlFile(
+                shard_path(self.path, len(self.shards)),
+                index=self.index,
+                compress_level=self.compress_level,
+                atomic=True,
+            )
+
+        self._current.write(line, summary)
+
+    def write_batch(self, lines: List[bytes], summaries: List[RecordSummary]) -> None:
+        # Rotation is decided per record
+        for line, summary in zip(lines, summaries):
+            self.write(line, summary)
+
+    def flush(self) -> None:
+        if self._current is not None:
+            self._current.flush()
+
+    def close(self) -> None:
+        if self._current is not None:
+            self._close_current()
+        write_manifest(self.path, self.manifest())
+
+    def manifest(self) -> Dict:
+        return {
+            "codec": detect_codec(self.path),
+            "records": sum(s["records"] for s in self.shards),
+            "max_records": self.max_records,
+            "max_bytes": self.max_bytes,
+            "shards": self.shards,
+        }
+
+    def __enter__(self) -> "ShardedJsonlWriter":
+        return self
+
+    def __exit__(self, exc_type, exc, tb) -> None:
+        if exc_type is None:
+            self.close()
+        elif self._current is not None:
+            self._current.__exit__(exc_type, exc, tb)
+
+
+def open_jsonl_output(
+    path: Path,
+    index: bool = True,
+    shard_records: Optional[int] = None,
+    shard_bytes: Optional[int] = None,
+    compress_level: Optional[int] = None,
+    shards: Optional[List[Dict]] = None,
+    on_shard: Optional[Callable[[Dict], None]] = None,
+):
+    """
+    Single file, or size-rotated shards when a shard limit is given
+    (shards / on_shard: see ShardedJsonlWriter).
+    Compression is chosen by extension (.gz, .zst).
+    Unsharded output deletes nothing else; output_files prefers the
+    file over the manifest of an earlier sharded run.
+    """
+    if shard_records or shard_bytes:
+        return ShardedJsonlWriter(
+            path,
+            max_records=shard_records,
+            max_bytes=shard_bytes,
+            index=index,
+            compress_level=compress_level,
+            shards=shards,
+            on_shard=on_shard,
+        )
+
+    return IndexedJsonlFile(path, index=index, compress_level=compress_level)
+
+
+# ==================================================
+# Manifest
+# ==================================================
+
+def write_manifest(path: Path, manifest: Dict) -> Path:
+    target = manifest_path_for(path)
+    tmp = target.with_name(target.name + ".tmp")
+    tmp.write_text(json.dumps(manifest, indent=2), encoding="utf-8")
+    os.replace(tmp, target)
+    return target
+
+
+def read_manifest(path: Path) -> Optional[Dict]:
+    target = manifest_path_for(path)
+    if not target.exists():
+        return None
+    return json.loads(target.read_text(encoding="utf-8"))
+
+
+def output_files(path: Path) -> List[Path]:
+    """
+    Data files behind an output path: the file itself, or the shards
+    listed in its manifest when it was written sharded (sharded writers
+    remove the file, so it is never stale).
+    """
+    path = Path(path)
+    if path.exists():
+        return [path]
+
+    manifest = read_manifest(path)
+    if manifest is None:
+        return [path]
+    return [path.with_name(s["path"]) for s in manifest["shards"]]
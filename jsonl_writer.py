@@ -1,7 +1,9 @@
 # print("✅ jsonl_writer.py loaded from:", __file__)
-import json
 from datetime import datetime
-from typing import List, Dict, Optional
+from typing import Callable, Dict, Iterable, List, Optional
+from jsonl_index import record_summary
+from json_codec import dumps_line
+from jsonl_output import open_jsonl_output, FLUSH
 
 # ----------------------------
 # LOCKED JSONL SCHEMA
@@ -54,14 +56,71 @@ def build_record(
     return record
 
 
-def write_jsonl(records: List[Dict], output_path: str) -> None:
+DEFAULT_FLUSH_EVERY = 100
+
+
+def write_jsonl(records: List[Dict], output_path: str, **output_options) -> None:
     if not records:
         raise ValueError("No records provided")
 
-    with open(output_path, "w", encoding="utf-8") as f:
+    stream_jsonl(records, output_path, **output_options)
+
+
+def stream_jsonl(
+    records: Iterable[Dict],
+    output_path: str,
+    flush_every: int = DEFAULT_FLUSH_EVERY,
+    index: bool = True,
+    shard_records: Optional[int] = None,
+    shard_bytes: Optional[int] = None,
+    shards: Optional[List[Dict]] = None,
+    on_shard: Optional[Callable[[Dict], None]] = None,
+) -> int:
+    """
+    Schema-enforced streaming writer: validates and encodes each record
+    as it arrives; every flush_every records, and wherever the stream
+    yields jsonl_output.FLUSH, buffered records are written with a
+    single write call and flushed.
+
+    - .gz / .zst output paths are compressed on the fly
+    - shard_records / shard_bytes rotate output into numbered shards
+      with a manifest (see jsonl_output); shards / on_shard resume
+      after and report completed shards (see ShardedJsonlWriter)
+    - index=True writes an offset index sidecar (<output>.idx) for
+      uncompressed files
+    Returns the number of records written.
+    """
+    written = 0
+    lines, summaries = [], []
+
+    with open_jsonl_output(
+        output_path,
+        index=index,
+        shard_records=shard_records,
+        shard_bytes=shard_bytes,
+        shards=shards,
+        on_shard=on_shard,
+    ) as f:
         for record in records:
+            if record is FLUSH:
+                if lines:
+                    f.write_batch(lines, summaries)
+                    lines, summaries = [], []
+                f.flush()
+                continue
             validate_record(record)
-            f.write(json.dumps(record, ensure_ascii=False) + "\n")
+            lines.append(dumps_line(record))
+            summaries.append(record_summary(record))
+            written += 1
+            if len(lines) >= flush_every:
+                f.write_batch(lines, summaries)
+                f.flush()
+                lines, summaries = [], []
+
+        if lines:
+            f.write_batch(lines, summaries)
+
+    return written
 
 
 def build_fallback_record(
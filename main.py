@@ -1,7 +1,46 @@
 import argparse
+from datetime import datetime, timezone
 from pathlib import Path
-from extractor import extract_urls
-from jsonl_writer import write_jsonl
+from pipeline import run_pipeline
+from jsonl_index import index_path_for
+from jsonl_output import manifest_path_for
+from qa_generator import configure_qa, configure_qa_cache, qa_stats, DEFAULT_QA_BUDGET
+from cleaner import CleaningEngine
+from scheduler import DEFAULT_MAX_WORKERS, DEFAULT_PER_HOST_LIMIT
+from crawler import (
+    DEFAULT_MAX_PAGES,
+    DEFAULT_MAX_DEPTH,
+    DEFAULT_CRAWL_DELAY,
+    DEFAULT_CRAWL_PER_HOST,
+)
+from fetcher import configure_cache, cache_stats
+from robots import RobotsCache
+from extractor import configure_strategy_selector, strategy_selector_stats, strategy_report
+from sitemaps import SitemapSource, parse_lastmod, load_last_run, load_retry, next_retry, save_last_run
+from scrape_state import ScrapeStateStore, write_tombstones
+from job_manifest import JobManifest, DEFAULT_JOB_SHARD_RECORDS, job_path_for
+from scheduler import host_key
+from browser_pool import (
+    configure_browser_pool,
+    browser_pool_stats,
+    shutdown_browser_pool,
+    DEFAULT_BROWSERS,
+    DEFAULT_CONTEXTS_PER_BROWSER,
+    DEFAULT_RECYCLE_AFTER,
+    DEFAULT_BLOCKED_DOMAINS,
+    DEFAULT_READINESS,
+    READINESS_MODES,
+)
+from http_session import (
+    configure_http,
+    connection_stats,
+    DEFAULT_USER_AGENT,
+    DEFAULT_POOL_MAXSIZE,
+)
+
+
+# Busiest domains listed in the strategy summary
+STRATEGY_REPORT_DOMAINS = 20
 
 
 #----------------------------
@@ -16,14 +55,272 @@ def parse_arg():
     parser.add_argument(
         "--urls",
         nargs="+",
-        required=True,
-        help="One or more URLs to extract data from"
+        default=[],
+        help="One or more URLs to extract data from (crawl seeds with --crawl)"
+    )
+
+    parser.add_argument(
+        "--sitemap",
+        nargs="+",
+        default=[],
+        help="Sitemap URLs (.xml, .xml.gz or index) or site roots whose robots.txt lists them"
+    )
+
+    parser.add_argument(
+        "--since",
+        default=None,
+        help="Only sitemap entries with lastmod at or after this ISO date/time"
+    )
+
+    parser.add_argument(
+        "--sitemap-state",
+        default=None,
+        help="JSON file remembering the last run; sitemap entries unchanged since then are skipped"
+    )
+
+    parser.add_argument(
+        "--ignore-robots",
+        action="store_true",
+        help="Do not apply robots.txt to sitemap URLs or crawled links"
+    )
+
+    parser.add_argument(
+        "--crawl",
+        action="store_true",
+        help="Follow same-site links from the given URLs"
+    )
+
+    parser.add_argument(
+        "--max-pages",
+        type=int,
+        default=DEFAULT_MAX_PAGES,
+        help=f"Crawl page budget, seeds included (default: {DEFAULT_MAX_PAGES})"
+    )
+
+    parser.add_argument(
+        "--max-depth",
+        type=int,
+        default=DEFAULT_MAX_DEPTH,
+        help=f"Link hops followed from a seed (default: {DEFAULT_MAX_DEPTH})"
+    )
+
+    parser.add_argument(
+        "--crawl-delay",
+        type=float,
+        default=DEFAULT_CRAWL_DELAY,
+        help=f"Seconds between requests to the same domain while crawling (default: {DEFAULT_CRAWL_DELAY})"
+    )
+
+    parser.add_argument(
+        "--allow-offsite",
+        action="store_true",
+        help="Also follow links to other sites while crawling"
+    )
+
+    parser.add_argument(
+        "--adaptive-strategy",
+        action="store_true",
+        help=(
+            "Learn per domain which extraction strategy works and start with the cheapest "
+            "one that has reached the minimum text length (implied by --strategy-dir)"
+        )
+    )
+
+    parser.add_argument(
+        "--strategy-dir",
+        default=None,
+        help="Directory persisting per-domain strategy outcomes across runs"
+    )
+
+    parser.add_argument(
+        "--state-dir",
+        default=None,
+        help=(
+            "Directory for the per-URL content-hash store: only new or changed pages are "
+            "written, and pages that disappeared go to <output>.tombstones.jsonl"
+        )
     )
 
     parser.add_argument(
         "--output",
         default="output.jsonl",
-        help="Path to output JSONL file (default: output.jsonl)"
+        help="Path to output JSONL file; .gz / .zst compress it (default: output.jsonl)"
+    )
+
+    parser.add_argument(
+        "--shard-records",
+        type=int,
+        default=None,
+        help="Rotate output into numbered shards of at most N records"
+    )
+
+    parser.add_argument(
+        "--shard-mb",
+        type=int,
+        default=None,
+        help="Rotate output into numbered shards of about N MB (uncompressed)"
+    )
+
+    parser.add_argument(
+        "--resume",
+        action="store_true",
+        help=(
+            f"Checkpoint the run in <output>.job.jsonl and continue an interrupted one: "
+            f"completed URLs are skipped and output is appended in atomically written shards "
+            f"(default: {DEFAULT_JOB_SHARD_RECORDS} records each)"
+        )
+    )
+
+    parser.add_argument(
+        "--clean",
+        action="store_true",
+        help="Drop boilerplate and low-quality chunks before writing"
+    )
+
+    parser.add_argument(
+        "--clean-rules",
+        default=None,
+        help="Custom cleaning rule file (.json or one regex per line); implies --clean"
+    )
+
+    parser.add_argument(
+        "--workers",
+        type=int,
+        default=DEFAULT_MAX_WORKERS,
+        help=f"Maximum URLs fetched concurrently (default: {DEFAULT_MAX_WORKERS})"
+    )
+
+    parser.add_argument(
+        "--per-host",
+        type=int,
+        default=None,
+        help=(
+            f"Maximum concurrent requests per host "
+            f"(default: {DEFAULT_PER_HOST_LIMIT}, or {DEFAULT_CRAWL_PER_HOST} with --crawl)"
+        )
+    )
+
+    parser.add_argument(
+        "--unordered",
+        action="store_true",
+        help="Write records as URLs complete instead of in input order"
+    )
+
+    parser.add_argument(
+        "--parse-workers",
+        type=int,
+        default=0,
+        help="Processes for HTML parsing and chunking; 0 parses on the fetch threads (default: 0)"
+    )
+
+    parser.add_argument(
+        "--user-agent",
+        default=DEFAULT_USER_AGENT,
+        help="User-Agent header sent with every request"
+    )
+
+    parser.add_argument(
+        "--verify-ssl",
+        action="store_true",
+        help="Verify TLS certificates (disabled by default)"
+    )
+
+    parser.add_argument(
+        "--pool-size",
+        type=int,
+        default=DEFAULT_POOL_MAXSIZE,
+        help=f"Keep-alive connections kept per host (default: {DEFAULT_POOL_MAXSIZE})"
+    )
+
+    parser.add_argument(
+        "--no-keep-alive",
+        action="store_true",
+        help="Close connections after each request"
+    )
+
+    parser.add_argument(
+        "--cache-dir",
+        default=None,
+        help="Directory for the persistent HTTP response cache (disabled if omitted)"
+    )
+
+    parser.add_argument(
+        "--cache-max-mb",
+        type=int,
+        default=1024,
+        help="Cache size limit in MB; least recently used pages are evicted (default: 1024)"
+    )
+
+    parser.add_argument(
+        "--cache-only",
+        action="store_true",
+        help="Offline mode: serve pages from the cache only, never hit the network"
+    )
+
+    parser.add_argument(
+        "--qa-output",
+        default=None,
+        help="Also generate chatbot Q/A pairs from the written records, streamed to this JSONL file"
+    )
+
+    parser.add_argument(
+        "--qa-budget",
+        type=int,
+        default=DEFAULT_QA_BUDGET,
+        help=f"Chunks sent for Q/A generation; 0 = no limit (default: {DEFAULT_QA_BUDGET})"
+    )
+
+    parser.add_argument(
+        "--qa-cache-dir",
+        default=None,
+        help="Directory for the persistent Q/A completion cache, shared across runs (disabled if omitted)"
+    )
+
+    parser.add_argument(
+        "--qa-checkpoint",
+        default=None,
+        help="Q/A checkpoint file; rerunning with the same file only requests the chunks still missing"
+    )
+
+    parser.add_argument(
+        "--browsers",
+        type=int,
+        default=DEFAULT_BROWSERS,
+        help=f"Chromium instances kept alive for JS pages (default: {DEFAULT_BROWSERS})"
+    )
+
+    parser.add_argument(
+        "--contexts",
+        type=int,
+        default=DEFAULT_CONTEXTS_PER_BROWSER,
+        help=f"Browser contexts per Chromium instance (default: {DEFAULT_CONTEXTS_PER_BROWSER})"
+    )
+
+    parser.add_argument(
+        "--recycle-after",
+        type=int,
+        default=DEFAULT_RECYCLE_AFTER,
+        help=f"Pages rendered before a context is recycled (default: {DEFAULT_RECYCLE_AFTER})"
+    )
+
+    parser.add_argument(
+        "--block-domains",
+        nargs="*",
+        default=list(DEFAULT_BLOCKED_DOMAINS),
+        help="Third-party domains aborted during JS rendering (default: common ad/tracker hosts)"
+    )
+
+    parser.add_argument(
+        "--readiness",
+        choices=READINESS_MODES,
+        default=DEFAULT_READINESS,
+        help=f"When a JS page counts as ready (default: {DEFAULT_READINESS})"
+    )
+
+    parser.add_argument(
+        "--content-selector",
+        default=None,
+        help="CSS selector of the main content to wait for before reading a JS page"
     )
 
     return parser.parse_args()
@@ -36,23 +333,317 @@ def parse_arg():
 def main():
     args = parse_arg()
 
-    urls = args.urls
+    urls = list(args.urls)
     output_path = Path(args.output)
+    run_started = datetime.now(timezone.utc)
+
+    if not urls and not args.sitemap and not (args.resume and job_path_for(output_path).exists()):
+        print("Give --urls and/or --sitemap.")
+        return
+
+    if args.per_host is None:
+        args.per_host = DEFAULT_CRAWL_PER_HOST if args.crawl else DEFAULT_PER_HOST_LIMIT
+
+    job = None
+    if args.resume:
+        if args.crawl or args.unordered or args.state_dir:
+            print("--resume cannot be combined with --crawl, --unordered or --state-dir.")
+            return
+        if not args.shard_records and not args.shard_mb:
+            args.shard_records = DEFAULT_JOB_SHARD_RECORDS
+
+        job_settings = {
+            "shard_records": args.shard_records,
+            "shard_mb": args.shard_mb,
+            "clean": args.clean,
+            "clean_rules": args.clean_rules,
+        }
+        job = JobManifest.open(output_path)
+        if job is not None:
+            if job.complete:
+                print(f"Job already complete (delete {job_path_for(output_path).resolve()} to start over).")
+                return
+            if job.settings != job_settings:
+                print(f"Output settings differ from the interrupted job: {job.settings}")
+                return
+            urls = job.urls
+            print(f"Resuming job: {len(job.completed)}/{len(job.urls)} URLs already done")
+
+    configure_http(
+        user_agent=args.user_agent,
+        verify=args.verify_ssl,
+        pool_maxsize=max(args.pool_size, args.per_host),
+        keep_alive=not args.no_keep_alive,
+    )
+
+    if args.cache_only and not args.cache_dir:
+        print("--cache-only requires --cache-dir.")
+        return
+
+    configure_cache(
+        Path(args.cache_dir) if args.cache_dir else None,
+        max_bytes=args.cache_max_mb * 1024 * 1024,
+        cache_only=args.cache_only,
+    )
+
+    configure_browser_pool(
+        browsers=args.browsers,
+        contexts_per_browser=args.contexts,
+        recycle_after=args.recycle_after,
+        blocked_domains=args.block_domains,
+        readiness=args.readiness,
+        content_selector=args.content_selector,
+    )
+
+    configure_strategy_selector(
+        args.adaptive_strategy or args.strategy_dir is not None,
+        Path(args.strategy_dir) if args.strategy_dir else None,
+    )
+
+    robots = None if args.ignore_robots else RobotsCache()
+
+    state = None
+    if args.state_dir:
+        state = ScrapeStateStore(Path(args.state_dir))
+        state.begin_run()
+
+    def finish_state(sitemap_source) -> None:
+        # Only the fully read sitemaps of a site root list every live page
+        # of its host; a single sub-sitemap or a URL list does not
+        complete_hosts = set()
+        if sitemap_source is not None:
+            sm = sitemap_source.stats
+            if not sm["sitemaps_failed"] and not sm["sitemaps_skipped"]:
+                complete_hosts = {host_key(ref) for ref in sitemap_source.site_roots}
+
+        tombstones = state.finish_run(complete_hosts)
+        path = write_tombstones(tombstones, output_path)
+        st = state.stats()
+        print(
+            f"Pages new: {st['new']}, changed: {st['changed']}, unchanged: {st['unchanged']}, "
+            f"failed: {st['failed']}, gone: {st['gone']}"
+        )
+        print(f"Tombstones: {len(tombstones)} ({path.resolve()})")
+        state.close()
+
+    sitemap_source = None
+    if args.sitemap and job is None:
+        since = parse_lastmod(args.since) if args.since else None
+        if since is None and args.sitemap_state:
+            since = load_last_run(Path(args.sitemap_state))
+        if since is not None:
+            print(f"Sitemap entries changed since {since.isoformat()}")
+
+        sitemap_source = SitemapSource(
+            args.sitemap,
+            since=since,
+            robots=robots,
+            on_unchanged=state.mark_listed if state is not None else None,
+        )
+        known = set(urls)
+        for u in sitemap_source:
+            if state is not None:
+                state.mark_listed(u)
+            if u not in known:
+                urls.append(u)
+
+        # URLs that failed in earlier runs are fetched again whatever their lastmod
+        retry = load_retry(Path(args.sitemap_state)) if args.sitemap_state else {}
+        if retry:
+            known = set(urls)
+            urls.extend(u for u in retry if u not in known)
+            print(f"Retrying {len(retry)} URLs that failed in earlier runs")
+
+        sm = sitemap_source.stats
+        print(
+            f"Sitemaps read: {sm['sitemaps']} (skipped unchanged: {sm['sitemaps_skipped']}, "
+            f"failed: {sm['sitemaps_failed']}); entries: {sm['entries']}, "
+            f"unchanged: {sm['unchanged']}, disallowed by robots.txt: {sm['disallowed']}"
+        )
+
+        if not urls:
+            print("No changed URLs in the sitemaps. Nothing to do.")
+            if args.sitemap_state:
+                save_last_run(Path(args.sitemap_state), run_started)
+            if state is not None:
+                finish_state(sitemap_source)
+            return
+
+    if args.resume and job is None:
+        # URL list is fixed for the job's lifetime (sitemaps are not re-read)
+        job = JobManifest(output_path)
+        job.start(urls, job_settings)
+        urls = job.urls
 
     print("Starting extraction...")
     print(f"URLs: {len(urls)}")
 
-    records = extract_urls(urls)
+    cleaning_engine = None
+    if args.clean_rules:
+        cleaning_engine = CleaningEngine.from_file(Path(args.clean_rules))
+
+    def report_progress(done: int, total: int, url: str) -> None:
+        print(f"[{done}/{total}] {url}")
+
+    if args.crawl:
+        # Crawl pages arrive in completion order and parse on the fetch threads
+        extract_options = {
+            "max_workers": args.workers,
+            "crawl": {
+                "max_pages": args.max_pages,
+                "max_depth": args.max_depth,
+                "crawl_delay": args.crawl_delay,
+                "per_host_limit": args.per_host,
+                "same_site": not args.allow_offsite,
+                "robots": robots,
+            },
+        }
+    else:
+        extract_options = {
+            "max_workers": args.workers,
+            "per_host_limit": args.per_host,
+            "ordered": not args.unordered,
+            "parse_workers": args.parse_workers,
+        }
+
+    if state is not None:
+        extract_options["state"] = state
+    if job is not None:
+        extract_options["job"] = job
+
+    if args.qa_output:
+        configure_qa()
+        configure_qa_cache(Path(args.qa_cache_dir) if args.qa_cache_dir else None)
+        extract_options["qa_output_path"] = Path(args.qa_output)
+        extract_options["qa_options"] = {
+            "max_items": args.qa_budget or None,
+            "checkpoint_path": Path(args.qa_checkpoint) if args.qa_checkpoint else None,
+        }
+
+    try:
+        stats = run_pipeline(
+            urls,
+            output_path,
+            progress=report_progress,
+            clean=args.clean or cleaning_engine is not None,
+            cleaning_engine=cleaning_engine,
+            shard_records=args.shard_records,
+            shard_bytes=args.shard_mb * 1024 * 1024 if args.shard_mb else None,
+            **extract_options,
+        )
+        bstats = browser_pool_stats()
+    finally:
+        shutdown_browser_pool()
+        if job is not None:
+            job.close()
+        if args.qa_output:
+            configure_qa_cache(None)
+
+    if sitemap_source is not None and args.sitemap_state:
+        # Failed URLs are kept for retry; lastmod filtering would skip them
+        retry = next_retry(retry, stats["failed_urls"])
+        save_last_run(Path(args.sitemap_state), run_started, retry)
+        if retry:
+            print(f"URLs to retry next run: {len(retry)}")
+
+    if state is not None:
+        finish_state(sitemap_source)
 
-    if not records:
-        print("No records produced. Exiting.")
+    if not stats["written_records"]:
+        output_path.unlink(missing_ok=True)
+        index_path_for(output_path).unlink(missing_ok=True)
+        manifest_path_for(output_path).unlink(missing_ok=True)
+        print("No changed pages." if state is not None else "No records produced. Exiting.")
         return
-    
-    write_jsonl(records, output_path)
 
     print(f"Extraction complete.")
-    print(f"Total JSONL records written: {len(records)}")
-    print(f"Output file: {output_path.resolve()}")
+    print(f"Total JSONL records written: {stats['written_records']}")
+    if args.shard_records or args.shard_mb:
+        print(f"Shard manifest: {manifest_path_for(output_path).resolve()}")
+    else:
+        print(f"Output file: {output_path.resolve()}")
+
+    if "job" in stats:
+        counts = stats["job"]
+        print(
+            f"Job URLs done: {counts['done']}, failed: {counts['failed']}, "
+            f"pending: {counts['pending']} ({job_path_for(output_path).resolve()})"
+        )
+
+    if "qa_records" in stats:
+        qstats = qa_stats()
+        print(f"Q/A pairs written: {stats['qa_records']} ({Path(args.qa_output).resolve()})")
+        print(
+            f"Q/A requests: {qstats['requests']} (cache hits: {qstats['cache_hits']}, "
+            f"checkpoint hits: {qstats['checkpoint_hits']}, failed: {qstats['failed']})"
+        )
+
+    if "crawl" in stats:
+        crawl = stats["crawl"]
+        print(
+            f"Crawled {crawl['pages']} pages "
+            f"(discovered: {crawl['discovered']}, still queued: {crawl['pending']}, "
+            f"duplicate links: {crawl['duplicates']}, off-site links: {crawl['off_site']})"
+        )
+
+    if "cleaning" in stats:
+        cleaning = stats["cleaning"]
+        print(
+            f"Cleaning kept {cleaning['kept']}/{cleaning['seen']} chunks "
+            f"(boilerplate: {cleaning['dropped_boilerplate']}, "
+            f"too short: {cleaning['dropped_too_short']}, "
+            f"low alpha ratio: {cleaning['dropped_low_alpha_ratio']})"
+        )
+        for rule, hits in cleaning["rule_hits"].items():
+            if hits:
+                print(f"  {rule}: {hits}")
+
+    sstats = strategy_selector_stats()
+    if sstats:
+        first = ", ".join(f"{k}: {v}" for k, v in sstats["first_strategy"].items())
+        print(
+            f"Strategy decisions: learned {sstats['learned']}, explore {sstats['explore']}, "
+            f"heuristic {sstats['heuristic']}, best effort {sstats['best_effort']}; "
+            f"escalated: {sstats['escalations']} (first strategy - {first})"
+        )
+        report = sorted(
+            strategy_report().items(),
+            key=lambda item: -sum(s["attempts"] for s in item[1].values()),
+        )
+        for domain, strategies in report[:STRATEGY_REPORT_DOMAINS]:
+            row = ", ".join(
+                f"{name} {s['success_rate']:.0%} of {s['attempts']} "
+                f"(~{s['avg_chars']} chars, {s['avg_ms']} ms)"
+                for name, s in strategies.items()
+            )
+            print(f"  {domain}: {row}")
+        if len(report) > STRATEGY_REPORT_DOMAINS:
+            print(f"  ... and {len(report) - STRATEGY_REPORT_DOMAINS} more domains")
+
+    hstats = connection_stats()
+    print(
+        f"HTTP requests: {hstats['requests']} "
+        f"(new connections: {hstats['new_connections']}, "
+        f"reused: {hstats['reused_connections']})"
+    )
+
+    if args.cache_dir:
+        cstats = cache_stats()
+        print(
+            f"Cache hits: {cstats['hits']}, misses: {cstats['misses']}, "
+            f"revalidated: {cstats['revalidated']}, evicted: {cstats['evicted']}"
+        )
+
+    if bstats:
+        print(
+            f"Browser pages rendered: {bstats['pages_rendered']} "
+            f"({bstats['pages_per_sec']} pages/sec, "
+            f"avg render: {bstats['avg_render_ms']} ms, "
+            f"blocked requests: {bstats['requests_blocked']}, "
+            f"recycled contexts: {bstats['contexts_recycled']}, "
+            f"browser relaunches: {bstats['browser_relaunches']}, "
+            f"peak browser RSS: {bstats['peak_browser_rss_mb']} MB)"
+        )
 
 if __name__ == "__main__":
     main()
\ No newline at end of file
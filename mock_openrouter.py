@@ -0,0 +1,182 @@
+import argparse
+import json
+import random
+import re
+import threading
+import time
+from collections import deque
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Dict
+
+
+# ==================================================
+# Mock OpenRouter-compatible Chat Completions Server
+# ==================================================
+#
+# For exercising the Q/A client offline:
+#   python mock_openrouter.py --port 8099 --rpm 30 --fail-rate 0.05
+#   OPENROUTER_API_URL=http://127.0.0.1:8099/api/v1/chat/completions \
+#   OPENROUTER_API_KEY=test python ...
+
+DEFAULT_PORT = 8099
+
+
+class MockState:
+    def __init__(self, rpm: int, fail_rate: float, latency: float, drop_rate: float = 0.0):
+        self.rpm = rpm
+        self.fail_rate = fail_rate
+        self.latency = latency
+        self.drop_rate = drop_rate
+        self.lock = threading.Lock()
+        self.recent = deque()
+        self.in_flight = 0
+        self.stats = {"requests": 0, "ok": 0, "rate_limited": 0, "failed": 0, "peak_in_flight": 0}
+
+    def admit(self) -> float:
+        """
+        Returns 0 if the request is within the RPM window, otherwise
+        the seconds until a slot frees up.
+        """
+        now = time.monotonic()
+        with self.lock:
+            self.stats["requests"] += 1
+            while self.recent and now - self.recent[0] >= 60:
+                self.recent.popleft()
+            if self.rpm and len(self.recent) >= self.rpm:
+                self.stats["rate_limited"] += 1
+                return 60 - (now - self.recent[0])
+            self.recent.append(now)
+            return 0.0
+
+
+BATCH_SECTION = re.compile(r"^### TEXT (\S+)\n", re.MULTILINE)
+
+
+def _qa(text: str) -> Dict:
+    words = text.split()
+    return {
+        "question": f"What is said about {' '.join(words[1:4])}?",
+        "answer": " ".join(words[:30]),
+    }
+
+
+def _completion(payload: Dict, drop_rate: float = 0.0) -> Dict:
+    text = payload["messages"][-1]["content"]
+
+    if "JSON array" in payload["messages"][0]["content"]:
+        # Batched prompt: one item per '### TEXT <id>' section; drop_rate
+        # omits items or blanks their answer
+        parts = BATCH_SECTION.split(text)
+        items = []
+        for item_id, body in zip(parts[1::2], parts[2::2]):
+            roll = random.random()
+            if roll < drop_rate / 2:
+                continue
+            item = {"id": item_id, **_qa(body)}
+            if roll < drop_rate:
+                item["answer"] = ""
+            items.append(item)
+        content = "```json\n" + json.dumps(items) + "\n```"
+    else:
+        content = json.dumps(_qa(text))
+    prompt_tokens = sum(len(m["content"]) for m in payload["messages"]) // 4
+    return {
+        "id": "mock",
+        "model": payload.get("model"),
+        "choices": [{"message": {"role": "assistant", "content": content}}],
+        "usage": {
+            "prompt_tokens": prompt_tokens,
+            "completion_tokens": len(content) // 4,
+            "total_tokens": prompt_tokens + len(content) // 4,
+        },
+    }
+
+
+def make_handler(state: MockState):
+    class Handler(BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"
+
+        def log_message(self, *args):
+            pass
+
+        def _send(self, status: int, body: Dict, headers: Dict = None) -> None:
+            data = json.dumps(body).encode("utf-8")
+            self.send_response(status)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(data)))
+            for k, v in (headers or {}).items():
+                self.send_header(k, v)
+            self.end_headers()
+            self.wfile.write(data)
+
+        def do_GET(self):
+            with state.lock:
+                self._send(200, dict(state.stats))
+
+        def do_POST(self):
+            length = int(self.headers.get("Content-Length", 0))
+            payload = json.loads(self.rfile.read(length))
+
+            wait = state.admit()
+            if wait:
+                self._send(429, {"error": "rate limited"}, {"Retry-After": f"{wait:.2f}"})
+                return
+
+            with state.lock:
+                state.in_flight += 1
+                state.stats["peak_in_flight"] = max(state.stats["peak_in_flight"], state.in_flight)
+            try:
+                time.sleep(state.latency)
+                if random.random() < state.fail_rate:
+                    with state.lock:
+                        state.stats["failed"] += 1
+                    self._send(503, {"error": "unavailable"})
+                    return
+                with state.lock:
+                    state.stats["ok"] += 1
+                self._send(200, _completion(payload, state.drop_rate))
+            finally:
+                with state.lock:
+                    state.in_flight -= 1
+
+    return Handler
+
+
+def serve(
+    port: int = DEFAULT_PORT,
+    rpm: int = 0,
+    fail_rate: float = 0.0,
+    latency: float = 0.2,
+    drop_rate: float = 0.0,
+):
+    """
+    Starts the mock server on a background thread; returns the server
+    (call .shutdown() to stop it).
+    """
+    state = MockState(rpm, fail_rate, latency, drop_rate)
+    server = ThreadingHTTPServer(("127.0.0.1", port), make_handler(state))
+    server.state = state
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Mock OpenRouter-compatible chat completions server")
+    parser.add_argument("--port", type=int, default=DEFAULT_PORT)
+    parser.add_argument("--rpm", type=int, default=0, help="Server-side request limit per minute (0 = none)")
+    parser.add_argument("--fail-rate", type=float, default=0.0, help="Fraction of requests answered with 503")
+    parser.add_argument("--latency", type=float, default=0.2, help="Seconds per completion")
+    parser.add_argument("--drop-rate", type=float, default=0.0, help="Fraction of batched items omitted or left blank")
+    args = parser.parse_args()
+
+    server = serve(args.port, args.rpm, args.fail_rate, args.latency, args.drop_rate)
+    print(f"Mock endpoint: http://127.0.0.1:{args.port}/api/v1/chat/completions (GET for stats)")
+    try:
+        while True:
+            time.sleep(3600)
+    except KeyboardInterrupt:
+        server.shutdown()
+
+
+if __name__ == "__main__":
+    main()
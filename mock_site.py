@@ -0,0 +1,211 @@
+import argparse
+import gzip
+import json
+import threading
+import time
+from datetime import date, timedelta
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Dict, List
+
+
+# ==================================================
+# Mock Multi-Page Site (crawl fixture)
+# ==================================================
+#
+# A generated documentation-like site for exercising crawl mode offline:
+#   python mock_site.py --port 8300 --pages 200 --fanout 4
+#   python main.py --crawl --crawl-delay 0.2 --urls http://127.0.0.1:8300/
+#
+# Page n links to pages n*fanout+1 .. n*fanout+fanout (a tree), back to
+# the index, and to a few things a crawler must not follow twice or at
+# all: fragment / query-order duplicates, a PDF, mailto:, a nofollow
+# link and an off-site URL. GET /__stats returns the request log.
+#
+# /robots.txt disallows /private/ and page 7 and points to
+# /sitemap_index.xml, an index of two sitemaps (one gzipped) listing
+# every page. Page n has lastmod BASE_LASTMOD + (n % 30) days.
+
+DEFAULT_PORT = 8300
+BASE_LASTMOD = date(2026, 1, 1)
+SITEMAP_PARTS = 2
+SITEMAP_NS = "http://www.sitemaps.org/schemas/sitemap/0.9"
+
+PARAGRAPH = (
+    "This page documents one part of a small example system. It explains how "
+    "requests move through the queue, how the cache keeps results close to the "
+    "workers, and which settings operators usually change first. "
+)
+
+
+class SiteState:
+    def __init__(self, pages: int, fanout: int, latency: float, crawl_delay: float = 0.0):
+        self.pages = pages
+        self.fanout = fanout
+        self.latency = latency
+        self.crawl_delay = crawl_delay
+        self.lock = threading.Lock()
+        self.log: List[Dict] = []
+        self.in_flight = 0
+        self.peak_in_flight = 0
+
+
+def _page_html(n: int, state: SiteState) -> str:
+    children = [
+        c for c in range(n * state.fanout + 1, n * state.fanout + state.fanout + 1)
+        if c < state.pages
+    ]
+    links = "".join(f'<li><a href="/docs/page-{c}.html">Page {c}</a></li>' for c in children)
+    if children:
+        c = children[0]
+        links += (
+            f'<li><a href="/docs/page-{c}.html#details">Page {c} details</a></li>'
+            f'<li><a href="/docs/page-{c}.html?b=2&a=1">Page {c} (query)</a></li>'
+            f'<li><a href="/docs/page-{c}.html?a=1&b=2">Page {c} (same query)</a></li>'
+        )
+    body = "".join(f"<p>Section {n}.{i}. {PARAGRAPH * 2}</p>" for i in range(3))
+
+    return (
+        f"<html><head><title>Page {n}</title></head><body>"
+        f'<nav><a href="/">Home</a> <a href="mailto:docs@example.com">Mail</a>'
+        f' <a href="/files/manual.pdf">Manual</a>'
+        f' <a rel="nofollow" href="/private/page-{n}.html">Private</a>'
+        f' <a href="http://offsite.invalid/page-{n}.html">Elsewhere</a></nav>'
+        f"<article><h1>Page {n}</h1>{body}<ul>{links}</ul></article>"
+        f"</body></html>"
+    )
+
+
+def page_lastmod(n: int) -> date:
+    return BASE_LASTMOD + timedelta(days=n % 30)
+
+
+def _robots_txt(state: SiteState, origin: str) -> str:
+    lines = ["User-agent: *", "Disallow: /private/", "Disallow: /docs/page-7.html"]
+    if state.crawl_delay:
+        lines.append(f"Crawl-delay: {state.crawl_delay}")
+    lines.append(f"Sitemap: {origin}/sitemap_index.xml")
+    return "\n".join(lines) + "\n"
+
+
+def _sitemap_index(state: SiteState, origin: str) -> str:
+    entries = []
+    for part in range(SITEMAP_PARTS):
+        pages = range(part, state.pages, SITEMAP_PARTS)
+        newest = max((page_lastmod(n) for n in pages), default=BASE_LASTMOD)
+        suffix = ".xml.gz" if part == 0 else ".xml"
+        entries.append(
+            f"<sitemap><loc>{origin}/sitemaps/part-{part}{suffix}</loc>"
+            f"<lastmod>{newest.isoformat()}</lastmod></sitemap>"
+        )
+    return f'<?xml version="1.0" encoding="UTF-8"?><sitemapindex xmlns="{SITEMAP_NS}">{"".join(entries)}</sitemapindex>'
+
+
+def _sitemap_part(state: SiteState, origin: str, part: int) -> str:
+    entries = "".join(
+        f"<url><loc>{origin}/docs/page-{n}.html</loc><lastmod>{page_lastmod(n).isoformat()}</lastmod></url>"
+        for n in range(part, state.pages, SITEMAP_PARTS)
+    )
+    return f'<?xml version="1.0" encoding="UTF-8"?><urlset xmlns="{SITEMAP_NS}">{entries}</urlset>'
+
+
+def make_handler(state: SiteState):
+    class Handler(BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"
+
+        def log_message(self, *args):
+            pass
+
+        def _send(self, status: int, body: bytes, content_type: str = "text/html; charset=utf-8") -> None:
+            self.send_response(status)
+            self.send_header("Content-Type", content_type)
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def do_GET(self):
+            if self.path == "/__stats":
+                with state.lock:
+                    body = json.dumps({"requests": state.log, "peak_in_flight": state.peak_in_flight})
+                self._send(200, body.encode("utf-8"), "application/json")
+                return
+
+            origin = f"http://{self.headers.get('Host')}"
+            if self.path == "/robots.txt":
+                self._send(200, _robots_txt(state, origin).encode("utf-8"), "text/plain")
+                return
+            if self.path == "/sitemap_index.xml":
+                self._send(200, _sitemap_index(state, origin).encode("utf-8"), "application/xml")
+                return
+            if self.path.startswith("/sitemaps/part-"):
+                part = int(self.path[len("/sitemaps/part-"):].split(".", 1)[0])
+                body = _sitemap_part(state, origin, part).encode("utf-8")
+                if self.path.endswith(".gz"):
+                    self._send(200, gzip.compress(body), "application/x-gzip")
+                else:
+                    self._send(200, body, "application/xml")
+                return
+
+            with state.lock:
+                state.log.append({"path": self.path, "at": time.monotonic()})
+                state.in_flight += 1
+                state.peak_in_flight = max(state.peak_in_flight, state.in_flight)
+            try:
+                time.sleep(state.latency)
+                path = self.path.split("?", 1)[0]
+                if path in ("/", "/index.html"):
+                    n = 0
+                elif path.startswith("/docs/page-") and path.endswith(".html"):
+                    n = int(path[len("/docs/page-"):-len(".html")])
+                else:
+                    self._send(404, b"not found", "text/plain")
+                    return
+                if n >= state.pages:
+                    self._send(404, b"not found", "text/plain")
+                    return
+                self._send(200, _page_html(n, state).encode("utf-8"))
+            finally:
+                with state.lock:
+                    state.in_flight -= 1
+
+    return Handler
+
+
+def serve(
+    port: int = DEFAULT_PORT,
+    pages: int = 50,
+    fanout: int = 4,
+    latency: float = 0.05,
+    crawl_delay: float = 0.0,
+):
+    """
+    Starts the site on a background thread; returns the server
+    (server.state.log lists every page request; .shutdown() stops it).
+    crawl_delay adds a Crawl-delay line to robots.txt.
+    """
+    state = SiteState(pages, fanout, latency, crawl_delay)
+    server = ThreadingHTTPServer(("127.0.0.1", port), make_handler(state))
+    server.state = state
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Mock multi-page site for crawl testing")
+    parser.add_argument("--port", type=int, default=DEFAULT_PORT)
+    parser.add_argument("--pages", type=int, default=50, help="Pages in the site")
+    parser.add_argument("--fanout", type=int, default=4, help="Child links per page")
+    parser.add_argument("--latency", type=float, default=0.05, help="Seconds per response")
+    parser.add_argument("--crawl-delay", type=float, default=0.0, help="Crawl-delay advertised in robots.txt")
+    args = parser.parse_args()
+
+    server = serve(args.port, args.pages, args.fanout, args.latency, args.crawl_delay)
+    print(f"Mock site: http://127.0.0.1:{args.port}/ (GET /__stats for the request log)")
+    try:
+        while True:
+            time.sleep(3600)
+    except KeyboardInterrupt:
+        server.shutdown()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,216 @@
+import zlib
+import numpy as np
+from typing import Dict, List, Optional, Tuple
+
+
+# ==================================================
+# MinHash / LSH Defaults
+# ==================================================
+
+DEFAULT_NUM_PERM = 128
+DEFAULT_SHINGLE_SIZE = 5          # words per shingle
+DEFAULT_JACCARD_THRESHOLD = 0.8
+
+# Universal hashing (a * x + b) mod P with P the first prime above 2**32.
+# x < 2**32 and a < 2**31 keep every intermediate inside uint64.
+_PRIME = np.uint64(4294967311)
+_MASK32 = np.uint64(0xFFFFFFFF)
+_SHINGLE_BASE = np.uint64(1000003)
+_BAND_BASE = np.uint64(0x100000001B3)
+
+# Max shingles hashed at once (bounds the num_perm x shingles matrix)
+_SHINGLES_PER_BLOCK = 32768
+
+
+# ==================================================
+# LSH Parameter Selection
+# ==================================================
+
+def _integrate(f, a: float, b: float, steps: int = 100) -> float:
+    width = (b - a) / steps
+    return sum(f(a + (i + 0.5) * width) for i in range(steps)) * width
+
+
+def optimal_lsh_params(threshold: float, num_perm: int) -> Tuple[int, int]:
+    """
+    Picks (bands, rows) minimising false positives below the threshold
+    plus false negatives above it (equal weights).
+    """
+    best, best_error = (1, num_perm), float("inf")
+
+    for bands in range(1, num_perm + 1):
+        max_rows = num_perm // bands
+        for rows in range(1, max_rows + 1):
+            def p(s, b=bands, r=rows):
+                return 1 - (1 - s ** r) ** b
+
+            fp = _integrate(p, 0.0, threshold)
+            fn = _integrate(lambda s: 1 - p(s), threshold, 1.0)
+            if fp + fn < best_error:
+                best, best_error = (bands, rows), fp + fn
+
+    return best
+
+
+# ==================================================
+# Shingling + MinHash Signatures (vectorized)
+# ==================================================
+
+def shingle_hashes(normalized: str, shingle_size: int = DEFAULT_SHINGLE_SIZE) -> np.ndarray:
+    """
+    32-bit hashes of word k-shingles. Word hashes are stable (crc32),
+    shingles are combined with a vectorized polynomial over a sliding window.
+    """
+    words = normalized.split()
+    if not words:
+        return np.zeros(1, dtype=np.uint64)
+
+    word_hashes = np.fromiter(
+        (zlib.crc32(w.encode("utf-8")) for w in words),
+        dtype=np.uint64,
+        count=len(words),
+    )
+
+    k = min(shingle_size, len(words))
+    windows = np.lib.stride_tricks.sliding_window_view(word_hashes, k)
+    powers = _SHINGLE_BASE ** np.arange(k - 1, -1, -1, dtype=np.uint64)
+
+    return (windows @ powers) & _MASK32
+
+
+class MinHasher:
+    """
+    Computes MinHash signatures for many texts at once.
+    """
+
+    def __init__(
+        self,
+        num_perm: int = DEFAULT_NUM_PERM,
+        shingle_size: int = DEFAULT_SHINGLE_SIZE,
+        seed: int = 1,
+    ):
+        rng = np.random.RandomState(seed)
+        self.num_perm = num_perm
+        self.shingle_size = shingle_size
+        self._a = rng.randint(1, 2 ** 31, size=num_perm, dtype=np.int64).astype(np.uint64)
+        self._b = rng.randint(0, 2 ** 31, size=num_perm, dtype=np.int64).astype(np.uint64)
+
+    def signatures(self, normalized_texts: List[str]) -> np.ndarray:
+        """
+        Returns a (len(texts), num_perm) uint32 signature matrix.
+        """
+        out = np.empty((len(normalized_texts), self.num_perm), dtype=np.uint32)
+        shingles = [shingle_hashes(t, self.shingle_size) for t in normalized_texts]
+
+        start = 0
+        while start < len(shingles):
+            # Group records so each block hashes a bounded number of shingles
+            end, total = start, 0
+            while end < len(shingles) and (end == start or total + len(shingles[end]) <= _SHINGLES_PER_BLOCK):
+                total += len(shingles[end])
+                end += 1
+
+            block = np.concatenate(shingles[start:end])
+            offsets = np.cumsum([0] + [len(s) for s in shingles[start:end - 1]])
+
+            hashed = (self._a[:, None] * block[None, :] + self._b[:, None]) % _PRIME
+            out[start:end] = np.minimum.reduceat(hashed, offsets, axis=1).T
+
+            start = end
+
+        return out
+
+
+# ==================================================
+# LSH Index (first occurrence wins)
+# ==================================================
+
+class NearDuplicateIndex:
+    """
+    MinHash + LSH banding index for near-duplicate detection.
+
+    Only kept (representative) records are indexed; their signatures
+    live in one growable uint32 matrix, and each band maps a 64-bit
+    band key to the first record that produced it.
+    """
+
+    def __init__(
+        self,
+        threshold: float = DEFAULT_JACCARD_THRESHOLD,
+        num_perm: int = DEFAULT_NUM_PERM,
+        shingle_size: int = DEFAULT_SHINGLE_SIZE,
+    ):
+        if not 0.0 < threshold <= 1.0:
+            raise ValueError("Jaccard threshold must be in (0, 1]")
+
+        self.threshold = threshold
+        self.hasher = MinHasher(num_perm=num_perm, shingle_size=shingle_size)
+        self.bands, self.rows = optimal_lsh_params(threshold, num_perm)
+
+        self._band_powers = _BAND_BASE ** np.arange(self.rows, dtype=np.uint64)
+        self._buckets: List[Dict[int, int]] = [{} for _ in range(self.bands)]
+        self._signatures = np.empty((1024, num_perm), dtype=np.uint32)
+        self._size = 0
+        self.cluster_sizes: Dict[int, int] = {}
+
+    def band_keys(self, signatures: np.ndarray) -> np.ndarray:
+        """
+        (n, bands) uint64 keys, one per LSH band.
+        """
+        used = signatures[:, : self.bands * self.rows].astype(np.uint64)
+        banded = used.reshape(len(signatures), self.bands, self.rows)
+        return banded @ self._band_powers
+
+    def _store(self, signature: np.ndarray) -> int:
+        if self._size == len(self._signatures):
+            grown = np.empty((self._size * 2, self._signatures.shape[1]), dtype=np.uint32)
+            grown[: self._size] = self._signatures
+            self._signatures = grown
+        self._signatures[self._size] = signature
+        self._size += 1
+        return self._size - 1
+
+    def check_and_add(self, signature: np.ndarray, keys: np.ndarray) -> Optional[int]:
+        """
+        Returns the representative id if this is a near duplicate,
+        otherwise indexes the record and returns None.
+        """
+        candidates = set()
+        for band, key in enumerate(keys.tolist()):
+            rep = self._buckets[band].get(key)
+            if rep is not None:
+                candidates.add(rep)
+
+        for rep in sorted(candidates):
+            similarity = float(np.mean(self._signatures[rep] == signature))
+            if similarity >= self.threshold:
+                self.cluster_sizes[rep] = self.cluster_sizes.get(rep, 1) + 1
+                return rep
+
+        rep = self._store(signature)
+        for band, key in enumerate(keys.tolist()):
+            self._buckets[band].setdefault(key, rep)
+        return None
+
+    def add_batch(self, normalized_texts: List[str]) -> List[Optional[int]]:
+        """
+        Signatures are computed for the whole batch, decisions are
+        made in order so earlier records win.
+        """
+        if not normalized_texts:
+            return []
+        signatures = self.hasher.signatures(normalized_texts)
+        keys = self.band_keys(signatures)
+        return [
+            self.check_and_add(signatures[i], keys[i])
+            for i in range(len(normalized_texts))
+        ]
+
+    def stats(self) -> Dict[str, int]:
+        sizes = self.cluster_sizes.values()
+        return {
+            "near_duplicate_clusters": len(self.cluster_sizes),
+            "largest_near_duplicate_cluster": max(sizes, default=0),
+            "lsh_bands": self.bands,
+            "lsh_rows": self.rows,
+        }
@@ -0,0 +1,279 @@
+import queue
+import threading
+import time
+from pathlib import Path
+from typing import Callable, Dict, Iterable, Iterator, List, Optional
+
+from extractor import iter_extract_urls
+from crawler import Crawler
+from cleaner import CleaningEngine
+from export_profiles import iter_export_profile
+from export_writer import stream_export_jsonl
+from jsonl_writer import stream_jsonl, DEFAULT_FLUSH_EVERY
+from jsonl_output import output_files, FLUSH
+from job_manifest import JobManifest, JobError
+from compression import open_text
+from json_codec import loads
+from qa_generator import iter_qa_records, stream_qa_jsonl
+
+
+# progress(urls_done, urls_total, url) is called after each URL's
+# records have been written.
+ProgressCallback = Callable[[int, int, str], None]
+
+# Records the Q/A stage may lag behind the writer before extraction waits
+DEFAULT_QA_QUEUE_SIZE = 1024
+
+FALLBACK_REASON_MARKER = " Reason: "
+
+
+def _failure_reason(records: List[Dict]) -> Optional[str]:
+    """
+    Reason of the fallback record a failed URL produced (None if the
+    URL was extracted).
+    """
+    for record in records:
+        if record.get("extraction_strategy") == "fallback":
+            text = record.get("text", "")
+            _, _, reason = text.partition(FALLBACK_REASON_MARKER)
+            return reason or text
+    return None
+
+
+# ==================================================
+# Q/A Stage (consumer thread)
+# ==================================================
+
+_DONE = object()
+
+
+class _QAStage:
+    """
+    Generates Q/A pairs on a background thread from records handed over
+    by the writer stage, so Q/A requests overlap with page fetches.
+
+    The queue is bounded: extraction only waits when Q/A falls
+    queue_size records behind. Once the Q/A budget is spent the
+    remaining records are drained and ignored.
+    """
+
+    def __init__(self, output_path: Path, qa_options: Dict, queue_size: int):
+        self.output_path = output_path
+        self.qa_options = qa_options
+        self.queue = queue.Queue(maxsize=queue_size)
+        self.written = 0
+        self.error: Optional[BaseException] = None
+        self.thread = threading.Thread(target=self._run, name="qa-stage", daemon=True)
+        self.thread.start()
+
+    def _records(self) -> Iterator[Dict]:
+        while True:
+            record = self.queue.get()
+            if record is _DONE:
+                return
+            yield record
+
+    def _run(self) -> None:
+        records = self._records()
+        try:
+            self.written = stream_qa_jsonl(
+                iter_qa_records(records, **self.qa_options),
+                self.output_path,
+            )
+        except BaseException as e:
+            self.error = e
+        finally:
+            # Keep the producer from blocking on a full queue
+            for _ in records:
+                pass
+
+    def put(self, record: Dict) -> None:
+        self.queue.put(record)
+
+    def close(self) -> None:
+        self.queue.put(_DONE)
+        self.thread.join()
+
+    def result(self) -> int:
+        if self.error is not None:
+            raise self.error
+        return self.written
+
+
+# ==================================================
+# Streaming Pipeline (extract -> clean -> profile -> write)
+# ==================================================
+
+def run_pipeline(
+    urls: List[str],
+    output_path: Path,
+    clean: bool = False,
+    cleaning_engine: Optional[CleaningEngine] = None,
+    profile: Optional[str] = None,
+    progress: Optional[ProgressCallback] = None,
+    flush_every: int = DEFAULT_FLUSH_EVERY,
+    preview: int = 0,
+    shard_records: Optional[int] = None,
+    shard_bytes: Optional[int] = None,
+    qa_output_path: Optional[Path] = None,
+    qa_options: Optional[Dict] = None,
+    qa_queue_size: int = DEFAULT_QA_QUEUE_SIZE,
+    crawl: Optional[Dict] = None,
+    job: Optional[JobManifest] = None,
+    **extract_options,
+) -> Dict:
+    """
+    Streams records to output_path as each URL finishes.
+
+    Memory stays flat: only one URL's records are in flight at a time
+    (plus the extractor's bounded concurrency window).
+
+    - clean: apply cleaner rules (cleaning_engine for custom rules;
+      its drop counters end up in stats["cleaning"])
+    - profile: export profile; None keeps the internal schema
+      (validated by the schema-enforced writer)
+    - preview: keep the first N written records in stats["preview"]
+    - shard_records / shard_bytes: rotate output into numbered shards
+      (.gz / .zst output paths are compressed)
+    - qa_output_path: also generate Q/A pairs from the written records
+      while extraction is still running, streamed to this path
+      (qa_options go to qa_generator.iter_qa_records); the pair count
+      lands in stats["qa_records"], and stats["qa_wait_seconds"] is how
+      long Q/A ran on after the dataset was complete
+    - crawl: treat urls as seeds and crawl with these crawler.Crawler
+      options; urls_total grows as pages are discovered and the
+      frontier counters land in stats["crawl"]
+    - job: job_manifest.JobManifest to checkpoint into (needs ordered
+      extraction and sharded output); URLs it has completed are
+      skipped and writing continues after its committed shards, so
+      the result matches an uninterrupted run. Per-URL status counts
+      land in stats["job"]
+    - stats["failed_urls"] lists the URLs that produced a fallback
+      record (fetch or extraction failed)
+    - extract_options: forwarded to iter_extract_urls (or Crawler)
+    """
+    stats = {
+        "urls_total": len(urls),
+        "urls_done": 0,
+        "extracted_records": 0,
+        "written_records": 0,
+        "failed_urls": [],
+        "preview": [],
+    }
+
+    if clean:
+        cleaning_engine = cleaning_engine or CleaningEngine()
+
+    # Records handed to the writer so far (counted from the start of the
+    # job), and records of the first pending URL already committed
+    cursor = {"position": 0, "skip": 0}
+    if job is not None:
+        if crawl is not None or not extract_options.get("ordered", True):
+            raise JobError("Resumable jobs need ordered extraction (no crawl / unordered)")
+        if not shard_records and not shard_bytes:
+            raise JobError("Resumable jobs need sharded output")
+        cursor["position"], cursor["skip"] = job.resume_point()
+        stats["urls_done"] = len(urls) - len(job.pending())
+        urls = job.pending()
+
+    crawler = None
+    if crawl is not None:
+        crawler = Crawler(urls, **crawl, **extract_options)
+        source = iter(crawler)
+    else:
+        source = iter_extract_urls(urls, **extract_options)
+
+    def extracted() -> Iterator[Dict]:
+        for url, records in source:
+            if crawler is not None:
+                stats["urls_total"] = crawler.expected_total()
+            stats["extracted_records"] += len(records)
+            reason = _failure_reason(records)
+            if reason is not None:
+                stats["failed_urls"].append(url)
+            if clean:
+                # One cleaning batch per URL, so records reach the writer
+                # (and the Q/A stage) as soon as their page is done
+                records = cleaning_engine.clean_batch(records)
+            if profile is not None:
+                records = list(iter_export_profile(records, profile))
+            yield from records
+            # The writer writes out this URL's records before going on
+            yield FLUSH
+            if job is not None:
+                if cursor["skip"]:
+                    raise JobError(f"{url} produced fewer records than before the interruption")
+                job.url_finished(url, cursor["position"], reason)
+            stats["urls_done"] += 1
+            if progress is not None:
+                progress(stats["urls_done"], stats["urls_total"], url)
+
+    def previewed(records: Iterable[Dict]) -> Iterator[Dict]:
+        for record in records:
+            if record is FLUSH:
+                yield record
+                continue
+            cursor["position"] += 1
+            if cursor["skip"]:
+                # Already in a committed shard
+                cursor["skip"] -= 1
+                continue
+            if len(stats["preview"]) < preview:
+                stats["preview"].append(record)
+            if qa_stage is not None:
+                qa_stage.put(record)
+            yield record
+
+    writer = stream_jsonl if profile is None else stream_export_jsonl
+
+    qa_stage = None
+    if qa_output_path is not None:
+        qa_stage = _QAStage(qa_output_path, qa_options or {}, qa_queue_size)
+
+    try:
+        stats["written_records"] = writer(
+            previewed(extracted()),
+            output_path,
+            flush_every=flush_every,
+            shard_records=shard_records,
+            shard_bytes=shard_bytes,
+            shards=job.shards if job is not None else None,
+            on_shard=job.shard_closed if job is not None else None,
+        )
+        if job is not None:
+            job.finish()
+            stats["written_records"] = job.records_committed
+    finally:
+        if qa_stage is not None:
+            started = time.monotonic()
+            qa_stage.close()
+            stats["qa_wait_seconds"] = round(time.monotonic() - started, 2)
+
+    if qa_stage is not None:
+        stats["qa_records"] = qa_stage.result()
+
+    if clean:
+        stats["cleaning"] = cleaning_engine.stats
+    if crawler is not None:
+        stats["crawl"] = crawler.stats
+    if job is not None:
+        stats["job"] = job.status_counts()
+    return stats
+
+
+# ==================================================
+# Streaming Reader
+# ==================================================
+
+def iter_jsonl(path: Path) -> Iterator[Dict]:
+    """
+    Reads a JSONL file lazily, one record at a time.
+    Compressed files and sharded outputs (via their manifest) are
+    read transparently.
+    """
+    for file_path in output_files(path):
+        with open_text(file_path) as f:
+            for line in f:
+                line = line.strip()
+                if line:
+                    yield loads(line)
@@ -0,0 +1,159 @@
+import hashlib
+import sqlite3
+import threading
+import time
+from pathlib import Path
+from typing import Dict, Optional
+
+from json_codec import dumps, dumps_line, loads
+
+
+# ==================================================
+# Cache Keys
+# ==================================================
+
+QA_CACHE_DB_NAME = "qa_cache.sqlite"
+
+
+def _sha256(text: str) -> str:
+    return hashlib.sha256(text.encode("utf-8")).hexdigest()
+
+
+def qa_cache_key(model: str, system_prompt: str, temperature: float, text: str) -> str:
+    """
+    Content address of one Q/A completion: a change to the model,
+    prompt, temperature or chunk text yields a different key.
+    """
+    return _sha256(dumps([model, _sha256(system_prompt), repr(float(temperature)), _sha256(text)]))
+
+
+# ==================================================
+# On-Disk Completion Cache (SQLite)
+# ==================================================
+
+class QACache:
+    """
+    Persistent Q/A records keyed by qa_cache_key, shared across runs
+    and datasets so an already annotated chunk is never paid for twice.
+    """
+
+    def __init__(self, cache_dir: Path):
+        self.cache_dir = Path(cache_dir)
+        self.cache_dir.mkdir(parents=True, exist_ok=True)
+
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(
+            str(self.cache_dir / QA_CACHE_DB_NAME),
+            check_same_thread=False,
+        )
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS completions ("
+            " cache_key TEXT PRIMARY KEY,"
+            " model TEXT,"
+            " record TEXT,"
+            " stored_at REAL)"
+        )
+        self._conn.commit()
+
+        self.counters = {"hits": 0, "misses": 0, "stored": 0}
+
+    def get(self, key: str) -> Optional[Dict]:
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT record FROM completions WHERE cache_key = ?",
+                (key,),
+            ).fetchone()
+            self.counters["hits" if row else "misses"] += 1
+
+        return loads(row[0]) if row else None
+
+    def put(self, key: str, model: str, record: Dict) -> None:
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO completions VALUES (?,?,?,?)",
+                (key, model, dumps(record), time.time()),
+            )
+            self._conn.commit()
+            self.counters["stored"] += 1
+
+    def __len__(self) -> int:
+        with self._lock:
+            return self._conn.execute("SELECT COUNT(*) FROM completions").fetchone()[0]
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            return dict(self.counters)
+
+    def close(self) -> None:
+        with self._lock:
+            self._conn.close()
+
+
+# ==================================================
+# Resumable Job Checkpoint (append-only JSONL)
+# ==================================================
+
+class QACheckpoint:
+    """
+    Append-only log of {"key": ..., "qa": ...} lines for one Q/A job.
+
+    Every completed item is flushed as soon as it is known, so a job
+    killed halfway resumes from the last finished item. A torn final
+    line (crash mid-write) is cut off on load; an unreadable line
+    elsewhere is skipped without losing the lines after it.
+    """
+
+    def __init__(self, path: Path):
+        self.path = Path(path)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self._done: Dict[str, Dict] = {}
+        self._lock = threading.Lock()
+
+        if self.path.exists():
+            self._load()
+
+        self._file = open(self.path, "ab")
+
+    def _load(self) -> None:
+        with open(self.path, "rb") as f:
+            data = f.read()
+
+        valid_end = 0
+        for line in data.splitlines(keepends=True):
+            if not line.endswith(b"\n"):
+                break
+            valid_end += len(line)
+            try:
+                entry = loads(line)
+                self._done[entry["key"]] = entry["qa"]
+            except Exception:
+                continue
+
+        if valid_end < len(data):
+            # Drop the torn tail so new lines start on a clean boundary
+            with open(self.path, "r+b") as f:
+                f.truncate(valid_end)
+
+    def get(self, key: str) -> Optional[Dict]:
+        return self._done.get(key)
+
+    def append(self, key: str, record: Dict) -> None:
+        with self._lock:
+            if key in self._done:
+                return
+            self._done[key] = record
+            self._file.write(dumps_line({"key": key, "qa": record}))
+            self._file.flush()
+
+    def __len__(self) -> int:
+        return len(self._done)
+
+    def close(self) -> None:
+        with self._lock:
+            self._file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
@@ -1,6 +1,17 @@
-import os, json, requests, time, random
-from typing import List, Dict
+import os, time, random, threading
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import nullcontext
+from email.utils import parsedate_to_datetime
+from pathlib import Path
+from typing import Dict, Iterable, Iterator, List, Optional, Tuple
+import requests
 from dotenv import load_dotenv
+from http_session import get_session
+from jsonl_output import open_jsonl_output
+from json_codec import dumps_line, loads, scan_objects
+from qa_cache import QACache, QACheckpoint, qa_cache_key
+from rate_limit import RateLimiter
 load_dotenv()
 
 
@@ -13,6 +24,23 @@ OPENROUTER_API_URL = "https://openrouter.ai/api/v1/chat/completions"
 
 DEFAULT_MODEL = "mistralai/mistral-7b-instruct:free"
 
+# Client limits (free tier friendly); see configure_qa()
+DEFAULT_RPM = 20
+DEFAULT_TPM = None
+DEFAULT_MAX_IN_FLIGHT = 4
+DEFAULT_MAX_RETRIES = 5
+DEFAULT_BACKOFF_BASE = 1.0       # seconds, doubled per attempt
+DEFAULT_BACKOFF_MAX = 60.0
+DEFAULT_REQUEST_TIMEOUT = 30
+DEFAULT_QA_BUDGET = 10           # chunks sent per run; None = no limit
+DEFAULT_COMPLETION_TOKENS = 256  # reserved per chunk for TPM accounting
+DEFAULT_BATCH_ITEMS = 8          # chunks packed into one request in batched mode
+DEFAULT_BATCH_CHARS = 6000       # chunk text per batched request (~1500 tokens)
+DEFAULT_QA_FLUSH_EVERY = 1       # each pair cost a request; keep it on disk
+
+MIN_QA_TEXT_CHARS = 80
+RETRY_STATUS = {429, 500, 502, 503, 504}
+
 
 # ==================================================
 # Prompt Template
@@ -29,6 +57,197 @@ SYSTEM_PROMPT = (
     "Do not include any extra text."
 )
 
+BATCH_SYSTEM_PROMPT = (
+    "You are a data annotator.\n"
+    "You will receive several texts, each introduced by a line '### TEXT <id>'.\n"
+    "For EACH text generate exactly ONE question and ONE answer.\n"
+    "Respond ONLY with a valid JSON array, one object per text, in this exact format:\n\n"
+    "[\n"
+    '  {"id": "...", "question": "...", "answer": "..."}\n'
+    "]\n\n"
+    "Use the id given for each text. Do not include any extra text."
+)
+
+
+
+# ==================================================
+# Client Configuration + Rate Limiting
+# ==================================================
+
+_config = {
+    "api_url": os.getenv("OPENROUTER_API_URL", OPENROUTER_API_URL),
+    "api_key": None,
+    "rpm": DEFAULT_RPM,
+    "tpm": DEFAULT_TPM,
+    "max_in_flight": DEFAULT_MAX_IN_FLIGHT,
+    "max_retries": DEFAULT_MAX_RETRIES,
+    "backoff_base": DEFAULT_BACKOFF_BASE,
+    "backoff_max": DEFAULT_BACKOFF_MAX,
+    "timeout": DEFAULT_REQUEST_TIMEOUT,
+}
+_limiter = RateLimiter(rpm=DEFAULT_RPM, tpm=DEFAULT_TPM)
+
+_stats_lock = threading.Lock()
+_stats = {
+    "requests": 0,
+    "retries": 0,
+    "rate_limited": 0,
+    "failed": 0,
+    "cache_hits": 0,
+    "checkpoint_hits": 0,
+    "batches": 0,
+    "requeued": 0,
+}
+
+_qa_cache: Optional[QACache] = None
+
+
+def configure_qa(
+    api_url: Optional[str] = None,
+    api_key: Optional[str] = None,
+    rpm: Optional[float] = DEFAULT_RPM,
+    tpm: Optional[float] = DEFAULT_TPM,
+    max_in_flight: int = DEFAULT_MAX_IN_FLIGHT,
+    max_retries: int = DEFAULT_MAX_RETRIES,
+    backoff_base: float = DEFAULT_BACKOFF_BASE,
+    backoff_max: float = DEFAULT_BACKOFF_MAX,
+    timeout: float = DEFAULT_REQUEST_TIMEOUT,
+) -> None:
+    """
+    Sets Q/A client options.
+
+    - api_url: any OpenRouter-compatible chat completions endpoint
+      (default: $OPENROUTER_API_URL or OpenRouter itself)
+    - api_key: overrides $OPENROUTER_API_KEY
+    - rpm / tpm: requests / tokens per minute (None disables a limit)
+    - max_in_flight: concurrent requests in generate_qa_dataset
+    """
+    global _limiter
+
+    _config.update(
+        api_url=api_url or os.getenv("OPENROUTER_API_URL", OPENROUTER_API_URL),
+        api_key=api_key,
+        rpm=rpm,
+        tpm=tpm,
+        max_in_flight=max(1, int(max_in_flight)),
+        max_retries=max(0, int(max_retries)),
+        backoff_base=backoff_base,
+        backoff_max=backoff_max,
+        timeout=timeout,
+    )
+    _limiter = RateLimiter(rpm=rpm, tpm=tpm)
+
+
+def configure_qa_cache(cache_dir: Optional[Path]) -> Optional[QACache]:
+    """
+    Enables the on-disk Q/A cache (cache_dir=None disables it).
+    Entries are keyed by model, system prompt, temperature and text.
+    """
+    global _qa_cache
+
+    if _qa_cache is not None:
+        _qa_cache.close()
+        _qa_cache = None
+
+    if cache_dir is not None:
+        _qa_cache = QACache(cache_dir)
+    return _qa_cache
+
+
+def _count(name: str) -> None:
+    with _stats_lock:
+        _stats[name] += 1
+
+
+def qa_stats() -> Dict:
+    with _stats_lock:
+        stats = dict(_stats)
+    stats.update(_limiter.stats())
+    return stats
+
+
+def reset_qa_stats() -> None:
+    with _stats_lock:
+        for k in _stats:
+            _stats[k] = 0
+
+
+def parse_retry_after(value: Optional[str]) -> Optional[float]:
+    """
+    Retry-After as seconds (delta-seconds or HTTP-date form).
+    """
+    if not value:
+        return None
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+    try:
+        return max(0.0, parsedate_to_datetime(value).timestamp() - time.time())
+    except (TypeError, ValueError):
+        return None
+
+
+def _estimate_tokens(payload: Dict, items: int = 1) -> int:
+    # ~4 characters per token, plus room for each completion
+    chars = sum(len(m["content"]) for m in payload["messages"])
+    return chars // 4 + DEFAULT_COMPLETION_TOKENS * items
+
+
+def _post_chat(payload: Dict, headers: Dict, items: int = 1) -> Dict:
+    """
+    Rate-limited POST with retries on 429 / 5xx / connection errors.
+    Backoff is exponential with jitter; Retry-After is honoured and
+    pauses every worker, not just this one.
+    """
+    limiter = _limiter
+    estimated = _estimate_tokens(payload, items)
+    error: Optional[Exception] = None
+
+    for attempt in range(_config["max_retries"] + 1):
+        limiter.acquire(estimated)
+        _count("requests")
+        retry_after = None
+
+        try:
+            response = get_session().post(
+                _config["api_url"],
+                headers=headers,
+                json=payload,
+                timeout=_config["timeout"],
+                verify=True,
+            )
+        except (requests.ConnectionError, requests.Timeout) as e:
+            error = e
+        else:
+            if response.status_code not in RETRY_STATUS:
+                response.raise_for_status()
+                data = response.json()
+                usage = data.get("usage") or {}
+                limiter.settle(estimated, usage.get("total_tokens") or 0)
+                return data
+
+            if response.status_code == 429:
+                _count("rate_limited")
+            retry_after = parse_retry_after(response.headers.get("Retry-After"))
+            error = requests.HTTPError(
+                f"{response.status_code} from Q/A endpoint",
+                response=response,
+            )
+
+        if attempt == _config["max_retries"]:
+            break
+
+        delay = min(_config["backoff_max"], _config["backoff_base"] * 2 ** attempt)
+        delay *= random.uniform(0.5, 1.0)
+        if retry_after is not None:
+            limiter.pause(retry_after)
+            delay = max(delay, retry_after)
+
+        _count("retries")
+        time.sleep(delay)
+
+    raise error
 
 
 # ==================================================
@@ -40,9 +259,13 @@ def generate_qa_for_text(
     model: str = DEFAULT_MODEL,
     temperature: float = 0.2,
 ):
-    api_key = os.getenv("OPENROUTER_API_KEY")
-    if not api_key:
-        raise RuntimeError("OPENROUTER_API_KEY environment variable is not set")
+    cache = _qa_cache
+    key = qa_cache_key(model, SYSTEM_PROMPT, temperature, text)
+    if cache is not None:
+        cached = cache.get(key)
+        if cached is not None:
+            _count("cache_hits")
+            return cached
 
     payload = {
         "model": model,
@@ -56,35 +279,112 @@ def generate_qa_for_text(
         ],
     }
 
-    headers = {
-        "Authorization": f"Bearer {api_key}",
-        "Content-Type": "application/json",
-        "HTTP-Referer": "http://localhost",
-        "X-Title": "Web-to-JSONL-System",
-    }
-
-    response = requests.post(
-        OPENROUTER_API_URL,
-        headers=headers,
-        json=payload,
-        timeout=30,
-    )
-
-    response.raise_for_status()
-    data = response.json()
+    data = _post_chat(payload, _auth_headers())
 
     raw_content = data["choices"][0]["message"]["content"].strip()
 
     try:
-        qa = json.loads(raw_content)
-        question = qa.get("question")
-        answer = qa.get("answer")
+        qa = loads(raw_content)
     except Exception:
         raise ValueError("Model did not return valid JSON")
 
-    if not question or not answer:
+    record = _qa_record(qa)
+    if record is None:
         raise ValueError("Model returned empty question or answer")
 
+    if cache is not None:
+        cache.put(key, model, record)
+    return record
+
+
+def generate_qa_for_batch(
+    texts: List[str],
+    model: str = DEFAULT_MODEL,
+    temperature: float = 0.2,
+) -> List[Optional[Dict]]:
+    """
+    Annotates several chunks with one request.
+
+    Returns one entry per text, None where the response had no valid
+    item for it (missing id, empty fields, truncated output); callers
+    retry those individually. Raises only if the request itself fails.
+    """
+    cache = _qa_cache
+    results: List[Optional[Dict]] = [None] * len(texts)
+    keys = [qa_cache_key(model, BATCH_SYSTEM_PROMPT, temperature, t) for t in texts]
+
+    todo = []
+    for i, key in enumerate(keys):
+        cached = cache.get(key) if cache is not None else None
+        if cached is not None:
+            _count("cache_hits")
+            results[i] = cached
+        else:
+            todo.append(i)
+
+    if not todo:
+        return results
+
+    sections = "\n\n".join(f"### TEXT {i}\n{texts[i]}" for i in todo)
+    payload = {
+        "model": model,
+        "temperature": temperature,
+        "messages": [
+            {"role": "system", "content": BATCH_SYSTEM_PROMPT},
+            {
+                "role": "user",
+                "content": f"{sections}\n\nGenerate the JSON array now.",
+            },
+        ],
+    }
+
+    _count("batches")
+    data = _post_chat(payload, _auth_headers(), items=len(todo))
+    raw_content = data["choices"][0]["message"]["content"] or ""
+
+    wanted = set(todo)
+    for item in _parse_batch_items(raw_content):
+        try:
+            i = int(str(item.get("id")).strip())
+        except ValueError:
+            continue
+        if i not in wanted or results[i] is not None:
+            continue
+        record = _qa_record(item)
+        if record is not None:
+            results[i] = record
+            if cache is not None:
+                cache.put(keys[i], model, record)
+
+    return results
+
+
+def _auth_headers() -> Dict:
+    api_key = _config["api_key"] or os.getenv("OPENROUTER_API_KEY")
+    if not api_key:
+        raise RuntimeError("OPENROUTER_API_KEY environment variable is not set")
+
+    return {
+        "Authorization": f"Bearer {api_key}",
+        "Content-Type": "application/json",
+        "HTTP-Referer": "http://localhost",
+        "X-Title": "Web-to-JSONL-System",
+    }
+
+
+def _qa_record(qa) -> Optional[Dict]:
+    """
+    Chat-format record from a {"question", "answer"} object, or None.
+    """
+    if not isinstance(qa, dict):
+        return None
+    question = qa.get("question")
+    answer = qa.get("answer")
+    if not isinstance(question, str) or not isinstance(answer, str):
+        return None
+    if not question.strip() or not answer.strip():
+        return None
+
     return {
         "messages": [
             {"role": "user", "content": question.strip()},
@@ -92,46 +392,249 @@ def generate_qa_for_text(
         ]
     }
 
+
+def _parse_batch_items(raw_content: str) -> List[Dict]:
+    """
+    Items of a batched response. Accepts a bare array or one wrapped
+    in an object; falls back to salvaging whole objects from fenced,
+    chatty or truncated output.
+    """
+    try:
+        parsed = loads(raw_content.strip())
+    except Exception:
+        return scan_objects(raw_content)
+
+    if isinstance(parsed, dict):
+        parsed = next((v for v in parsed.values() if isinstance(v, list)), [parsed])
+    if not isinstance(parsed, list):
+        return []
+    return [item for item in parsed if isinstance(item, dict)]
+
 # ==================================================
 # Batch Q/A Generation
 # ==================================================
 
-def generate_qa_dataset(
-    records: List[Dict],
-    max_items: int = 10,   # LOWER THIS for free tier
-) -> List[Dict]:
+class _resolved:
+    """
+    Stands in for a finished future (checkpointed result).
+    """
 
-    qa_records = []
+    def __init__(self, value: Dict):
+        self._value = value
 
-    for i, r in enumerate(records):
-        if i >= max_items:
-            break
+    def result(self) -> Dict:
+        return self._value
 
-        text = r.get("text")
-        if not text or len(text) < 80:
-            continue
 
+def iter_qa_records(
+    records: Iterable[Dict],
+    max_items: Optional[int] = DEFAULT_QA_BUDGET,
+    model: str = DEFAULT_MODEL,
+    temperature: float = 0.2,
+    max_in_flight: Optional[int] = None,
+    checkpoint_path: Optional[Path] = None,
+    batch_items: int = 1,
+    batch_chars: int = DEFAULT_BATCH_CHARS,
+) -> Iterator[Dict]:
+    """
+    Generates Q/A pairs concurrently and yields them in input order.
+
+    - max_items: budget of chunks annotated (None = all); cached and
+      checkpointed chunks count, so a resumed job covers the same chunks
+    - at most max_in_flight requests run at once; pacing comes from
+      the RPM/TPM limiter rather than fixed sleeps
+    - records are consumed lazily, so the input can be a stream
+    - checkpoint_path: every finished pair is appended there; rerunning
+      with the same path only requests the chunks still missing
+    - batch_items > 1: pack up to that many chunks (at most batch_chars
+      of text) into one request; items the model drops or mangles are
+      retried one by one
+    """
+    max_in_flight = max_in_flight or _config["max_in_flight"]
+    batch_items = max(1, int(batch_items))
+    checkpoint = QACheckpoint(checkpoint_path) if checkpoint_path else None
+
+    def eligible() -> Iterator[str]:
+        sent = 0
+        for r in records:
+            if max_items is not None and sent >= max_items:
+                return
+            text = r.get("text")
+            if not text or len(text) < MIN_QA_TEXT_CHARS:
+                continue
+            sent += 1
+            yield text
+
+    def run(text: str, key: Optional[str]) -> Optional[Dict]:
         try:
-            qa = generate_qa_for_text(text)
-            qa_records.append(qa)
+            qa = generate_qa_for_text(text, model=model, temperature=temperature)
+        except Exception as e:
+            _count("failed")
+            print("Q/A generation failed:", e)
+            return None
+        if checkpoint is not None:
+            checkpoint.append(key, qa)
+        return qa
 
-            # polite delay to avoid 429
-            time.sleep(random.uniform(1.5, 2.5))
+    def run_batch(items: List[Tuple[str, Optional[str]]]) -> List[Optional[Dict]]:
+        if len(items) == 1:
+            return [run(*items[0])]
 
+        try:
+            results = generate_qa_for_batch(
+                [text for text, _ in items],
+                model=model,
+                temperature=temperature,
+            )
         except Exception as e:
-            print("Q/A generation failed:", e)
-            continue
+            print("Batched Q/A request failed, retrying items individually:", e)
+            results = [None] * len(items)
+
+        for i, (text, key) in enumerate(items):
+            if results[i] is None:
+                _count("requeued")
+                results[i] = run(text, key)
+            elif checkpoint is not None:
+                checkpoint.append(key, results[i])
+        return results
+
+    # The pool is shut down (workers drained) before the checkpoint closes
+    # (an empty checkpoint is falsy through __len__, so test for None)
+    with checkpoint if checkpoint is not None else nullcontext(), ThreadPoolExecutor(max_workers=max_in_flight) as pool:
+        # (future, position) per chunk, in input order
+        pending = deque()
+        window = max_in_flight * batch_items * 2
+        batch: List[Tuple[str, Optional[str]]] = []
+        batch_slots: List[int] = []
+        chars = 0
+
+        def submit() -> None:
+            nonlocal chars
+            future = pool.submit(run_batch, list(batch))
+            for position, slot in enumerate(batch_slots):
+                pending[slot - base] = (future, position)
+            batch.clear()
+            batch_slots.clear()
+            chars = 0
+
+        # Absolute slot number of pending[0]
+        base = 0
+
+        for text in eligible():
+            key = done = None
+            if checkpoint is not None:
+                key = qa_cache_key(model, SYSTEM_PROMPT, temperature, text)
+                done = checkpoint.get(key)
+
+            if done is not None:
+                _count("checkpoint_hits")
+                pending.append((_resolved([done]), 0))
+            else:
+                if batch and chars + len(text) > batch_chars:
+                    submit()
+                batch_slots.append(base + len(pending))
+                pending.append(None)
+                batch.append((text, key))
+                chars += len(text)
+                if len(batch) >= batch_items:
+                    submit()
+
+            # Keep the pool busy while the oldest result is awaited
+            while len(pending) >= window and pending[0] is not None:
+                future, position = pending.popleft()
+                base += 1
+                qa = future.result()[position]
+                if qa is not None:
+                    yield qa
+
+        if batch:
+            submit()
+
+        while pending:
+            future, position = pending.popleft()
+            qa = future.result()[position]
+            if qa is not None:
+                yield qa
 
-    return qa_records
+
+def generate_qa_dataset(
+    records: Iterable[Dict],
+    max_items: Optional[int] = DEFAULT_QA_BUDGET,   # LOWER THIS for free tier
+    model: str = DEFAULT_MODEL,
+    temperature: float = 0.2,
+    max_in_flight: Optional[int] = None,
+    checkpoint_path: Optional[Path] = None,
+    batch_items: int = 1,
+    batch_chars: int = DEFAULT_BATCH_CHARS,
+) -> List[Dict]:
+
+    return list(iter_qa_records(
+        records,
+        max_items=max_items,
+        model=model,
+        temperature=temperature,
+        max_in_flight=max_in_flight,
+        checkpoint_path=checkpoint_path,
+        batch_items=batch_items,
+        batch_chars=batch_chars,
+    ))
 
 # ==================================================
 # JSONL Writer (Chat Format)
 # ==================================================
 
-def write_qa_jsonl(qa_records: List[Dict], output_path: str) -> None:
+def write_qa_jsonl(
+    qa_records: List[Dict],
+    output_path: str,
+    shard_records: Optional[int] = None,
+    shard_bytes: Optional[int] = None,
+) -> None:
+    """
+    .gz / .zst paths are compressed; shard_records / shard_bytes
+    rotate output into numbered shards with a manifest.
+    """
 
     if not qa_records:
         raise ValueError("No Q/A records to write")
-    with open(output_path, "w", encoding="utf-8") as f:
+    stream_qa_jsonl(
+        qa_records,
+        output_path,
+        flush_every=len(qa_records),
+        shard_records=shard_records,
+        shard_bytes=shard_bytes,
+    )
+
+
+def stream_qa_jsonl(
+    qa_records: Iterable[Dict],
+    output_path: str,
+    flush_every: int = DEFAULT_QA_FLUSH_EVERY,
+    shard_records: Optional[int] = None,
+    shard_bytes: Optional[int] = None,
+) -> int:
+    """
+    Writes Q/A pairs as they are generated (e.g. from iter_qa_records);
+    every flush_every pairs are written and flushed.
+    Returns the number of pairs written.
+    """
+    written = 0
+    lines = []
+
+    with open_jsonl_output(
+        output_path,
+        index=False,
+        shard_records=shard_records,
+        shard_bytes=shard_bytes,
+    ) as f:
         for record in qa_records:
-            f.write(json.dumps(record, ensure_ascii=False) + "\n")
\ No newline at end of file
+            lines.append(dumps_line(record))
+            written += 1
+            if len(lines) >= flush_every:
+                f.write_batch(lines, [(None, None, 0)] * len(lines))
+                f.flush()
+                lines = []
+
+        if lines:
+            f.write_batch(lines, [(None, None, 0)] * len(lines))
+
+    return written
\ No newline at end of file
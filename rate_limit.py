@@ -0,0 +1,123 @@
+import threading
+import time
+from typing import Dict, Optional
+
+
+# ==================================================
+# Token Bucket
+# ==================================================
+
+DEFAULT_BURST_SECONDS = 10   # bucket holds this many seconds of refill
+
+
+class TokenBucket:
+    """
+    Thread-safe token bucket refilled continuously at rate_per_minute.
+
+    A request larger than the bucket is let through once the bucket is
+    full (otherwise it could never run); consume() may push the balance
+    negative to account for usage discovered after the fact.
+    """
+
+    def __init__(self, rate_per_minute: float, capacity: Optional[float] = None):
+        if rate_per_minute <= 0:
+            raise ValueError("Token bucket rate must be positive")
+
+        self.rate = rate_per_minute / 60.0
+        self.capacity = capacity or max(1.0, self.rate * DEFAULT_BURST_SECONDS)
+        self._tokens = self.capacity
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def _refill(self) -> None:
+        now = time.monotonic()
+        self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+        self._updated = now
+
+    def acquire(self, amount: float = 1.0) -> float:
+        """
+        Blocks until amount tokens are available and takes them.
+        Returns the time spent waiting.
+        """
+        needed = min(amount, self.capacity)
+        waited = 0.0
+
+        while True:
+            with self._lock:
+                self._refill()
+                if self._tokens >= needed:
+                    self._tokens -= amount
+                    return waited
+                delay = (needed - self._tokens) / self.rate
+
+            time.sleep(delay)
+            waited += delay
+
+    def consume(self, amount: float) -> None:
+        """
+        Adjusts the balance without waiting (negative amount refunds).
+        """
+        with self._lock:
+            self._refill()
+            self._tokens = min(self.capacity, self._tokens - amount)
+
+
+# ==================================================
+# Request + Token Rate Limiter
+# ==================================================
+
+class RateLimiter:
+    """
+    Requests-per-minute and tokens-per-minute limits (either optional),
+    plus a shared pause used when the provider sends Retry-After.
+    """
+
+    def __init__(self, rpm: Optional[float] = None, tpm: Optional[float] = None):
+        self.requests = TokenBucket(rpm) if rpm else None
+        self.tokens = TokenBucket(tpm) if tpm else None
+
+        self._lock = threading.Lock()
+        self._paused_until = 0.0
+        self._stats = {"acquired": 0, "wait_seconds": 0.0}
+
+    def pause(self, seconds: float) -> None:
+        """
+        Holds back every caller for the given number of seconds.
+        """
+        with self._lock:
+            self._paused_until = max(self._paused_until, time.monotonic() + seconds)
+
+    def acquire(self, tokens: int = 0) -> float:
+        waited = 0.0
+
+        while True:
+            with self._lock:
+                delay = self._paused_until - time.monotonic()
+            if delay <= 0:
+                break
+            time.sleep(delay)
+            waited += delay
+
+        if self.requests is not None:
+            waited += self.requests.acquire(1)
+        if self.tokens is not None and tokens:
+            waited += self.tokens.acquire(tokens)
+
+        with self._lock:
+            self._stats["acquired"] += 1
+            self._stats["wait_seconds"] += waited
+        return waited
+
+    def settle(self, estimated: int, actual: int) -> None:
+        """
+        Corrects the token bucket once real usage is known.
+        """
+        if self.tokens is not None and actual:
+            self.tokens.consume(actual - estimated)
+
+    def stats(self) -> Dict:
+        with self._lock:
+            return {
+                "acquired": self._stats["acquired"],
+                "wait_seconds": round(self._stats["wait_seconds"], 2),
+            }
@@ -0,0 +1,153 @@
+import math
+import re
+import threading
+import time
+from typing import Dict, List, Optional, Tuple
+from urllib.parse import urlsplit
+from urllib.robotparser import RobotFileParser
+
+import requests
+
+from fetcher import fetch_page
+from http_cache import CacheMissError
+from http_session import get_session
+
+
+# ==================================================
+# robots.txt Defaults
+# ==================================================
+
+DEFAULT_ROBOTS_TTL = 24 * 3600     # seconds a fetched robots.txt is trusted
+DEFAULT_ROBOTS_ERROR_TTL = 300     # retry sooner after 5xx / network errors
+
+# urllib.robotparser only reads whole-second delays
+_FRACTIONAL_DELAY = re.compile(r"^(\s*crawl-delay\s*:\s*)(\d*\.\d+)\s*$", re.IGNORECASE)
+
+
+def _round_up_delays(lines: List[str]) -> List[str]:
+    """
+    Rounds fractional Crawl-delay values up to whole seconds rather
+    than letting the parser drop them.
+    """
+    out = []
+    for line in lines:
+        m = _FRACTIONAL_DELAY.match(line)
+        if m:
+            line = f"{m.group(1)}{math.ceil(float(m.group(2)))}"
+        out.append(line)
+    return out
+
+
+def _origin(url: str) -> Tuple[str, str]:
+    parts = urlsplit(url)
+    return parts.scheme.lower() or "http", parts.netloc.lower()
+
+
+# ==================================================
+# Per-Host robots.txt Cache
+# ==================================================
+
+class RobotsCache:
+    """
+    robots.txt rules per scheme + host, fetched once and reused.
+
+    Fetches go through fetcher.fetch_page, so with the response cache
+    configured they are also revalidated across runs (ETag / 304).
+    Status handling follows RFC 9309: 4xx means no rules (allow all),
+    5xx or an unreachable host means disallow all until retried.
+    """
+
+    def __init__(
+        self,
+        user_agent: Optional[str] = None,
+        ttl: float = DEFAULT_ROBOTS_TTL,
+        error_ttl: float = DEFAULT_ROBOTS_ERROR_TTL,
+    ):
+        self.user_agent = user_agent
+        self.ttl = ttl
+        self.error_ttl = error_ttl
+
+        self._lock = threading.Lock()
+        self._host_locks: Dict[Tuple[str, str], threading.Lock] = {}
+        self._rules: Dict[Tuple[str, str], Tuple[RobotFileParser, float]] = {}
+        self.counters = {"fetched": 0, "unavailable": 0, "disallowed": 0}
+
+    @property
+    def agent(self) -> str:
+        return self.user_agent or get_session().headers.get("User-Agent", "*")
+
+    def _fetch(self, scheme: str, host: str) -> Tuple[RobotFileParser, float]:
+        parser = RobotFileParser(f"{scheme}://{host}/robots.txt")
+        ttl = self.ttl
+
+        try:
+            page = fetch_page(parser.url)
+            parser.parse(_round_up_delays(page.text.splitlines()))
+        except requests.HTTPError as e:
+            status = e.response.status_code if e.response is not None else 500
+            if 400 <= status < 500:
+                parser.allow_all = True
+            else:
+                parser.disallow_all = True
+                ttl = self.error_ttl
+        except CacheMissError:
+            # Offline run without a cached copy: nothing will be fetched anyway
+            parser.allow_all = True
+        except Exception:
+            parser.disallow_all = True
+            ttl = self.error_ttl
+
+        with self._lock:
+            self.counters["fetched"] += 1
+            if parser.disallow_all:
+                self.counters["unavailable"] += 1
+        return parser, time.monotonic() + ttl
+
+    def rules(self, url: str) -> RobotFileParser:
+        key = _origin(url)
+
+        with self._lock:
+            cached = self._rules.get(key)
+            if cached is not None and cached[1] > time.monotonic():
+                return cached[0]
+            host_lock = self._host_locks.setdefault(key, threading.Lock())
+
+        # One fetch per host even when many workers ask at once
+        with host_lock:
+            with self._lock:
+                cached = self._rules.get(key)
+            if cached is None or cached[1] <= time.monotonic():
+                cached = self._fetch(*key)
+                with self._lock:
+                    self._rules[key] = cached
+        return cached[0]
+
+    def allowed(self, url: str) -> bool:
+        ok = self.rules(url).can_fetch(self.agent, url)
+        if not ok:
+            with self._lock:
+                self.counters["disallowed"] += 1
+        return ok
+
+    def crawl_delay(self, url: str) -> Optional[float]:
+        delay = self.rules(url).crawl_delay(self.agent)
+        return float(delay) if delay is not None else None
+
+    def cached_crawl_delay(self, host: str) -> Optional[float]:
+        """
+        Crawl-delay for a host whose rules are already cached (never
+        fetches; None if unknown).
+        """
+        host = host.lower()
+        with self._lock:
+            parsers = [p for (_, h), (p, _) in self._rules.items() if h == host]
+        delays = [p.crawl_delay(self.agent) for p in parsers]
+        delays = [float(d) for d in delays if d is not None]
+        return max(delays) if delays else None
+
+    def sitemaps(self, url: str) -> List[str]:
+        return list(self.rules(url).site_maps() or [])
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            return dict(self.counters)
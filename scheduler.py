@@ -0,0 +1,103 @@
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
+from typing import Callable, Dict, Iterable, Iterator, Tuple, TypeVar
+from urllib.parse import urlparse
+
+
+T = TypeVar("T")
+R = TypeVar("R")
+
+
+# ==================================================
+# Concurrency Defaults
+# ==================================================
+
+DEFAULT_MAX_WORKERS = 8
+DEFAULT_PER_HOST_LIMIT = 4
+
+
+def host_key(url: str) -> str:
+    """
+    Groups URLs by host for per-host limits.
+    """
+    return urlparse(url).netloc.lower()
+
+
+# ==================================================
+# Concurrent Executor (Global + Per-Host Limits)
+# ==================================================
+
+def iter_concurrent(
+    items: Iterable[T],
+    fn: Callable[[T], R],
+    max_workers: int = DEFAULT_MAX_WORKERS,
+    per_host_limit: int = DEFAULT_PER_HOST_LIMIT,
+    key: Callable[[T], str] = host_key,
+    ordered: bool = True,
+) -> Iterator[Tuple[T, R]]:
+    """
+    Runs fn over items on a thread pool and yields (item, result).
+
+    - at most max_workers calls run at once
+    - at most per_host_limit calls run at once for the same key
+    - ordered=True yields in input order, otherwise as completed
+
+    Items waiting on a busy host never block items for other hosts:
+    work is only submitted once a slot for its host is free.
+    """
+    items = list(items)
+    max_workers = max(1, int(max_workers))
+    per_host_limit = max(1, int(per_host_limit))
+
+    queues: Dict[str, deque] = {}
+    for index, item in enumerate(items):
+        queues.setdefault(key(item), deque()).append(index)
+
+    active: Dict[str, int] = {k: 0 for k in queues}
+    buffered: Dict[int, R] = {}
+    next_to_yield = 0
+
+    def _next_ready() -> int:
+        # Pick the lowest input index among hosts with a free slot
+        best_key, best_index = None, None
+        for k, q in queues.items():
+            if q and active[k] < per_host_limit:
+                if best_index is None or q[0] < best_index:
+                    best_key, best_index = k, q[0]
+        if best_key is None:
+            return -1
+        queues[best_key].popleft()
+        return best_index
+
+    with ThreadPoolExecutor(max_workers=max_workers) as pool:
+        running = {}
+
+        while True:
+            while len(running) < max_workers:
+                index = _next_ready()
+                if index < 0:
+                    break
+                k = key(items[index])
+                active[k] += 1
+                running[pool.submit(fn, items[index])] = (index, k)
+
+            if not running:
+                break
+
+            done, _ = wait(running, return_when=FIRST_COMPLETED)
+
+            for future in done:
+                index, k = running.pop(future)
+                active[k] -= 1
+                result = future.result()
+
+                if not ordered:
+                    yield items[index], result
+                    continue
+
+                buffered[index] = result
+
+            while next_to_yield in buffered:
+                yield items[next_to_yield], buffered.pop(next_to_yield)
+                next_to_yield += 1
+
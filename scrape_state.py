@@ -0,0 +1,281 @@
+import hashlib
+import sqlite3
+import threading
+import time
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional
+
+from chunker import normalize_text
+from http_cache import canonical_url
+from json_codec import dumps, dumps_line, loads
+from jsonl_output import sidecar_path_for
+from scheduler import host_key
+
+
+# ==================================================
+# Content Hashing
+# ==================================================
+
+STATE_DB_NAME = "scrape_state.sqlite"
+TOMBSTONE_SUFFIX = ".tombstones.jsonl"
+
+# HTTP statuses that mean the page is gone, not just failing
+GONE_STATUS = {404, 410}
+
+
+def content_hash(text: str) -> str:
+    """
+    SHA-256 of the extracted text with whitespace normalized, so
+    reflowed markup does not count as a change.
+    """
+    return hashlib.sha256(normalize_text(text).encode("utf-8")).hexdigest()
+
+
+def tombstone_path_for(path: Path) -> Path:
+    return sidecar_path_for(path, TOMBSTONE_SUFFIX)
+
+
+# ==================================================
+# Per-URL State Store (SQLite)
+# ==================================================
+
+class ScrapeStateStore:
+    """
+    Remembers, per canonical URL, the hash of the last extracted text,
+    the strategy that produced it and when it last changed.
+
+    A run is bracketed by begin_run() / finish_run(). Extraction calls
+    known_hash() before chunking and apply() with the outcome; pages
+    whose text hash is unchanged produce no records.
+
+    Outcomes and sitemap listings are staged and only reach the store
+    in finish_run(), once the run's output is complete. A run that is
+    interrupted changes nothing: its pages count as new / changed
+    again next time, so their records are not lost.
+    """
+
+    def __init__(self, state_dir: Path):
+        self.state_dir = Path(state_dir)
+        self.state_dir.mkdir(parents=True, exist_ok=True)
+
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(
+            str(self.state_dir / STATE_DB_NAME),
+            check_same_thread=False,
+        )
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS pages ("
+            " url_key TEXT PRIMARY KEY,"
+            " url TEXT,"
+            " host TEXT,"
+            " content_hash TEXT,"
+            " strategy TEXT,"
+            " status TEXT,"
+            " changed_at REAL,"
+            " seen_at REAL,"
+            " seen_run INTEGER,"
+            " listed_run INTEGER)"
+        )
+        columns = {row[1] for row in self._conn.execute("PRAGMA table_info(pages)")}
+        if "listed_run" not in columns:
+            # Stores created before sitemap listings were tracked
+            self._conn.execute("ALTER TABLE pages ADD COLUMN listed_run INTEGER")
+        self._conn.execute("CREATE INDEX IF NOT EXISTS idx_pages_host ON pages(host)")
+        # Updates of the current run; outcome is NULL for a sitemap listing
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS staged ("
+            " seq INTEGER PRIMARY KEY AUTOINCREMENT,"
+            " run_id INTEGER,"
+            " url TEXT,"
+            " outcome TEXT)"
+        )
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS runs ("
+            " run_id INTEGER PRIMARY KEY AUTOINCREMENT,"
+            " started_at REAL,"
+            " finished_at REAL)"
+        )
+        self._conn.commit()
+
+        self.run_id: Optional[int] = None
+        self.counters = {"new": 0, "changed": 0, "unchanged": 0, "failed": 0, "gone": 0}
+
+    # ----------------------------
+    # Run Lifecycle
+    # ----------------------------
+
+    def begin_run(self) -> int:
+        with self._lock:
+            # Staged updates of interrupted runs are dropped
+            self._conn.execute("DELETE FROM staged")
+            cur = self._conn.execute("INSERT INTO runs (started_at) VALUES (?)", (time.time(),))
+            self._conn.commit()
+            self.run_id = cur.lastrowid
+            for k in self.counters:
+                self.counters[k] = 0
+        return self.run_id
+
+    def finish_run(self, complete_hosts: Iterable[str] = ()) -> List[str]:
+        """
+        Commits the run's staged updates and returns its tombstones:
+        URLs that answered 404 / 410, plus URLs on complete_hosts (hosts
+        whose full sitemap listing this run read) that an earlier
+        sitemap listed but this run neither listed nor fetched. Pages
+        only ever seen through URL lists or crawls are not tombstoned.
+        Tombstoned URLs are not reported again unless they come back.
+        """
+        hosts = sorted(set(complete_hosts))
+
+        with self._lock:
+            run_id = self.run_id
+            now = time.time()
+            staged = self._conn.execute(
+                "SELECT url, outcome FROM staged WHERE run_id = ? ORDER BY seq",
+                (run_id,),
+            ).fetchall()
+            # Outcomes first, so pages new in this run exist when listed
+            for url, outcome in staged:
+                if outcome is not None:
+                    self._commit_outcome(url, loads(outcome), now)
+            for url, outcome in staged:
+                if outcome is None:
+                    self._conn.execute(
+                        "UPDATE pages SET seen_run = ?, listed_run = ?"
+                        " WHERE url_key = ? AND status != 'gone'",
+                        (run_id, run_id, canonical_url(url)),
+                    )
+
+            rows = self._conn.execute(
+                "SELECT url FROM pages WHERE status = 'gone' AND seen_run = ?",
+                (run_id,),
+            ).fetchall()
+            tombstones = [r[0] for r in rows]
+
+            for host in hosts:
+                rows = self._conn.execute(
+                    "SELECT url FROM pages WHERE host = ? AND seen_run < ?"
+                    " AND listed_run IS NOT NULL AND status != 'gone'",
+                    (host, run_id),
+                ).fetchall()
+                tombstones.extend(r[0] for r in rows)
+                self._conn.execute(
+                    "UPDATE pages SET status = 'gone' WHERE host = ? AND seen_run < ?"
+                    " AND listed_run IS NOT NULL",
+                    (host, run_id),
+                )
+
+            self._conn.execute("DELETE FROM staged WHERE run_id = ?", (run_id,))
+            self._conn.execute(
+                "UPDATE runs SET finished_at = ? WHERE run_id = ?",
+                (time.time(), run_id),
+            )
+            self._conn.commit()
+
+        return tombstones
+
+    # ----------------------------
+    # Lookup / Update
+    # ----------------------------
+
+    def known_hash(self, url: str) -> Optional[str]:
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT content_hash, status FROM pages WHERE url_key = ?",
+                (canonical_url(url),),
+            ).fetchone()
+        if row is None or row[1] == "gone":
+            return None
+        return row[0]
+
+    def apply(self, url: str, outcome: Dict) -> None:
+        """
+        Stages one extraction outcome (committed by finish_run):
+        {"status": "changed" | "unchanged" | "failed" | "gone",
+         "content_hash": ..., "strategy": ...}
+        """
+        status = outcome["status"]
+
+        with self._lock:
+            existing = self._conn.execute(
+                "SELECT status FROM pages WHERE url_key = ?", (canonical_url(url),)
+            ).fetchone()
+            if status == "changed":
+                is_new = existing is None or existing[0] == "gone"
+                self.counters["new" if is_new else "changed"] += 1
+            else:
+                self.counters[status] += 1
+
+            self._conn.execute(
+                "INSERT INTO staged (run_id, url, outcome) VALUES (?,?,?)",
+                (self.run_id, url, dumps(outcome)),
+            )
+            self._conn.commit()
+
+    def _commit_outcome(self, url: str, outcome: Dict, now: float) -> None:
+        status = outcome["status"]
+        key = canonical_url(url)
+        existing = self._conn.execute(
+            "SELECT status, listed_run FROM pages WHERE url_key = ?", (key,)
+        ).fetchone()
+
+        if status == "changed":
+            self._conn.execute(
+                "INSERT OR REPLACE INTO pages VALUES (?,?,?,?,?,?,?,?,?,?)",
+                (
+                    key,
+                    url,
+                    host_key(url),
+                    outcome["content_hash"],
+                    outcome.get("strategy"),
+                    "ok",
+                    now,
+                    now,
+                    self.run_id,
+                    existing[1] if existing is not None else None,
+                ),
+            )
+        elif existing is not None and existing[0] != "gone":
+            # unchanged / failed keep the last good hash; gone is tombstoned
+            self._conn.execute(
+                "UPDATE pages SET status = ?, seen_at = ?, seen_run = ? WHERE url_key = ?",
+                ("gone" if status == "gone" else "ok", now, self.run_id, key),
+            )
+
+    def mark_listed(self, url: str) -> None:
+        """
+        Stages a sitemap listing of a URL: it counts as seen even if it
+        is not fetched (e.g. its lastmod is older than the last run),
+        and it may be tombstoned once a full listing no longer has it.
+        """
+        with self._lock:
+            self._conn.execute(
+                "INSERT INTO staged (run_id, url, outcome) VALUES (?,?,NULL)",
+                (self.run_id, url),
+            )
+            self._conn.commit()
+
+    # ----------------------------
+    # Stats / Lifecycle
+    # ----------------------------
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            return dict(self.counters)
+
+    def close(self) -> None:
+        with self._lock:
+            self._conn.close()
+
+
+def write_tombstones(tombstones: List[str], output_path: Path) -> Path:
+    """
+    Writes <output>.tombstones.jsonl: one {"source_url", "removed_at"}
+    per page that disappeared since the previous run.
+    """
+    path = tombstone_path_for(output_path)
+    removed_at = datetime.now(timezone.utc).isoformat().replace("+00:00", "Z")
+    with open(path, "wb") as f:
+        for url in tombstones:
+            f.write(dumps_line({"source_url": url, "removed_at": removed_at}))
+    return path
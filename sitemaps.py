@@ -0,0 +1,311 @@
+import json
+import os
+import xml.etree.ElementTree as ET
+import zlib
+from dataclasses import dataclass
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Callable, Dict, Iterable, Iterator, List, Optional, Tuple
+from urllib.parse import urljoin, urlsplit
+
+from fetcher import DEFAULT_TIMEOUT
+from http_cache import canonical_url
+from http_session import get_session
+from robots import RobotsCache
+
+
+# ==================================================
+# Sitemap Defaults
+# ==================================================
+
+DEFAULT_MAX_SITEMAP_DEPTH = 3      # index -> index -> urlset nesting allowed
+STREAM_CHUNK_BYTES = 64 * 1024
+GZIP_MAGIC = b"\x1f\x8b"
+
+
+@dataclass
+class SitemapEntry:
+    loc: str
+    lastmod: Optional[datetime] = None
+
+
+def parse_lastmod(value: Optional[str]) -> Optional[datetime]:
+    """
+    W3C datetime (YYYY, YYYY-MM, YYYY-MM-DD or full ISO 8601) as an
+    aware UTC datetime; None if missing or unparseable.
+    """
+    if not value:
+        return None
+    value = value.strip()
+
+    try:
+        if len(value) == 4:
+            parsed = datetime(int(value), 1, 1)
+        elif len(value) == 7:
+            parsed = datetime(int(value[:4]), int(value[5:7]), 1)
+        else:
+            parsed = datetime.fromisoformat(value.replace("Z", "+00:00"))
+    except ValueError:
+        return None
+
+    if parsed.tzinfo is None:
+        parsed = parsed.replace(tzinfo=timezone.utc)
+    return parsed.astimezone(timezone.utc)
+
+
+# ==================================================
+# Streaming Parser
+# ==================================================
+
+def _local(tag: str) -> str:
+    return tag.rsplit("}", 1)[-1]
+
+
+def iter_sitemap_xml(stream) -> Iterator[Tuple[str, SitemapEntry]]:
+    """
+    Yields ("url" | "sitemap", entry) from a sitemap or sitemap index
+    file object without building the whole tree: each entry is dropped
+    from memory once read.
+    """
+    root = None
+    for event, elem in ET.iterparse(stream, events=("start", "end")):
+        if event == "start":
+            if root is None:
+                root = elem
+            continue
+
+        kind = _local(elem.tag)
+        if kind not in ("url", "sitemap"):
+            continue
+
+        loc = lastmod = None
+        for child in elem:
+            name = _local(child.tag)
+            if name == "loc":
+                loc = (child.text or "").strip()
+            elif name == "lastmod":
+                lastmod = child.text
+
+        if loc:
+            yield kind, SitemapEntry(loc, parse_lastmod(lastmod))
+        root.clear()
+
+
+class _ChunkReader:
+    """
+    Minimal read() file object over an iterator of byte chunks.
+    """
+
+    def __init__(self, chunks: Iterator[bytes]):
+        self._chunks = chunks
+        self._buffer = b""
+
+    def read(self, size: int = -1) -> bytes:
+        while size < 0 or len(self._buffer) < size:
+            chunk = next(self._chunks, None)
+            if chunk is None:
+                break
+            self._buffer += chunk
+
+        if size < 0:
+            data, self._buffer = self._buffer, b""
+        else:
+            data, self._buffer = self._buffer[:size], self._buffer[size:]
+        return data
+
+
+def _iter_body(response) -> Iterator[bytes]:
+    """
+    Response body in chunks; Content-Encoding is undone by requests,
+    gzipped payloads (.xml.gz) are inflated incrementally.
+    """
+    chunks = response.iter_content(STREAM_CHUNK_BYTES)
+    first = next(chunks, b"")
+
+    if first[:2] != GZIP_MAGIC:
+        yield first
+        yield from chunks
+        return
+
+    inflater = zlib.decompressobj(16 + zlib.MAX_WBITS)
+    yield inflater.decompress(first)
+    for chunk in chunks:
+        yield inflater.decompress(chunk)
+    yield inflater.flush()
+
+
+def _open_sitemap(url: str):
+    response = get_session().get(url, stream=True, timeout=DEFAULT_TIMEOUT)
+    response.raise_for_status()
+    return response, _ChunkReader(_iter_body(response))
+
+
+# ==================================================
+# Sitemap URL Source
+# ==================================================
+
+class SitemapSource:
+    """
+    Page URLs from one or more sitemaps, for extract_urls / the CLI.
+
+    - sitemap indexes are followed up to max_depth levels; a child
+      sitemap whose own lastmod predates since is not downloaded
+    - since: only entries with lastmod >= since (entries without a
+      lastmod are always kept, as they may have changed)
+    - robots: drop URLs the host's robots.txt disallows
+    - on_unchanged: called with each entry skipped by since (e.g. to
+      mark it as still listed in a scrape_state store)
+    - a site root (or bare host) is expanded to the Sitemap: lines of
+      its robots.txt, falling back to /sitemap.xml; such refs are kept
+      in site_roots, as only they list every page of their host
+    URLs are yielded lazily and deduplicated in canonical form.
+    """
+
+    def __init__(
+        self,
+        sitemaps: Iterable[str],
+        since: Optional[datetime] = None,
+        robots: Optional[RobotsCache] = None,
+        max_depth: int = DEFAULT_MAX_SITEMAP_DEPTH,
+        on_unchanged: Optional[Callable[[str], None]] = None,
+    ):
+        self.sitemaps = [s.strip() for s in sitemaps if s.strip()]
+        self.since = since
+        self.robots = robots
+        self.max_depth = max_depth
+        self.on_unchanged = on_unchanged
+        self.site_roots: List[str] = []
+
+        self.stats = {
+            "sitemaps": 0,
+            "sitemaps_skipped": 0,
+            "sitemaps_failed": 0,
+            "entries": 0,
+            "unchanged": 0,
+            "disallowed": 0,
+            "duplicates": 0,
+            "urls": 0,
+        }
+
+    def _expand(self, ref: str) -> List[str]:
+        parts = urlsplit(ref)
+        if parts.path not in ("", "/"):
+            return [ref]
+
+        self.site_roots.append(ref)
+        robots = self.robots or RobotsCache()
+        return robots.sitemaps(ref) or [urljoin(ref, "/sitemap.xml")]
+
+    def _changed(self, entry: SitemapEntry) -> bool:
+        return self.since is None or entry.lastmod is None or entry.lastmod >= self.since
+
+    def _iter_file(self, url: str, depth: int, visited: set) -> Iterator[SitemapEntry]:
+        key = canonical_url(url)
+        if key in visited:
+            return
+        visited.add(key)
+
+        children: List[str] = []
+        try:
+            response, stream = _open_sitemap(url)
+            self.stats["sitemaps"] += 1
+            with response:
+                for kind, entry in iter_sitemap_xml(stream):
+                    if kind == "url":
+                        self.stats["entries"] += 1
+                        yield entry
+                    elif depth < self.max_depth and self._changed(entry):
+                        children.append(urljoin(url, entry.loc))
+                    else:
+                        self.stats["sitemaps_skipped"] += 1
+        except Exception as e:
+            self.stats["sitemaps_failed"] += 1
+            print(f"Sitemap failed: {url} ({e})")
+
+        # Children after the parent is closed: one open stream at a time
+        for child in children:
+            yield from self._iter_file(child, depth + 1, visited)
+
+    def __iter__(self) -> Iterator[str]:
+        visited: set = set()
+        seen: set = set()
+
+        for ref in self.sitemaps:
+            for sitemap_url in self._expand(ref):
+                for entry in self._iter_file(sitemap_url, 0, visited):
+                    if not self._changed(entry):
+                        self.stats["unchanged"] += 1
+                        if self.on_unchanged is not None:
+                            self.on_unchanged(entry.loc)
+                        continue
+
+                    key = canonical_url(entry.loc)
+                    if key in seen:
+                        self.stats["duplicates"] += 1
+                        continue
+                    seen.add(key)
+
+                    if self.robots is not None and not self.robots.allowed(entry.loc):
+                        self.stats["disallowed"] += 1
+                        continue
+
+                    self.stats["urls"] += 1
+                    yield entry.loc
+
+
+def sitemap_urls(sitemaps: Iterable[str], **options) -> List[str]:
+    return list(SitemapSource(sitemaps, **options))
+
+
+# ==================================================
+# Last-Run State (for lastmod filtering)
+# ==================================================
+
+# Consecutive runs a URL may fail before it is no longer retried
+# (it is fetched again once its lastmod changes)
+DEFAULT_MAX_RETRY_RUNS = 3
+
+
+def load_last_run(path: Path) -> Optional[datetime]:
+    path = Path(path)
+    if not path.exists():
+        return None
+    data = json.loads(path.read_text(encoding="utf-8"))
+    return parse_lastmod(data.get("last_run"))
+
+
+def load_retry(path: Path) -> Dict[str, int]:
+    """
+    URLs that failed in earlier runs: {url: consecutive failed runs}.
+    They are fetched again whatever their lastmod says.
+    """
+    path = Path(path)
+    if not path.exists():
+        return {}
+    return json.loads(path.read_text(encoding="utf-8")).get("retry", {})
+
+
+def next_retry(
+    retry: Dict[str, int],
+    failed: Iterable[str],
+    max_runs: int = DEFAULT_MAX_RETRY_RUNS,
+) -> Dict[str, int]:
+    """
+    Retry list for the next run: this run's failed URLs with their
+    failure count, minus those that have failed max_runs times.
+    """
+    counts = {url: retry.get(url, 0) + 1 for url in failed}
+    return {url: n for url, n in counts.items() if n < max_runs}
+
+
+def save_last_run(path: Path, started: datetime, retry: Optional[Dict[str, int]] = None) -> None:
+    """
+    Records when a run started (not finished), so pages changed while
+    it ran are picked up next time, plus the URLs to retry.
+    """
+    path = Path(path)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp = path.with_name(path.name + ".tmp")
+    state = {"last_run": started.isoformat(), "retry": retry or {}}
+    tmp.write_text(json.dumps(state, indent=2), encoding="utf-8")
+    os.replace(tmp, path)
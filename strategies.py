@@ -1,7 +1,8 @@
-import requests
 from bs4 import BeautifulSoup
-from typing import Tuple
+from typing import Optional, Tuple
 from readability.readability import Document
+from fetcher import FetchedPage, fetch_page
+from browser_pool import BrowserPool, get_browser_pool
 
 
 # -----------------------------------
@@ -15,17 +16,9 @@ from readability.readability import Document
 # - Academic articles (HTML pages)
 # ----------------------------------
 
-def extract_static_html(url: str) -> Tuple[str, str, float]:
-    
-    response = requests.get(
-        url,
-        timeout=15,
-        verify=False,
-        headers={"User-Agent": "Mozilla/5.0"}
-    )
-    response.raise_for_status()
+def parse_static_html(page: FetchedPage) -> Tuple[str, str, float]:
 
-    doc = Document(response.text)
+    doc = Document(page.text)
     html = doc.summary()
 
     soup = BeautifulSoup(html, "lxml")
@@ -34,6 +27,14 @@ def extract_static_html(url: str) -> Tuple[str, str, float]:
     return text, "static_html", 0.9
 
 
+def extract_static_html(url: str, page: Optional[FetchedPage] = None) -> Tuple[str, str, float]:
+
+    if page is None:
+        page = fetch_page(url)
+
+    return parse_static_html(page)
+
+
 # --------------------------------------------------
 # Category 2: DOM-Based Extraction
 # --------------------------------------------------
@@ -44,17 +45,9 @@ def extract_static_html(url: str) -> Tuple[str, str, float]:
 # - Review & rating websites
 # --------------------------------------------------
 
-def extract_dom_based(url: str) -> Tuple[str, str, float]:
+def parse_dom_based(page: FetchedPage) -> Tuple[str, str, float]:
 
-    response = requests.get(
-        url,
-        timeout=15,
-        verify=False,
-        headers={"User-Agent": "Mozilla/5.0"}
-    )
-    response.raise_for_status()
-
-    soup = BeautifulSoup(response.text, "lxml")
+    soup = page.soup
 
     elements = soup.find_all(["p","li","h1","h2","h3"])
     text_parts = [el.get_text(strip=True) for el in elements if el.get_text(strip=True)]
@@ -64,6 +57,14 @@ def extract_dom_based(url: str) -> Tuple[str, str, float]:
     return text, "dom_based", 0.8
 
 
+def extract_dom_based(url: str, page: Optional[FetchedPage] = None) -> Tuple[str, str, float]:
+
+    if page is None:
+        page = fetch_page(url)
+
+    return parse_dom_based(page)
+
+
 # --------------------------------------------------
 # Category 3: JS-Rendered Pages (Browser-Based)
 # --------------------------------------------------
@@ -73,25 +74,46 @@ def extract_dom_based(url: str) -> Tuple[str, str, float]:
 # - Travel & hospitality sites (Booking, Airbnb)
 # --------------------------------------------------
 
-def extract_js_rendered(url: str) -> Tuple[str, str, float]:
-
-    from playwright.sync_api import sync_playwright
+def render_js_page(url: str) -> FetchedPage:
+    """
+    Renders a URL in the browser and wraps the DOM as a FetchedPage.
+    """
+    pool = get_browser_pool()
+
+    if pool is not None:
+        html = pool.render(url)
+    else:
+        # No shared pool configured: single-use browser for this URL
+        with BrowserPool(browsers=1, contexts_per_browser=1) as single:
+            html = single.render(url)
+
+    return FetchedPage(
+        url=url,
+        final_url=url,
+        status_code=200,
+        headers={},
+        content=html.encode("utf-8"),
+        encoding="utf-8",
+    )
 
-    with sync_playwright() as p:
-        browser = p.chromium.launch(headless=True)
-        page = browser.new_page()
-        page.goto(url, timeout=30000)
-        page.wait_for_load_state("networkidle")
 
-        html = page.content()
-        browser.close()
+def parse_js_rendered(page: FetchedPage) -> Tuple[str, str, float]:
 
-    soup = BeautifulSoup(html, "lxml")
+    soup = page.soup
     text = soup.get_text(separator=" ", strip =True)
 
     return text, "js_rendered", 0.7
 
 
+def extract_js_rendered(url: str, page: Optional[FetchedPage] = None) -> Tuple[str, str, float]:
+
+    # page here is a rendered DOM; a plain HTTP response is not enough
+    if page is None:
+        page = render_js_page(url)
+
+    return parse_js_rendered(page)
+
+
 # --------------------------------------------------
 # Strategy 4: API-Based Extraction (Placeholder)
 # --------------------------------------------------
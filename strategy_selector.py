@@ -0,0 +1,232 @@
+import sqlite3
+import threading
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+
+from scheduler import host_key
+
+
+# ==================================================
+# Strategy Ladder
+# ==================================================
+
+# Relative cost per page: static_html and dom_based parse the same plain
+# HTTP response, js_rendered needs a browser render
+STRATEGY_COST = {
+    "static_html": 1,
+    "dom_based": 2,
+    "js_rendered": 10,
+}
+
+LADDER = sorted(STRATEGY_COST, key=STRATEGY_COST.get)
+
+STRATEGY_DB_NAME = "strategy_stats.sqlite"
+
+DEFAULT_MIN_SAMPLES = 3          # attempts before a strategy's record counts
+DEFAULT_MIN_SUCCESS_RATE = 0.8   # share of attempts that must reach min_chars
+DEFAULT_DECAY = 0.9              # weight left to older attempts per new one
+
+
+@dataclass
+class StrategyDecision:
+    """
+    Strategy to try first for a URL, why, and (when it differs from the
+    heuristic choice) the heuristic strategy to escalate to if it falls
+    short.
+    """
+    strategy: str
+    reason: str                        # learned / explore / heuristic / best_effort
+    escalate_to: Optional[str] = None
+
+    def as_field(self) -> Dict[str, str]:
+        return {"strategy": self.strategy, "reason": self.reason}
+
+
+# (strategy, text chars, seconds) for one parser attempt
+Attempt = Tuple[str, int, float]
+
+
+# ==================================================
+# Learned Per-Domain Selector (SQLite)
+# ==================================================
+
+class StrategySelector:
+    """
+    Records, per domain and strategy, how often the extracted text
+    reached min_chars, the text yield and the time taken, and picks
+    the cheapest strategy that has recently been good enough.
+
+    - state_dir: persist outcomes across runs (in memory if None)
+    - min_samples / min_success_rate: when a strategy's record is
+      trusted; cheaper strategies with fewer attempts are explored
+      first. Whatever is chosen, a page that comes back too short is
+      escalated to the heuristic choice
+    - decay: each new attempt scales the weight of the earlier ones by
+      this factor, so a site that changes its markup is re-learned
+      within roughly 1 / (1 - decay) attempts
+    """
+
+    def __init__(
+        self,
+        state_dir: Optional[Path] = None,
+        min_chars: int = 300,
+        min_samples: int = DEFAULT_MIN_SAMPLES,
+        min_success_rate: float = DEFAULT_MIN_SUCCESS_RATE,
+        decay: float = DEFAULT_DECAY,
+    ):
+        self.min_chars = min_chars
+        self.min_samples = max(1, int(min_samples))
+        self.min_success_rate = min_success_rate
+        self.decay = decay
+
+        self._lock = threading.Lock()
+        if state_dir is not None:
+            Path(state_dir).mkdir(parents=True, exist_ok=True)
+            db_path = str(Path(state_dir) / STRATEGY_DB_NAME)
+        else:
+            db_path = ":memory:"
+
+        self._conn = sqlite3.connect(db_path, check_same_thread=False)
+        # weight, successes, chars and seconds are decayed sums; attempts
+        # is the plain count (for min_samples)
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS outcomes ("
+            " domain TEXT,"
+            " strategy TEXT,"
+            " attempts INTEGER,"
+            " successes REAL,"
+            " chars REAL,"
+            " seconds REAL,"
+            " weight REAL,"
+            " PRIMARY KEY (domain, strategy))"
+        )
+        columns = {row[1] for row in self._conn.execute("PRAGMA table_info(outcomes)")}
+        if "weight" not in columns:
+            # Stores written before outcomes decayed: plain sums
+            self._conn.execute("ALTER TABLE outcomes ADD COLUMN weight REAL")
+            self._conn.execute("UPDATE outcomes SET weight = attempts")
+        self._conn.commit()
+
+        self._outcomes: Dict[Tuple[str, str], List] = {
+            (row[0], row[1]): list(row[2:])
+            for row in self._conn.execute(
+                "SELECT domain, strategy, attempts, successes, chars, seconds, weight FROM outcomes"
+            )
+        }
+        self.counters = {
+            "learned": 0,
+            "explore": 0,
+            "heuristic": 0,
+            "best_effort": 0,
+            "escalations": 0,
+            "attempts": 0,
+        }
+        self.first_strategy = {s: 0 for s in LADDER}
+
+    # ----------------------------
+    # Selection
+    # ----------------------------
+
+    def _sampled(self, domain: str, strategy: str) -> Optional[float]:
+        """
+        Recency-weighted success rate, or None while under min_samples
+        attempts.
+        """
+        row = self._outcomes.get((domain, strategy))
+        if row is None or row[0] < self.min_samples:
+            return None
+        return row[1] / row[4]
+
+    def _decide(self, domain: str, heuristic: str) -> StrategyDecision:
+        rates = {s: self._sampled(domain, s) for s in LADDER}
+
+        for s in LADDER:
+            if rates[s] is not None and rates[s] >= self.min_success_rate:
+                return StrategyDecision(s, "learned")
+
+        for s in LADDER:
+            if STRATEGY_COST[s] >= STRATEGY_COST.get(heuristic, 0):
+                break
+            if rates[s] is None:
+                return StrategyDecision(s, "explore")
+
+        if heuristic in rates and rates[heuristic] is None:
+            return StrategyDecision(heuristic, "heuristic")
+
+        # Everything tried, nothing reliable: the least bad, cheapest first
+        tried = [s for s in LADDER if rates[s] is not None]
+        best = max(tried, key=lambda s: (rates[s], -STRATEGY_COST[s]))
+        return StrategyDecision(best, "best_effort")
+
+    def choose(self, url: str, heuristic: str) -> StrategyDecision:
+        with self._lock:
+            decision = self._decide(host_key(url), heuristic)
+            if decision.strategy != heuristic:
+                # A learned choice can go stale: thin pages still get
+                # the heuristic's strategy (e.g. its render)
+                decision.escalate_to = heuristic
+            self.counters[decision.reason] += 1
+            self.first_strategy[decision.strategy] += 1
+        return decision
+
+    # ----------------------------
+    # Outcomes
+    # ----------------------------
+
+    def record(self, url: str, attempts: List[Attempt]) -> None:
+        """
+        Adds the parser attempts made for one URL (in order; more than
+        one means the first strategy fell short and was escalated).
+        """
+        if not attempts:
+            return
+
+        domain = host_key(url)
+        with self._lock:
+            if len(attempts) > 1:
+                self.counters["escalations"] += 1
+
+            for strategy, chars, seconds in attempts:
+                row = self._outcomes.setdefault((domain, strategy), [0, 0.0, 0.0, 0.0, 0.0])
+                row[0] += 1
+                row[1] = row[1] * self.decay + (chars >= self.min_chars)
+                row[2] = row[2] * self.decay + chars
+                row[3] = row[3] * self.decay + seconds
+                row[4] = row[4] * self.decay + 1
+                self.counters["attempts"] += 1
+                self._conn.execute(
+                    "INSERT OR REPLACE INTO outcomes"
+                    " (domain, strategy, attempts, successes, chars, seconds, weight)"
+                    " VALUES (?,?,?,?,?,?,?)",
+                    (domain, strategy, *row),
+                )
+            self._conn.commit()
+
+    # ----------------------------
+    # Metrics
+    # ----------------------------
+
+    def domain_report(self) -> Dict[str, Dict[str, Dict]]:
+        """
+        {domain: {strategy: {attempts, success_rate, avg_chars, avg_ms}}}
+        (rates and averages weighted towards recent attempts)
+        """
+        report: Dict[str, Dict[str, Dict]] = {}
+        with self._lock:
+            for (domain, strategy), (attempts, successes, chars, seconds, weight) in sorted(self._outcomes.items()):
+                report.setdefault(domain, {})[strategy] = {
+                    "attempts": attempts,
+                    "success_rate": round(successes / weight, 2),
+                    "avg_chars": int(chars / weight),
+                    "avg_ms": round(seconds * 1000 / weight, 1),
+                }
+        return report
+
+    def stats(self) -> Dict:
+        with self._lock:
+            return {**self.counters, "first_strategy": dict(self.first_strategy)}
+
+    def close(self) -> None:
+        with self._lock:
+            self._conn.close()
@@ -0,0 +1,319 @@
+import asyncio
+import subprocess
+import sys
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+
+from browser_pool import BrowserPool, _ContextSlot, _browser_rss_mb, _is_blocked_host
+
+
+# ==================================================
+# Context Recycling (stub browser, no Playwright needed)
+# ==================================================
+
+class _StubTab:
+    async def goto(self, url, timeout, wait_until):
+        pass
+
+    async def content(self):
+        return "<html><body>rendered</body></html>"
+
+    async def close(self):
+        pass
+
+
+class _StubContext:
+    def __init__(self):
+        self.closed = False
+
+    async def new_page(self):
+        if self.closed:
+            raise RuntimeError("context closed")
+        return _StubTab()
+
+    async def close(self):
+        self.closed = True
+
+
+class _StubBrowser:
+    def __init__(self):
+        self.fail_new_context = False
+        self.connected = True
+
+    def is_connected(self):
+        return self.connected
+
+    async def new_context(self):
+        if self.fail_new_context or not self.connected:
+            raise RuntimeError("browser gone")
+        return _StubContext()
+
+    async def close(self):
+        self.connected = False
+
+
+class _StubChromium:
+    def __init__(self):
+        self.launched = []
+
+    async def launch(self, headless):
+        browser = _StubBrowser()
+        self.launched.append(browser)
+        return browser
+
+
+class _StubPlaywright:
+    def __init__(self):
+        self.chromium = _StubChromium()
+
+
+def _stub_pool(browser):
+    pool = BrowserPool(recycle_after=1, blocked_resource_types=(), blocked_domains=())
+
+    async def ready(tab, deadline):
+        pass
+
+    pool._wait_until_ready = ready
+    pool._browsers = [browser]
+    pool._playwright = _StubPlaywright()
+    return pool
+
+
+def test_failed_recycle_keeps_html_and_rebuilds_slot():
+    browser = _StubBrowser()
+    pool = _stub_pool(browser)
+
+    async def scenario():
+        pool._slots = asyncio.Queue()
+        pool._relaunch_lock = asyncio.Lock()
+        slot = _ContextSlot(browser, await browser.new_context())
+        pool._slots.put_nowait(slot)
+
+        # The page renders, then recycling fails: the HTML still comes back
+        browser.fail_new_context = True
+        html = await pool._render("http://example.test/", 1000)
+        assert "rendered" in html
+        assert slot.context is None
+        assert pool._slots.qsize() == 1
+
+        # The next borrow rebuilds the context instead of reusing a closed one
+        browser.fail_new_context = False
+        html = await pool._render("http://example.test/", 1000)
+        assert "rendered" in html
+
+    asyncio.run(scenario())
+    stats = pool.stats()
+    assert stats["recycle_failures"] == 1
+    assert stats["contexts_recycled"] == 1
+
+
+def test_crashed_browser_is_relaunched_once():
+    browser = _StubBrowser()
+    pool = _stub_pool(browser)
+    pool.recycle_after = 100
+
+    async def scenario():
+        pool._slots = asyncio.Queue()
+        pool._relaunch_lock = asyncio.Lock()
+        for _ in range(2):
+            pool._slots.put_nowait(_ContextSlot(browser, await browser.new_context()))
+
+        browser.connected = False
+        for _ in range(3):
+            html = await pool._render("http://example.test/", 1000)
+            assert "rendered" in html
+
+    asyncio.run(scenario())
+    assert len(pool._playwright.chromium.launched) == 1
+    assert pool._browsers[0] is pool._playwright.chromium.launched[0]
+    assert pool.stats()["browser_relaunches"] == 1
+
+
+def test_browser_rss_counts_child_processes():
+    before = _browser_rss_mb()
+    if before is None:
+        pytest.skip("process memory not measurable on this platform")
+
+    # A child holding ~50 MB shows up in the descendants' RSS
+    child = subprocess.Popen([
+        sys.executable, "-c",
+        "import sys, time; b = bytearray(50 * 1024 * 1024); sys.stdout.write('ready\\n'); sys.stdout.flush(); time.sleep(30)",
+    ], stdout=subprocess.PIPE)
+    try:
+        assert child.stdout.readline() == b"ready\n"
+        assert _browser_rss_mb() - before >= 40
+    finally:
+        child.kill()
+        child.wait()
+
+
+# ==================================================
+# Request Blocking (stub route)
+# ==================================================
+
+class _StubRequest:
+    def __init__(self, url, resource_type):
+        self.url = url
+        self.resource_type = resource_type
+
+
+class _StubRoute:
+    def __init__(self, url, resource_type):
+        self.request = _StubRequest(url, resource_type)
+        self.action = None
+
+    async def abort(self):
+        self.action = "abort"
+
+    async def continue_(self):
+        self.action = "continue"
+
+
+def test_is_blocked_host_matches_subdomains_only():
+    domains = ("doubleclick.net",)
+    assert _is_blocked_host("https://doubleclick.net/x.js", domains)
+    assert _is_blocked_host("https://ad.g.DoubleClick.net/x.js", domains)
+    assert not _is_blocked_host("https://notdoubleclick.net/x.js", domains)
+    assert not _is_blocked_host("https://example.com/doubleclick.net", domains)
+
+
+def test_route_aborts_heavy_resources_and_tracker_hosts():
+    pool = BrowserPool()
+    cases = [
+        ("http://127.0.0.1/a.png", "image", "abort"),
+        ("http://127.0.0.1/a.css", "stylesheet", "abort"),
+        ("http://127.0.0.1/a.woff2", "font", "abort"),
+        ("http://127.0.0.1/a.mp4", "media", "abort"),
+        ("https://www.googletagmanager.com/gtm.js", "script", "abort"),
+        ("http://127.0.0.1/app.js", "script", "continue"),
+        ("http://127.0.0.1/", "document", "continue"),
+        ("http://127.0.0.1/api/items", "fetch", "continue"),
+    ]
+
+    async def scenario():
+        for url, resource_type, expected in cases:
+            route = _StubRoute(url, resource_type)
+            await pool._route(route)
+            assert route.action == expected, url
+
+    asyncio.run(scenario())
+    assert pool.stats()["requests_blocked"] == 5
+
+
+# ==================================================
+# Fixture Pages (real Chromium)
+# ==================================================
+#
+# Served from a local http.server:
+#   /late.html     inserts its article 300 ms after load and keeps a
+#                  request to /hang open, so the network never goes idle
+#   /heavy.html    references an image, stylesheet, font and a tracker
+#                  script next to its text
+#   /never.html    never shows the content selector
+
+LATE_TEXT = "Late article text. " * 40
+
+FIXTURE_PAGES = {
+    "/late.html": (
+        "<html><body><div id='app'></div><script>"
+        "fetch('/hang');"
+        "setTimeout(function () {"
+        " var a = document.createElement('article');"
+        f" a.textContent = {LATE_TEXT!r};"
+        " document.getElementById('app').appendChild(a);"
+        "}, 300);"
+        "</script></body></html>"
+    ),
+    "/heavy.html": (
+        "<html><head>"
+        "<link rel='stylesheet' href='/style.css'>"
+        "<style>@font-face { font-family: F; src: url('/font.woff2'); }"
+        " body { font-family: F; }</style>"
+        "<script src='https://www.googletagmanager.com/gtm.js'></script>"
+        "</head><body><img src='/photo.png'>"
+        "<article>Heavy page text that must survive blocking.</article>"
+        "</body></html>"
+    ),
+    "/never.html": "<html><body><p>No article here.</p></body></html>",
+}
+
+
+@pytest.fixture(scope="module")
+def fixture_site():
+    requested = []
+
+    class Handler(BaseHTTPRequestHandler):
+        def log_message(self, *args):
+            pass
+
+        def do_GET(self):
+            requested.append(self.path)
+            if self.path == "/hang":
+                time.sleep(5)
+            body = FIXTURE_PAGES.get(self.path, "").encode("utf-8")
+            self.send_response(200)
+            self.send_header("Content-Type", "text/html; charset=utf-8")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            try:
+                self.wfile.write(body)
+            except OSError:
+                pass
+
+    server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    yield f"http://127.0.0.1:{server.server_port}", requested
+    server.shutdown()
+
+
+@pytest.fixture(scope="module")
+def chromium():
+    pytest.importorskip("playwright")
+    try:
+        pool = BrowserPool(contexts_per_browser=1, content_selector="article").start()
+    except Exception as e:  # Chromium not installed (playwright install chromium)
+        pytest.skip(f"Chromium unavailable: {e}")
+    yield pool
+    pool.close()
+
+
+def test_content_readiness_returns_before_network_idle(fixture_site, chromium):
+    origin, _ = fixture_site
+
+    started = time.monotonic()
+    html = chromium.render(f"{origin}/late.html", timeout_ms=4000)
+    elapsed = time.monotonic() - started
+
+    assert "Late article text." in html
+    # /hang keeps the network busy for 5 s; content readiness does not wait for it
+    assert elapsed < 3
+
+
+def test_readiness_deadline_returns_page_as_is(fixture_site, chromium):
+    origin, _ = fixture_site
+    before = chromium.stats()["deadline_hits"]
+
+    started = time.monotonic()
+    html = chromium.render(f"{origin}/never.html", timeout_ms=1000)
+    elapsed = time.monotonic() - started
+
+    assert "No article here." in html
+    assert elapsed < 3
+    assert chromium.stats()["deadline_hits"] == before + 1
+
+
+def test_heavy_resources_are_never_requested(fixture_site, chromium):
+    origin, requested = fixture_site
+    before = chromium.stats()["requests_blocked"]
+
+    html = chromium.render(f"{origin}/heavy.html", timeout_ms=4000)
+
+    assert "Heavy page text that must survive blocking." in html
+    assert "/heavy.html" in requested
+    for path in ("/style.css", "/font.woff2", "/photo.png"):
+        assert path not in requested
+    assert chromium.stats()["requests_blocked"] - before >= 3
@@ -0,0 +1,32 @@
+import pytest
+
+from cleaner import CleaningEngine
+
+BODY = "Plain article sentence with enough words to pass the length checks. " * 3
+
+
+def test_rules_with_groups_and_flags_are_matched_on_their_own():
+    rules = [
+        r"\bnewsletter\b",
+        r"\bbuy now\b!",
+        r"\b(\w+) \1\b",
+        r"(?P<deal>limited offer)",
+        r"(?i)cookie banner",
+    ]
+    engine = CleaningEngine(rules)
+
+    assert engine.match_rule("see our newsletter") == rules[0]
+    assert engine.match_rule("buy now!") == rules[1]
+    assert engine.match_rule("click click here") == rules[2]
+    assert engine.match_rule("a limited offer today") == rules[3]
+    assert engine.match_rule("the cookie banner") == rules[4]
+    assert engine.match_rule(BODY.lower()) is None
+
+    kept = engine.clean_batch([{"text": BODY}, {"text": "Tap tap " + BODY}])
+    assert [r["text"] for r in kept] == [BODY.strip()]
+    assert engine.stats["rule_hits"][rules[2]] == 1
+
+
+def test_invalid_rule_names_the_rule():
+    with pytest.raises(ValueError, match=r"Invalid cleaning rule '\(broken'"):
+        CleaningEngine([r"(broken"])
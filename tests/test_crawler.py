@@ -0,0 +1,122 @@
+import pytest
+
+import mock_site
+from crawler import Crawler
+from robots import RobotsCache
+
+
+@pytest.fixture
+def site():
+    server = mock_site.serve(0, pages=30, latency=0)
+    yield server
+    server.shutdown()
+
+
+def _origin(server):
+    return f"http://127.0.0.1:{server.server_port}"
+
+
+def _requested(server):
+    return [entry["path"] for entry in server.state.log]
+
+
+def _crawl(server, **options):
+    options.setdefault("crawl_delay", 0)
+    crawler = Crawler([f"{_origin(server)}/"], **options)
+    urls = [url for url, _ in crawler]
+    return crawler, urls
+
+
+# ==================================================
+# Frontier
+# ==================================================
+
+def test_fragments_and_query_variants_are_fetched_once(site):
+    crawler, urls = _crawl(site, max_pages=100, max_depth=10)
+
+    paths = _requested(site)
+    assert len(paths) == len(set(paths))
+    # "?b=2&a=1" and "?a=1&b=2" are the same page; "#details" is not requested
+    query_variants = [p for p in paths if "?" in p]
+    assert len(query_variants) <= len({p.split("?")[0] for p in query_variants})
+    assert not any("#" in p for p in paths)
+    assert crawler.stats["duplicates"] > 0
+    assert len(urls) == crawler.stats["pages"]
+
+
+def test_max_pages_is_a_hard_budget(site):
+    crawler, urls = _crawl(site, max_pages=5, max_depth=10)
+
+    assert len(urls) == 5
+    assert len(_requested(site)) == 5
+    assert crawler.stats["pending"] > 0
+    assert crawler.expected_total() == 5
+
+
+def test_max_depth_zero_fetches_only_the_seed(site):
+    _, urls = _crawl(site, max_pages=100, max_depth=0)
+
+    assert urls == [f"{_origin(site)}/"]
+
+
+# ==================================================
+# Same-Site Filtering
+# ==================================================
+
+def test_off_site_links_are_never_queued(site):
+    crawler, urls = _crawl(site, max_pages=100, max_depth=10)
+
+    assert all(url.startswith(_origin(site)) for url in urls)
+    assert crawler.stats["off_site"] > 0
+    # mailto: and .pdf links are dropped before they reach the frontier
+    assert not any(p.endswith(".pdf") for p in _requested(site))
+
+
+# ==================================================
+# robots.txt
+# ==================================================
+
+def test_robots_disallowed_pages_are_never_requested(site):
+    crawler, _ = _crawl(site, max_pages=100, max_depth=10, robots=RobotsCache())
+
+    paths = _requested(site)
+    assert "/docs/page-7.html" not in paths
+    assert not any(p.startswith("/private/") for p in paths)
+    # page-7 is linked from page-1, so the crawl did reach it
+    assert "/docs/page-1.html" in paths
+    assert crawler.stats["robots_disallowed"] > 0
+
+
+def test_without_robots_disallowed_pages_are_crawled(site):
+    _crawl(site, max_pages=100, max_depth=10)
+
+    assert "/docs/page-7.html" in _requested(site)
+
+
+# ==================================================
+# Politeness
+# ==================================================
+
+def _gaps(server):
+    times = [entry["at"] for entry in server.state.log]
+    return [b - a for a, b in zip(times, times[1:])]
+
+
+def test_crawl_delay_spaces_requests_to_one_host(site):
+    _crawl(site, max_pages=4, max_depth=10, crawl_delay=0.3, max_workers=4)
+
+    gaps = _gaps(site)
+    assert len(gaps) == 3
+    assert min(gaps) >= 0.3 - 0.05
+
+
+def test_robots_crawl_delay_overrides_a_shorter_delay():
+    server = mock_site.serve(0, pages=30, latency=0, crawl_delay=1)
+    try:
+        _crawl(server, max_pages=3, max_depth=10, robots=RobotsCache(), max_workers=4)
+        gaps = _gaps(server)
+    finally:
+        server.shutdown()
+
+    assert len(gaps) == 2
+    assert min(gaps) >= 1.0 - 0.05
@@ -0,0 +1,49 @@
+import gzip
+
+from dataset_appender import _file_shards, append_jsonl_datasets
+from json_codec import dumps_line, loads
+
+
+def _lines(n):
+    return [dumps_line({"text": f"Record number {i % 40} of the input."}) for i in range(n)]
+
+
+def test_compressed_input_is_split_into_bounded_chunks(tmp_path):
+    path = tmp_path / "in.jsonl.gz"
+    lines = _lines(200)
+    with gzip.open(path, "wb") as f:
+        f.writelines(lines)
+
+    chunk_bytes = 1024
+    shards = list(_file_shards(path, chunk_bytes))
+    assert len(shards) > 1
+    longest = max(map(len, lines))
+    for _, batch in shards:
+        assert sum(map(len, batch)) < chunk_bytes + longest
+    assert [raw for _, batch in shards for raw in batch] == lines
+
+
+def test_parallel_append_matches_serial(tmp_path):
+    plain = tmp_path / "a.jsonl"
+    plain.write_bytes(b"".join(_lines(150)) + b"not json\n\n")
+    compressed = tmp_path / "b.jsonl.gz"
+    with gzip.open(compressed, "wb") as f:
+        f.writelines(_lines(300))
+
+    outputs = {}
+    for workers in (0, 2):
+        out = tmp_path / f"out-{workers}.jsonl"
+        stats = append_jsonl_datasets(
+            [plain, compressed],
+            out,
+            add_dataset_source=True,
+            workers=workers,
+            chunk_bytes=2048,
+        )
+        outputs[workers] = (out.read_bytes(), stats["skipped_invalid"], stats["skipped_duplicates"])
+
+    assert outputs[0] == outputs[2]
+    data, invalid, duplicates = outputs[0]
+    assert invalid == 1
+    assert duplicates == 450 - 40
+    assert [loads(line)["dataset_source"] for line in data.splitlines()] == ["a.jsonl"] * 40
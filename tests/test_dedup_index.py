@@ -0,0 +1,185 @@
+import pytest
+
+import dataset_appender
+from dataset_appender import append_jsonl_datasets
+from dedup_index import (
+    BloomDedupIndex,
+    CompactDedupIndex,
+    DEDUP_BACKENDS,
+    SqliteDedupIndex,
+    make_dedup_index,
+    text_digest,
+)
+from json_codec import dumps_line
+
+
+def _input(path, texts):
+    path.write_bytes(b"".join(dumps_line({"text": t}) for t in texts))
+    return path
+
+
+# ==================================================
+# All Backends
+# ==================================================
+
+@pytest.mark.parametrize("backend", DEDUP_BACKENDS)
+def test_backends_agree_on_duplicates(backend, tmp_path):
+    index = make_dedup_index(backend, tmp_path / "seen", expected_records=1000)
+    texts = [f"text {i % 300}" for i in range(900)]
+
+    added = [index.add(text_digest(t, index.digest_size)) for t in texts]
+    assert added == [i < 300 for i in range(900)]
+    assert len(index) == 300
+    index.close()
+
+
+def test_make_dedup_index_rejects_bad_options(tmp_path):
+    with pytest.raises(ValueError, match="Unknown dedup backend"):
+        make_dedup_index("btree")
+    with pytest.raises(ValueError, match="needs a path"):
+        make_dedup_index("sqlite")
+    with pytest.raises(ValueError, match="8- or 16-byte"):
+        make_dedup_index("compact", digest_size=12)
+    with pytest.raises(ValueError, match="false-positive rate"):
+        make_dedup_index("bloom", fp_rate=1.0)
+
+
+# ==================================================
+# Compact Backend
+# ==================================================
+
+@pytest.mark.parametrize("digest_size", [8, 16])
+def test_compact_keeps_every_digest_when_growing(digest_size):
+    index = CompactDedupIndex(digest_size, initial_capacity=4)
+    digests = [text_digest(str(i), digest_size) for i in range(1000)]
+
+    assert all(index.add(d) for d in digests)
+    assert not any(index.add(d) for d in digests)
+    assert len(index) == 1000
+    assert index._count <= index._capacity * index.MAX_LOAD
+
+
+def test_compact_accepts_the_zero_digest():
+    index = CompactDedupIndex(8)
+
+    assert index.add(bytes(8))
+    assert not index.add(bytes(8))
+    assert len(index) == 1
+
+
+# ==================================================
+# Bloom Backend
+# ==================================================
+
+def test_bloom_round_trips_through_a_file(tmp_path):
+    path = tmp_path / "seen.bloom"
+    index = BloomDedupIndex(expected_records=1000, path=path)
+    for i in range(100):
+        index.add(text_digest(str(i), 16))
+    index.save()
+
+    loaded = make_dedup_index("bloom", path)
+    assert (loaded.num_bits, loaded.num_hashes, len(loaded)) == (index.num_bits, index.num_hashes, 100)
+    assert not any(loaded.add(text_digest(str(i), 16)) for i in range(100))
+    assert loaded.add(text_digest("new", 16))
+    assert len(loaded) == 101
+
+
+def test_bloom_load_rejects_other_files(tmp_path):
+    path = tmp_path / "seen.bloom"
+    path.write_bytes(bytes(BloomDedupIndex._HEADER.size))
+
+    with pytest.raises(ValueError, match="Not a Bloom filter file"):
+        BloomDedupIndex.load(path)
+
+
+def test_bloom_false_positive_rate_stays_near_target():
+    index = BloomDedupIndex(expected_records=10_000, fp_rate=0.01)
+    for i in range(10_000):
+        index.add(text_digest(f"seen {i}", 16))
+
+    full = bytes(index._bits)
+    false_positives = 0
+    for i in range(2000):
+        false_positives += not index.add(text_digest(f"new {i}", 16))
+        index._bits[:] = full    # probe the full filter, not one growing with every probe
+
+    assert false_positives < 60
+
+
+def test_failed_append_does_not_save_the_bloom_filter(tmp_path, monkeypatch):
+    source = _input(tmp_path / "in.jsonl", [f"text {i}" for i in range(5)])
+    output = tmp_path / "out.jsonl"
+    bloom = tmp_path / "seen.bloom"
+    options = {"dedup_backend": "bloom", "dedup_path": bloom, "expected_records": 1000}
+
+    def failing_write(self, line, summary):
+        raise OSError("disk full")
+
+    with monkeypatch.context() as m:
+        m.setattr(dataset_appender.IndexedJsonlFile, "write", failing_write)
+        with pytest.raises(OSError):
+            append_jsonl_datasets([source], output, **options)
+    assert not bloom.exists()
+
+    stats = append_jsonl_datasets([source], output, **options)
+    assert stats["written_records"] == 5
+    assert bloom.exists()
+
+    # The saved filter deduplicates the next append
+    stats = append_jsonl_datasets([source], output, **options)
+    assert stats["written_records"] == 0
+    assert stats["skipped_duplicates"] == 5
+
+
+# ==================================================
+# SQLite Backend
+# ==================================================
+
+def test_sqlite_keeps_digests_only_when_saved(tmp_path):
+    db = tmp_path / "seen.sqlite"
+
+    index = SqliteDedupIndex(db)
+    assert index.add(text_digest("a"))
+    index.close()
+    assert len(SqliteDedupIndex(db)) == 0
+
+    index = SqliteDedupIndex(db)
+    assert index.add(text_digest("a"))
+    assert not index.add(text_digest("a"))
+    index.save()
+    index.close()
+
+    index = SqliteDedupIndex(db)
+    assert not index.add(text_digest("a"))
+    index.close()
+
+
+def test_failed_append_does_not_persist_sqlite_digests(tmp_path, monkeypatch):
+    source = _input(tmp_path / "in.jsonl", [f"text {i}" for i in range(5)])
+    output = tmp_path / "out.jsonl"
+    db = tmp_path / "seen.sqlite"
+    options = {"dedup_backend": "sqlite", "dedup_path": db}
+
+    write = dataset_appender.IndexedJsonlFile.write
+    calls = []
+
+    def failing_write(self, line, summary):
+        calls.append(line)
+        if len(calls) == 3:
+            raise OSError("disk full")
+        write(self, line, summary)
+
+    monkeypatch.setattr(dataset_appender.IndexedJsonlFile, "write", failing_write)
+    with pytest.raises(OSError):
+        append_jsonl_datasets([source], output, **options)
+    monkeypatch.undo()
+
+    # The rerun writes every record instead of dropping them as seen
+    stats = append_jsonl_datasets([source], output, **options)
+    assert stats["written_records"] == 5
+    assert stats["skipped_duplicates"] == 0
+
+    stats = append_jsonl_datasets([source], output, **options)
+    assert stats["written_records"] == 0
+    assert stats["skipped_duplicates"] == 5
@@ -0,0 +1,75 @@
+import pytest
+
+import mock_site
+from job_manifest import JobManifest, job_path_for
+from pipeline import iter_jsonl, run_pipeline
+
+
+@pytest.fixture
+def site():
+    server = mock_site.serve(0, pages=8, latency=0)
+    yield f"http://127.0.0.1:{server.server_port}"
+    server.shutdown()
+
+
+class _Interrupted(Exception):
+    pass
+
+
+def _records(output):
+    return [{k: v for k, v in r.items() if k != "scraped_at"} for r in iter_jsonl(output)]
+
+
+def _run(urls, output, progress=None):
+    job = JobManifest(output)
+    job.start(urls, {})
+    try:
+        return run_pipeline(job.urls, output, shard_records=5, job=job, progress=progress)
+    finally:
+        job.close()
+
+
+def test_resumed_job_matches_uninterrupted_run(site, tmp_path):
+    urls = [f"{site}/docs/page-{n}.html" for n in range(8)]
+    urls.insert(3, urls[1])
+
+    reference = tmp_path / "reference.jsonl"
+    _run(urls, reference)
+    expected = _records(reference)
+
+    def interrupt(done, total, url):
+        if done == 5:
+            raise _Interrupted(url)
+
+    output = tmp_path / "out.jsonl"
+    with pytest.raises(_Interrupted):
+        _run(urls, output, progress=interrupt)
+
+    job = JobManifest.open(output)
+    assert len(job.urls) == 8
+    try:
+        run_pipeline(job.urls, output, shard_records=5, job=job)
+    finally:
+        job.close()
+
+    assert _records(output) == expected
+    assert JobManifest.open(output).status_counts() == {"pending": 0, "done": 8, "failed": 0}
+
+
+def test_load_skips_unreadable_lines_before_the_torn_tail(tmp_path):
+    output = tmp_path / "out.jsonl"
+    job = JobManifest(output)
+    job.start(["http://a.test/1", "http://a.test/2", "http://a.test/3"], {})
+    job.url_finished("http://a.test/1", 0)
+    job.finish()
+    job.close()
+
+    path = job_path_for(output)
+    lines = path.read_bytes().splitlines(keepends=True)
+    path.write_bytes(lines[0] + b'{"urls": [{"url"\n' + b"".join(lines[1:]) + b'{"urls": [')
+
+    job = JobManifest.open(output)
+    assert job.complete
+    assert job.pending() == ["http://a.test/2", "http://a.test/3"]
+    job.close()
+    assert path.read_bytes().endswith(b'{"complete":true}\n')
@@ -0,0 +1,142 @@
+import pytest
+
+from json_codec import dumps_line
+from jsonl_index import (
+    IndexedJsonlFile,
+    JsonlIndex,
+    JsonlIndexError,
+    build_index,
+    index_path_for,
+    open_index,
+    record_summary,
+)
+
+
+RECORDS = [
+    {"url": "https://example.com/a", "text": "short", "site_type": "blog", "confidence": 0.9},
+    {"url": "https://example.com/b", "text": "a little longer", "site_type": "docs", "confidence": 0.5},
+    {"url": "https://example.com/c", "text": "ünïcödé text", "site_type": "blog"},
+    {"url": "https://example.com/d", "text": ""},
+]
+
+
+def _write(path, records=RECORDS, **options):
+    with IndexedJsonlFile(path, **options) as out:
+        for record in records:
+            out.write(dumps_line(record), record_summary(record))
+    return path
+
+
+# ==================================================
+# Writing
+# ==================================================
+
+def test_written_file_gets_an_index(tmp_path):
+    path = _write(tmp_path / "out.jsonl")
+
+    assert index_path_for(path).exists()
+    with JsonlIndex(path) as index:
+        assert len(index) == len(RECORDS)
+        assert [index[i] for i in range(len(index))] == RECORDS
+        assert index[-1] == RECORDS[-1]
+        assert index.raw(2) == dumps_line(RECORDS[2])
+        with pytest.raises(IndexError):
+            index[len(RECORDS)]
+
+
+def test_batched_writes_index_the_same_offsets(tmp_path):
+    single = _write(tmp_path / "single.jsonl")
+    batched = tmp_path / "batched.jsonl"
+    with IndexedJsonlFile(batched) as out:
+        out.write_batch([dumps_line(r) for r in RECORDS], [record_summary(r) for r in RECORDS])
+
+    assert batched.read_bytes() == single.read_bytes()
+    assert index_path_for(batched).read_bytes() == index_path_for(single).read_bytes()
+
+
+def test_compressed_output_has_no_index(tmp_path):
+    path = _write(tmp_path / "out.jsonl.gz")
+    index_path_for(path).write_bytes(b"left over")
+
+    _write(path)
+    assert not index_path_for(path).exists()
+
+
+def test_failed_write_leaves_no_index(tmp_path):
+    path = tmp_path / "out.jsonl"
+
+    with pytest.raises(RuntimeError):
+        with IndexedJsonlFile(path) as out:
+            out.write(dumps_line(RECORDS[0]), record_summary(RECORDS[0]))
+            raise RuntimeError("interrupted")
+
+    assert not index_path_for(path).exists()
+    assert not list(tmp_path.glob("*.tmp"))
+
+
+# ==================================================
+# Summary Columns
+# ==================================================
+
+def test_summaries_and_stats_come_from_the_index(tmp_path):
+    path = _write(tmp_path / "out.jsonl")
+
+    with JsonlIndex(path) as index:
+        assert index.summary(0) == (0.9, "blog", 5)
+        assert index.summary(3) == (None, None, 0)
+        assert index.site_type_counts() == {"blog": 2, "docs": 1, "unknown": 1}
+
+        stats = index.stats()
+        assert stats["records"] == 4
+        assert stats["bytes"] == path.stat().st_size
+        assert stats["text_length"]["max"] == len("a little longer")
+        assert stats["text_length"]["p50"] == len("short")
+        assert stats["confidence"] == {"records_with_confidence": 2, "min": 0.5, "max": 0.9, "mean": 0.7}
+
+
+def test_sample_is_reproducible(tmp_path):
+    path = _write(tmp_path / "out.jsonl")
+
+    with JsonlIndex(path) as index:
+        assert index.sample(2, seed=1) == index.sample(2, seed=1)
+        assert sorted(r["url"] for r in index.sample(10)) == [r["url"] for r in RECORDS]
+
+
+# ==================================================
+# Stale And Missing Indexes
+# ==================================================
+
+def test_stale_index_is_rejected(tmp_path):
+    path = _write(tmp_path / "out.jsonl")
+    with open(path, "ab") as f:
+        f.write(dumps_line({"text": "appended without the index"}))
+
+    with pytest.raises(JsonlIndexError, match="stale"):
+        JsonlIndex(path)
+
+    with open_index(path, build=True) as index:
+        assert len(index) == len(RECORDS) + 1
+        assert index[-1] == {"text": "appended without the index"}
+
+
+def test_missing_index_is_built_on_request(tmp_path):
+    path = tmp_path / "out.jsonl"
+    path.write_bytes(b"".join(dumps_line(r) for r in RECORDS) + b"\n{broken\n")
+
+    with pytest.raises(JsonlIndexError, match="No index"):
+        open_index(path)
+
+    assert build_index(path) == index_path_for(path)
+    with open_index(path) as index:
+        # Blank lines are skipped, unparseable ones kept with empty columns
+        assert len(index) == len(RECORDS) + 1
+        assert index.summary(-1) == (None, None, 0)
+        assert index[1] == RECORDS[1]
+
+
+def test_empty_file_can_be_indexed(tmp_path):
+    path = _write(tmp_path / "out.jsonl", records=[])
+
+    with JsonlIndex(path) as index:
+        assert len(index) == 0
+        assert index.stats()["text_length"] == {"records": 0}
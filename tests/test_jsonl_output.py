@@ -0,0 +1,122 @@
+import gzip
+import hashlib
+
+import pytest
+
+from json_codec import dumps_line, loads
+from jsonl_index import PART_SUFFIX, index_path_for, record_summary
+from jsonl_output import (
+    manifest_path_for,
+    open_jsonl_output,
+    output_files,
+    read_manifest,
+    shard_path,
+)
+from pipeline import iter_jsonl
+
+
+def _records(n):
+    return [{"text": f"record {i}", "site_type": "docs", "confidence": 0.5} for i in range(n)]
+
+
+def _write(path, records, **options):
+    writer = open_jsonl_output(path, **options)
+    with writer:
+        for record in records:
+            writer.write(dumps_line(record), record_summary(record))
+    return writer
+
+
+# ==================================================
+# Sharded Output
+# ==================================================
+
+def test_shards_rotate_and_manifest_matches_disk(tmp_path):
+    path = tmp_path / "out.jsonl"
+    _write(path, _records(10), shard_records=4)
+
+    manifest = read_manifest(path)
+    assert manifest["records"] == 10
+    assert [s["records"] for s in manifest["shards"]] == [4, 4, 2]
+    for number, entry in enumerate(manifest["shards"]):
+        shard = shard_path(path, number)
+        assert entry["path"] == shard.name
+        assert entry["sha256"] == hashlib.sha256(shard.read_bytes()).hexdigest()
+        assert index_path_for(shard).exists()
+
+    assert not path.exists()
+    assert [r["text"] for r in iter_jsonl(path)] == [f"record {i}" for i in range(10)]
+
+
+def test_gzip_shards_have_no_index(tmp_path):
+    path = tmp_path / "out.jsonl.gz"
+    _write(path, _records(5), shard_records=3)
+
+    shard = shard_path(path, 0)
+    assert shard.name == "out-00000.jsonl.gz"
+    assert not index_path_for(shard).exists()
+    with gzip.open(shard, "rb") as f:
+        assert [loads(line)["text"] for line in f] == ["record 0", "record 1", "record 2"]
+    assert len(list(iter_jsonl(path))) == 5
+
+
+def test_zstd_shards_round_trip(tmp_path):
+    pytest.importorskip("zstandard")
+    path = tmp_path / "out.jsonl.zst"
+    _write(path, _records(5), shard_records=2)
+    assert read_manifest(path)["codec"] == "zstd"
+    assert len(list(iter_jsonl(path))) == 5
+
+
+def test_failed_shard_leaves_no_partial_file(tmp_path):
+    path = tmp_path / "out.jsonl"
+    with pytest.raises(RuntimeError):
+        writer = open_jsonl_output(path, shard_records=10)
+        with writer:
+            for record in _records(3):
+                writer.write(dumps_line(record), record_summary(record))
+            assert shard_path(path, 0).with_name("out-00000.jsonl" + PART_SUFFIX).exists()
+            raise RuntimeError("interrupted")
+
+    assert list(tmp_path.iterdir()) == []
+
+
+# ==================================================
+# Output of Earlier Runs
+# ==================================================
+
+def test_only_manifest_listed_shards_are_removed(tmp_path):
+    path = tmp_path / "crawl.jsonl"
+    user_files = [tmp_path / "crawl-20261014.jsonl", tmp_path / "crawl-20261015.jsonl"]
+    for f in user_files:
+        f.write_text("{}\n")
+
+    _write(path, _records(9), shard_records=3)
+    _write(path, _records(4), shard_records=3)
+
+    assert not shard_path(path, 2).exists()
+    assert read_manifest(path)["records"] == 4
+    assert len(list(iter_jsonl(path))) == 4
+    for f in user_files:
+        assert f.exists()
+
+
+def test_unsharded_output_deletes_nothing(tmp_path):
+    path = tmp_path / "crawl.jsonl"
+    user_file = tmp_path / "crawl-20261015.jsonl"
+    user_file.write_text("{}\n")
+    _write(path, _records(6), shard_records=3)
+
+    _write(path, _records(2))
+
+    assert user_file.exists()
+    assert shard_path(path, 0).exists()
+    assert manifest_path_for(path).exists()
+    assert output_files(path) == [path]
+    assert len(list(iter_jsonl(path))) == 2
+
+    # A later sharded run replaces the unsharded file again
+    _write(path, _records(3), shard_records=3)
+    assert not path.exists()
+    assert not shard_path(path, 1).exists()
+    assert len(list(iter_jsonl(path))) == 3
@@ -0,0 +1,27 @@
+from json_codec import dumps_line
+from qa_cache import QACheckpoint
+
+
+def _entry(key):
+    return dumps_line({"key": key, "qa": {"question": f"Q {key}?", "answer": f"A {key}."}})
+
+
+def test_checkpoint_skips_bad_middle_line_and_cuts_torn_tail(tmp_path):
+    path = tmp_path / "job.ckpt.jsonl"
+    path.write_bytes(
+        _entry("a")
+        + b'{"key": "b", "qa": {"quest\n'
+        + _entry("c")
+        + _entry("d")
+        + b'{"key": "e", "q'
+    )
+
+    with QACheckpoint(path) as checkpoint:
+        assert len(checkpoint) == 3
+        assert checkpoint.get("b") is None
+        assert checkpoint.get("d") == {"question": "Q d?", "answer": "A d."}
+        checkpoint.append("e", {"question": "Q e?", "answer": "A e."})
+
+    with QACheckpoint(path) as checkpoint:
+        assert sorted(k for k in "abcde" if checkpoint.get(k)) == ["a", "c", "d", "e"]
+    assert path.read_bytes().endswith(_entry("e"))
@@ -0,0 +1,181 @@
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+
+import mock_openrouter
+import qa_generator
+from json_codec import dumps_bytes
+from rate_limit import RateLimiter, TokenBucket
+
+
+def _texts(n):
+    return [
+        f"Topic{i} covers how the queue hands work to the cache and which settings operators change first."
+        for i in range(n)
+    ]
+
+
+def _records(n):
+    return [{"text": t} for t in _texts(n)]
+
+
+def _configure(url):
+    qa_generator.configure_qa(api_url=url, api_key="test", rpm=None, backoff_base=0.01)
+    qa_generator.reset_qa_stats()
+
+
+@pytest.fixture
+def mock():
+    servers = []
+
+    def start(**options):
+        server = mock_openrouter.serve(0, latency=0, **options)
+        servers.append(server)
+        _configure(f"http://127.0.0.1:{server.server_port}/api/v1/chat/completions")
+        return server.state
+
+    yield start
+    for server in servers:
+        server.shutdown()
+    qa_generator.configure_qa_cache(None)
+    qa_generator.configure_qa()
+
+
+def _questions(pairs):
+    return [p["messages"][0]["content"] for p in pairs]
+
+
+# ==================================================
+# Batched Prompts
+# ==================================================
+
+def test_batched_requests_keep_input_order(mock):
+    state = mock()
+    pairs = qa_generator.generate_qa_dataset(_records(6), max_items=None, batch_items=3)
+
+    assert _questions(pairs) == ["What is said about covers how the?"] * 6
+    assert [p["messages"][1]["content"].split()[0] for p in pairs] == [f"Topic{i}" for i in range(6)]
+    assert state.stats["ok"] == 2
+    assert qa_generator.qa_stats()["batches"] == 2
+
+
+def test_dropped_batch_items_are_retried_individually(mock):
+    state = mock(drop_rate=1.0)
+    pairs = qa_generator.generate_qa_dataset(_records(4), max_items=None, batch_items=4)
+
+    assert len(pairs) == 4
+    assert qa_generator.qa_stats()["requeued"] == 4
+    assert state.stats["ok"] == 1 + 4
+
+
+# ==================================================
+# Retry-After / Rate Limits
+# ==================================================
+
+@pytest.fixture
+def limited_once():
+    calls = []
+
+    class Handler(BaseHTTPRequestHandler):
+        def log_message(self, *args):
+            pass
+
+        def do_POST(self):
+            self.rfile.read(int(self.headers["Content-Length"]))
+            calls.append(time.monotonic())
+            if len(calls) == 1:
+                status, body, headers = 429, {"error": "rate limited"}, {"Retry-After": "0.4"}
+            else:
+                content = dumps_bytes({"question": "Why?", "answer": "Because."}).decode("utf-8")
+                status, body, headers = 200, {"choices": [{"message": {"content": content}}]}, {}
+            data = dumps_bytes(body)
+            self.send_response(status)
+            self.send_header("Content-Length", str(len(data)))
+            for k, v in headers.items():
+                self.send_header(k, v)
+            self.end_headers()
+            self.wfile.write(data)
+
+    server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    _configure(f"http://127.0.0.1:{server.server_port}/")
+    yield calls
+    server.shutdown()
+    qa_generator.configure_qa()
+
+
+def test_retry_after_is_honoured(limited_once):
+    pair = qa_generator.generate_qa_for_text(_texts(1)[0])
+
+    assert pair["messages"][1]["content"] == "Because."
+    assert len(limited_once) == 2
+    assert limited_once[1] - limited_once[0] >= 0.4
+    stats = qa_generator.qa_stats()
+    assert (stats["rate_limited"], stats["retries"]) == (1, 1)
+
+
+def test_parse_retry_after_forms():
+    assert qa_generator.parse_retry_after("2.5") == 2.5
+    assert qa_generator.parse_retry_after("Wed, 21 Oct 2015 07:28:00 GMT") == 0.0
+    assert qa_generator.parse_retry_after("soon") is None
+    assert qa_generator.parse_retry_after(None) is None
+
+
+def test_token_bucket_paces_after_burst():
+    bucket = TokenBucket(rate_per_minute=600, capacity=2)
+    assert bucket.acquire() == 0.0
+    assert bucket.acquire() == 0.0
+    assert bucket.acquire() >= 0.05
+
+    # Reported usage above the estimate is paid back before the next request
+    bucket.consume(2)
+    started = time.monotonic()
+    bucket.acquire()
+    assert time.monotonic() - started >= 0.2
+
+
+def test_pause_holds_back_every_caller():
+    limiter = RateLimiter()
+    limiter.pause(0.3)
+    waits = []
+    threads = [threading.Thread(target=lambda: waits.append(limiter.acquire())) for _ in range(3)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    assert len(waits) == 3 and min(waits) >= 0.2
+
+
+# ==================================================
+# Cache / Checkpoint
+# ==================================================
+
+def test_cache_hit_skips_the_request(mock, tmp_path):
+    state = mock()
+    qa_generator.configure_qa_cache(tmp_path / "cache")
+    text = _texts(1)[0]
+
+    first = qa_generator.generate_qa_for_text(text)
+    second = qa_generator.generate_qa_for_text(text)
+
+    assert first == second
+    assert state.stats["ok"] == 1
+    assert qa_generator.qa_stats()["cache_hits"] == 1
+
+
+def test_checkpoint_resume_requests_only_missing_chunks(mock, tmp_path):
+    state = mock()
+    checkpoint = tmp_path / "qa.ckpt.jsonl"
+
+    first = qa_generator.generate_qa_dataset(_records(6), max_items=3, checkpoint_path=checkpoint)
+    assert state.stats["ok"] == 3
+
+    qa_generator.reset_qa_stats()
+    resumed = qa_generator.generate_qa_dataset(_records(6), max_items=6, checkpoint_path=checkpoint)
+
+    assert resumed[:3] == first
+    assert len(resumed) == 6
+    assert state.stats["ok"] == 6
+    assert qa_generator.qa_stats()["checkpoint_hits"] == 3
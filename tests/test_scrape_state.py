@@ -0,0 +1,88 @@
+import pytest
+
+import mock_site
+from pipeline import iter_jsonl, run_pipeline
+from scrape_state import ScrapeStateStore
+
+
+@pytest.fixture
+def site():
+    server = mock_site.serve(0, pages=10, latency=0)
+    yield f"http://127.0.0.1:{server.server_port}"
+    server.shutdown()
+
+
+def _urls(origin):
+    return [f"{origin}/docs/page-{n}.html" for n in range(10)]
+
+
+# ==================================================
+# Interrupted Runs
+# ==================================================
+
+class _Interrupted(Exception):
+    pass
+
+
+def test_interrupted_run_leaves_state_untouched(site, tmp_path):
+    urls = _urls(site)
+    output = tmp_path / "out.jsonl"
+
+    def interrupt(done, total, url):
+        if done == 6:
+            raise _Interrupted(url)
+
+    state = ScrapeStateStore(tmp_path / "state")
+    state.begin_run()
+    with pytest.raises(_Interrupted):
+        run_pipeline(urls, output, progress=interrupt, state=state)
+    state.close()
+
+    # Nothing was committed: every page is new again and written in full
+    state = ScrapeStateStore(tmp_path / "state")
+    state.begin_run()
+    stats = run_pipeline(urls, output, state=state)
+    state.finish_run()
+    assert state.stats()["new"] == 10
+    assert stats["written_records"] > 0
+    assert len(list(iter_jsonl(output))) == stats["written_records"]
+    state.close()
+
+    # Once a run finishes, its pages are unchanged
+    state = ScrapeStateStore(tmp_path / "state")
+    state.begin_run()
+    stats = run_pipeline(urls, output, state=state)
+    state.finish_run()
+    assert state.stats()["unchanged"] == 10
+    assert stats["written_records"] == 0
+    state.close()
+
+
+# ==================================================
+# Tombstones
+# ==================================================
+
+def _run(state, fetched=(), listed=(), complete_hosts=()):
+    state.begin_run()
+    for url in fetched:
+        state.apply(url, {"status": "changed", "content_hash": url, "strategy": "static_html"})
+    for url in listed:
+        state.mark_listed(url)
+    return sorted(state.finish_run(complete_hosts))
+
+
+def test_only_listed_pages_are_tombstoned(tmp_path):
+    a, b, c = (f"https://example.com/{p}" for p in "abc")
+    state = ScrapeStateStore(tmp_path / "state")
+
+    # a and b come from a sitemap, c from a URL list
+    _run(state, fetched=[a, b, c], listed=[a, b])
+
+    # The next full listing drops b: c was never listed, so it stays
+    assert _run(state, listed=[a], complete_hosts=["example.com"]) == [b]
+    assert state.known_hash(b) is None
+    assert state.known_hash(c) == c
+
+    # Without a complete host nothing is tombstoned
+    assert _run(state, listed=[]) == []
+    state.close()
@@ -0,0 +1,38 @@
+from extractor import retry_strategy
+from strategy_selector import StrategySelector
+
+URL = "https://shop.example.com/item"
+
+
+def _learn(selector, strategy, chars, times):
+    for _ in range(times):
+        selector.record(URL, [(strategy, chars, 0.1)])
+
+
+def test_learned_http_strategy_still_escalates_to_render():
+    selector = StrategySelector(min_chars=300)
+    _learn(selector, "static_html", 1000, 3)
+
+    decision = selector.choose(URL, "js_rendered")
+    assert (decision.strategy, decision.reason) == ("static_html", "learned")
+    assert decision.escalate_to == "js_rendered"
+    assert retry_strategy(decision) == "js_rendered"
+
+    # Agreeing with the heuristic needs no escalation
+    decision = selector.choose(URL, "static_html")
+    assert decision.escalate_to is None
+    selector.close()
+
+
+def test_recent_failures_outweigh_old_successes():
+    selector = StrategySelector(min_chars=300, decay=0.9)
+    _learn(selector, "static_html", 1000, 50)
+    assert selector.choose(URL, "js_rendered").reason == "learned"
+
+    # The site moved its content behind JavaScript
+    _learn(selector, "static_html", 0, 5)
+    # 5 failures after 50 successes: no longer trusted, dom_based is explored
+    decision = selector.choose(URL, "js_rendered")
+    assert (decision.strategy, decision.reason) == ("dom_based", "explore")
+    assert selector.domain_report()["shop.example.com"]["static_html"]["attempts"] == 55
+    selector.close()